@@ -8,6 +8,7 @@ class AzureGroupsConfig(PluginConfig):
     author = 'Brynjar F. Aune'
     author_email = 'brynjar.aune@example.com'
     base_url = 'azure-groups'
+    graphql_schema = 'graphql.schema.schema'
     required_settings = []
     
     # Explicitly define navigation menu
@@ -23,6 +24,33 @@ class AzureGroupsConfig(PluginConfig):
         'show_sync_status': True,        # Display sync status badges in UI
         'enable_nested_membership': True, # Support nested group membership tracking
         'auto_calculate_counts': True,   # Automatically update member/owner counts
+        'metrics_enabled': True,         # Export endpoint timing/query histograms to /metrics
+        'coalesce_sync_changelog': True,  # One changelog summary per model per sync run instead of per row
+        'sync_changelog_diff_limit': 500,  # Max rows itemized in each sync changelog summary
+        'similarity_threshold': 0.9,     # Minimum Jaccard similarity stored by compute_group_similarity
+        'similarity_permutations': 128,  # MinHash signature length
+        'similarity_min_members': 2,     # Smaller groups are left out of similarity analysis
+        'role_similarity_threshold': 0.7,  # Jaccard similarity for joining a candidate role
+        'role_min_members': 5,           # Smaller clusters are not proposed as roles
+        'role_min_coverage': 0.8,        # Share of role members that must hold an access for it to be in the role
+        'rule_property_map': {},         # Extra rule property -> field paths, e.g. {'user.department': 'group__name'}
+        'access_path_max_depth': 10,     # Longest group chain followed when explaining access
+        'access_path_max_results': 100,  # Paths returned per access explanation
+        'blast_radius_top_resources': 25,  # Overlapping resources listed in a blast-radius summary
+        'snapshot_baseline_interval_days': 30,  # Days between full access snapshots; daily deltas in between
+        'grant_event_partitions_ahead': 3,  # Future monthly grant history partitions kept ready
+        'grant_event_retention_months': 84,  # Grant history kept (7 years); older monthly partitions are dropped
+        'outbox_endpoints': [],  # Event consumers [{'url', 'secret', 'topics', 'headers'}]; empty disables the outbox
+        'outbox_coalesce_seconds': 30,  # Events younger than this wait, so repeated changes merge into one
+        'outbox_batch_size': 500,  # Coalesced changes per delivered batch
+        'outbox_max_attempts': 10,  # Failed deliveries before an event is marked failed
+        'outbox_retention_days': 7,  # Delivered outbox events kept
+        'change_feed_retention_days': 30,  # Change feed entries kept; older cursors must resync
+        'access_cache_alias': 'default',  # Django cache for cached access lookups; None keeps them in process memory
+        'graph_tenants': [],  # Tenants read by sync_graph: [{'tenant_id', 'client_id', 'client_secret'}]
+        'graph_api_url': 'https://graph.microsoft.com/v1.0',
+        'graph_login_url': 'https://login.microsoftonline.com',
+        'graph_concurrency': 8,  # Concurrent Graph requests per tenant
     }
     
     # Cache settings for performance
@@ -31,4 +59,10 @@ class AzureGroupsConfig(PluginConfig):
         'cache_key': 'netbox_azure_groups',
     }
 
+    def ready(self):
+        super().ready()
+        from . import signals  # noqa: F401
+        from .filtersets import register_member_filters
+        register_member_filters()
+
 config = AzureGroupsConfig
\ No newline at end of file
@@ -0,0 +1,462 @@
+"""
+In-memory access graph for explaining how a contact reaches a resource and
+how far a grant to a group would reach.
+
+The graph is built from four tables:
+
+* contact GroupMembership rows: contact -> group, with ``nested_via`` chains
+* group nesting: child -> parent edges derived from those ``nested_via`` chains
+* active AccessControlMethods: group -> resource
+* FortiGatePolicies linked to those methods
+
+Each worker process keeps one copy. Writes to these tables are recorded as
+numbered change entries in the shared Django cache (see record_change()).
+Before answering, a process replays the entries it has not seen, re-reading only
+the affected rows. It falls back to a full reload when entries have expired
+or too many have piled up.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from netbox.plugins import get_plugin_config
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'netbox_azure_groups:access_graph:version'
+CHANGE_KEY = 'netbox_azure_groups:access_graph:change:{}'
+CHANGE_TIMEOUT = 24 * 3600
+
+# Replaying more change entries than this is slower than reloading
+MAX_REPLAY = 2000
+
+# Change kinds
+MEMBERSHIP = 'membership'
+METHOD = 'method'
+POLICY = 'policy'
+GROUP = 'group'
+RELOAD = 'reload'
+
+_deferred = ContextVar('access_graph_deferred', default=None)
+
+
+# Change recording
+
+def _initial_version():
+    # A fresh counter (e.g. after a cache flush) starts far from any version a process
+    # has seen, so nobody mistakes it for being up to date
+    return int(time.time() * 1000) * 1000
+
+
+def _publish(changes):
+    try:
+        cache.add(VERSION_KEY, _initial_version(), None)
+        end = cache.incr(VERSION_KEY, len(changes))
+    except ValueError:
+        # Version key evicted between add() and incr(); everyone reloads
+        cache.set(VERSION_KEY, _initial_version(), None)
+        return
+    start = end - len(changes) + 1
+    cache.set_many({CHANGE_KEY.format(start + i): change for i, change in enumerate(changes)}, CHANGE_TIMEOUT)
+
+
+def record_change(kind, pk):
+    """Publish a changed row once the surrounding transaction commits."""
+    deferred = _deferred.get()
+    if deferred is not None:
+        deferred.add((kind, pk))
+        return
+    transaction.on_commit(lambda: _publish([(kind, pk)]))
+
+
+@contextmanager
+def deferred_changes():
+    """Collect changes made by a bulk write and publish them together (or as one reload) at the end."""
+    if _deferred.get() is not None:
+        yield
+        return
+    changes = set()
+    token = _deferred.set(changes)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+        if changes:
+            batch = sorted(changes, key=str) if len(changes) <= MAX_REPLAY else [(RELOAD, None)]
+            transaction.on_commit(lambda: _publish(batch))
+
+
+# Graph
+
+def _group_ref(value, object_ids):
+    """Resolve a nested_via entry, which may be a group pk or an Azure object ID, to a pk."""
+    if isinstance(value, int):
+        return value
+    value = str(value)
+    if value.isdigit():
+        return int(value)
+    return object_ids.get(value.lower())
+
+
+class AccessGraph:
+
+    def __init__(self):
+        self.version = None
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.object_ids = {}                      # Azure object ID -> group pk
+        self.memberships = {}                     # membership pk -> (contact, group, type, chain)
+        self.contact_memberships = defaultdict(set)
+        self.edges = Counter()                    # (child group, parent group) -> supporting chains
+        self.parents = defaultdict(set)
+        self.children = defaultdict(set)
+        self.methods = {}                         # method pk -> (resource, group, access level)
+        self.group_methods = defaultdict(set)
+        self.policies = {}                        # policy pk -> method pk
+        self.method_policies = defaultdict(set)
+
+    # Loading
+
+    def load(self):
+        from .models import AccessControlMethod, AzureGroup, FortiGatePolicy, GroupMembership
+
+        self._reset()
+        for pk, object_id in AzureGroup.all_objects.values_list('pk', 'object_id').iterator(chunk_size=10000):
+            self.object_ids[str(object_id).lower()] = pk
+        memberships = GroupMembership.objects.filter(contact__isnull=False).values_list(
+            'pk', 'contact_id', 'group_id', 'membership_type', 'nested_via'
+        )
+        for pk, *row in memberships.iterator(chunk_size=10000):
+            self._add_membership(pk, *row)
+        methods = AccessControlMethod.objects.filter(is_active=True).values_list(
+            'pk', 'resource_id', 'azure_group_id', 'access_level'
+        )
+        for pk, *row in methods.iterator(chunk_size=10000):
+            self._add_method(pk, *row)
+        policies = FortiGatePolicy.objects.filter(access_control_method__isnull=False).values_list(
+            'pk', 'access_control_method_id'
+        )
+        for pk, method_id in policies.iterator(chunk_size=10000):
+            self._add_policy(pk, method_id)
+
+    def _chain(self, group_id, nested_via):
+        chain = [_group_ref(value, self.object_ids) for value in nested_via or ()]
+        return tuple(pk for pk in chain if pk is not None) + (group_id,)
+
+    def _add_membership(self, pk, contact_id, group_id, membership_type, nested_via):
+        chain = self._chain(group_id, nested_via)
+        self.memberships[pk] = (contact_id, group_id, membership_type, chain)
+        self.contact_memberships[contact_id].add(pk)
+        for edge in zip(chain, chain[1:]):
+            self.edges[edge] += 1
+            self.parents[edge[0]].add(edge[1])
+            self.children[edge[1]].add(edge[0])
+
+    def _remove_membership(self, pk):
+        contact_id, group_id, membership_type, chain = self.memberships.pop(pk)
+        self.contact_memberships[contact_id].discard(pk)
+        for edge in zip(chain, chain[1:]):
+            self.edges[edge] -= 1
+            if self.edges[edge] <= 0:
+                del self.edges[edge]
+                self.parents[edge[0]].discard(edge[1])
+                self.children[edge[1]].discard(edge[0])
+
+    def _add_method(self, pk, resource_id, group_id, access_level):
+        self.methods[pk] = (resource_id, group_id, access_level)
+        self.group_methods[group_id].add(pk)
+
+    def _remove_method(self, pk):
+        resource_id, group_id, access_level = self.methods.pop(pk)
+        self.group_methods[group_id].discard(pk)
+
+    def _add_policy(self, pk, method_id):
+        self.policies[pk] = method_id
+        self.method_policies[method_id].add(pk)
+
+    def _remove_policy(self, pk):
+        self.method_policies[self.policies.pop(pk)].discard(pk)
+
+    # Incremental refresh
+
+    def apply(self, changes):
+        """Re-read the rows named in ``changes`` (kind, pk) and patch the graph. Returns False if a reload is needed."""
+        from .models import AccessControlMethod, AzureGroup, FortiGatePolicy, GroupMembership
+
+        pks = defaultdict(set)
+        for kind, pk in changes:
+            if kind == RELOAD:
+                return False
+            pks[kind].add(pk)
+
+        if pks[GROUP]:
+            for pk, object_id in AzureGroup.all_objects.filter(pk__in=pks[GROUP]).values_list('pk', 'object_id'):
+                self.object_ids[str(object_id).lower()] = pk
+        if pks[MEMBERSHIP]:
+            for pk in pks[MEMBERSHIP] & self.memberships.keys():
+                self._remove_membership(pk)
+            rows = GroupMembership.objects.filter(pk__in=pks[MEMBERSHIP], contact__isnull=False).values_list(
+                'pk', 'contact_id', 'group_id', 'membership_type', 'nested_via'
+            )
+            for pk, *row in rows:
+                self._add_membership(pk, *row)
+        if pks[METHOD]:
+            for pk in pks[METHOD] & self.methods.keys():
+                self._remove_method(pk)
+            rows = AccessControlMethod.objects.filter(pk__in=pks[METHOD], is_active=True).values_list(
+                'pk', 'resource_id', 'azure_group_id', 'access_level'
+            )
+            for pk, *row in rows:
+                self._add_method(pk, *row)
+        if pks[POLICY]:
+            for pk in pks[POLICY] & self.policies.keys():
+                self._remove_policy(pk)
+            rows = FortiGatePolicy.objects.filter(
+                pk__in=pks[POLICY], access_control_method__isnull=False
+            ).values_list('pk', 'access_control_method_id')
+            for pk, method_id in rows:
+                self._add_policy(pk, method_id)
+        return True
+
+    def refresh(self):
+        """Bring the graph up to the latest published version."""
+        with self.lock:
+            current = cache.get(VERSION_KEY)
+            if current is None:
+                cache.add(VERSION_KEY, _initial_version(), None)
+                current = cache.get(VERSION_KEY)
+            if self.version == current:
+                return
+
+            pending = current - self.version if self.version is not None and current > self.version else None
+            if pending is not None and pending <= MAX_REPLAY:
+                keys = [CHANGE_KEY.format(version) for version in range(self.version + 1, current + 1)]
+                changes = cache.get_many(keys)
+                if len(changes) == len(keys) and self.apply(changes.values()):
+                    self.version = current
+                    return
+
+            logger.debug(f'Reloading access graph at version {current}')
+            self.load()
+            self.version = current
+
+    # Search
+
+    def paths(self, contact_id, resource_id, max_depth=None, max_paths=None):
+        """
+        Every group chain from a contact's memberships up to a group with a control method on the resource.
+
+        Returns ``(paths, truncated)`` where each path is ``(chain, membership_type, method_pk)``
+        and ``chain`` runs from the contact's group to the group holding the method.
+        """
+        if max_depth is None:
+            max_depth = get_plugin_config('netbox_azure_groups', 'access_path_max_depth')
+        if max_paths is None:
+            max_paths = get_plugin_config('netbox_azure_groups', 'access_path_max_results')
+
+        found = {}
+        stack = [
+            (self.memberships[pk][3], self.memberships[pk][2]) for pk in self.contact_memberships.get(contact_id, ())
+        ]
+        truncated = False
+        while stack:
+            chain, membership_type = stack.pop()
+            for method_id in self.group_methods.get(chain[-1], ()):
+                if self.methods[method_id][0] == resource_id:
+                    found.setdefault((chain, method_id), membership_type)
+                    if len(found) >= max_paths:
+                        return self._sorted(found), True
+            if len(chain) >= max_depth:
+                truncated = truncated or bool(self.parents.get(chain[-1]))
+                continue
+            for parent in self.parents.get(chain[-1], ()):
+                # Skip cycles in inconsistent nesting data
+                if parent not in chain:
+                    stack.append((chain + (parent,), membership_type))
+        return self._sorted(found), truncated
+
+    def descendants(self, group_id, max_depth=None):
+        """Groups nested (transitively) inside ``group_id``, up to ``max_depth`` levels down."""
+        if max_depth is None:
+            max_depth = get_plugin_config('netbox_azure_groups', 'access_path_max_depth')
+        seen = {group_id}
+        level = {group_id}
+        for _ in range(max_depth):
+            level = {child for parent in level for child in self.children.get(parent, ())} - seen
+            if not level:
+                break
+            seen |= level
+        seen.discard(group_id)
+        return seen
+
+    @staticmethod
+    def _sorted(found):
+        return sorted(
+            ((chain, membership_type, method_id) for (chain, method_id), membership_type in found.items()),
+            key=lambda path: (len(path[0]), path[0], path[2])
+        )
+
+
+_graph = AccessGraph()
+
+
+def access_graph():
+    """The process-wide access graph, refreshed to the latest version."""
+    _graph.refresh()
+    return _graph
+
+
+def explain_access(contact, resource):
+    """Serializable explanation of every path by which ``contact`` reaches ``resource``."""
+    from .models import AccessControlMethod, AzureGroup, FortiGatePolicy
+
+    graph = access_graph()
+    found, truncated = graph.paths(contact.pk, resource.pk)
+
+    group_ids = {pk for chain, _, _ in found for pk in chain}
+    method_ids = {method_id for _, _, method_id in found}
+    groups = {
+        group.pk: group for group in
+        AzureGroup.all_objects.filter(pk__in=group_ids).only('pk', 'name', 'object_id', 'is_deleted')
+    }
+    methods = AccessControlMethod.objects.in_bulk(method_ids)
+    policies = defaultdict(list)
+    for policy in FortiGatePolicy.objects.filter(access_control_method__in=method_ids).order_by('policy_id'):
+        policies[policy.access_control_method_id].append({
+            'id': policy.pk,
+            'policy_id': policy.policy_id,
+            'name': policy.name,
+            'fortigate_host': policy.fortigate_host,
+            'vdom': policy.vdom,
+            'action': policy.action,
+            'status': policy.status,
+        })
+
+    paths = []
+    for chain, membership_type, method_id in found:
+        # Soft-deleted groups keep their rows until purged but no longer grant access
+        if any(pk not in groups or groups[pk].is_deleted for pk in chain) or method_id not in methods:
+            continue
+        method = methods[method_id]
+        paths.append({
+            'membership_type': membership_type,
+            'groups': [
+                {'id': pk, 'name': groups[pk].name, 'object_id': str(groups[pk].object_id)} for pk in chain
+            ],
+            'depth': len(chain) - 1,
+            'control_method': {
+                'id': method.pk,
+                'name': method.name,
+                'control_type': method.control_type,
+            },
+            'access_level': method.access_level,
+            'firewall_policies': policies.get(method_id, []),
+        })
+
+    return {
+        'contact': contact.pk,
+        'resource': resource.pk,
+        'has_access': bool(paths),
+        'path_count': len(paths),
+        'truncated': truncated,
+        'paths': paths,
+    }
+
+
+# Blast radius
+
+def effective_groups(group):
+    """Primary keys of ``group`` and the live groups nested inside it."""
+    from .models import AzureGroup
+
+    nested = access_graph().descendants(group.pk)
+    return {group.pk, *AzureGroup.objects.filter(pk__in=nested).values_list('pk', flat=True)}
+
+
+def effective_memberships(group_ids):
+    from .models import GroupMembership
+
+    return GroupMembership.objects.filter(group_id__in=group_ids)
+
+
+def effective_contacts(group_ids):
+    from tenancy.models import Contact
+
+    memberships = effective_memberships(group_ids).filter(contact__isnull=False).values('contact_id')
+    return Contact.objects.filter(pk__in=memberships)
+
+
+def effective_devices(group_ids):
+    from dcim.models import Device
+
+    memberships = effective_memberships(group_ids).filter(device__isnull=False).values('device_id')
+    return Device.objects.filter(pk__in=memberships)
+
+
+def resource_overlap(group_ids):
+    """Resources the group's effective contacts already hold through active grants, most widely held first."""
+    from .models import AccessGrant
+
+    contacts = effective_memberships(group_ids).filter(contact__isnull=False).values('contact_id')
+    return AccessGrant.objects.filter(is_active=True, contact_id__in=contacts).values(
+        'resource_id', 'resource__name', 'resource__criticality'
+    ).annotate(
+        contacts=Count('contact_id', distinct=True),
+        granting_groups=Count('azure_group_id', distinct=True),
+    ).order_by('-contacts', 'resource__name')
+
+
+def blast_radius(group, top=None):
+    """
+    Who a grant to ``group`` would reach once nesting is included.
+
+    Effective members are the distinct contacts and devices with any membership
+    row (direct, nested or dynamic) in the group or a group nested inside it.
+    Business units come from the contact property ``user.department`` as mapped
+    for dynamic rules (a ``department`` custom field unless ``rule_property_map``
+    says otherwise).
+    """
+    from .rules import field_path
+
+    if top is None:
+        top = get_plugin_config('netbox_azure_groups', 'blast_radius_top_resources')
+    group_ids = effective_groups(group)
+    business_unit = field_path('user', 'department')
+    units = Counter()
+    for row in effective_contacts(group_ids).values(unit=F(business_unit)).annotate(contacts=Count('pk')):
+        # Missing keys, JSON null and blank strings all mean "no business unit"
+        units[row['unit'] if row['unit'] not in (None, '') else None] += row['contacts']
+    overlap = resource_overlap(group_ids)
+    resources = list(overlap[:top])
+
+    return {
+        'group': group.pk,
+        'nested_groups': len(group_ids) - 1,
+        'effective_contacts': effective_contacts(group_ids).count(),
+        'effective_devices': effective_devices(group_ids).count(),
+        'by_business_unit': [
+            {'business_unit': unit, 'contacts': count}
+            for unit, count in sorted(units.items(), key=lambda item: (-item[1], str(item[0])))
+        ],
+        'resource_count': overlap.count() if len(resources) == top else len(resources),
+        'resources': [resource_row(row) for row in resources],
+    }
+
+
+def resource_row(row):
+    """Serializable form of a resource_overlap() row."""
+    return {
+        'id': row['resource_id'],
+        'name': row['resource__name'],
+        'criticality': row['resource__criticality'],
+        'contacts': row['contacts'],
+        'granting_groups': row['granting_groups'],
+    }
@@ -1,10 +1,15 @@
+import uuid
 from rest_framework import serializers
-from netbox.api.serializers import NetBoxModelSerializer
+from netbox.api.serializers import BaseModelSerializer, NetBoxModelSerializer
 from ..models import (
     AzureGroup, GroupMembership, GroupOwnership,
     ProtectedResource, AccessControlMethod, AccessGrant,
-    FortiGatePolicy
+    FortiGatePolicy, GroupSimilarity, RoleCandidate, SyncRun, SyncSourceChoices, AccessSnapshot, GrantEvent,
+    ChangeFeedEntry
 )
+from ..change_feed import FEED_MODELS
+from ..rules import RuleError, compile_rule
+from ..sync import GROUP_SYNC_FIELDS
 
 
 class AzureGroupSerializer(NetBoxModelSerializer):
@@ -16,11 +21,12 @@ class AzureGroupSerializer(NetBoxModelSerializer):
             'id', 'url', 'display', 'object_id', 'name', 'description', 'group_type',
             'source', 'is_security_enabled', 'is_mail_enabled', 'mail', 'membership_type',
             'membership_rule', 'member_count', 'owner_count', 'azure_created', 'azure_modified',
-            'last_sync', 'is_deleted', 'created', 'last_updated', 'custom_fields', 'tags'
+            'last_sync', 'is_deleted', 'deleted_at', 'created', 'last_updated', 'custom_fields', 'tags'
         ]
         read_only_fields = [
-            'member_count', 'owner_count', 'last_sync', 'created', 'last_updated'
+            'member_count', 'owner_count', 'last_sync', 'deleted_at', 'created', 'last_updated'
         ]
+        brief_fields = ('id', 'url', 'display', 'object_id', 'name')
 
 
 class GroupMembershipSerializer(NetBoxModelSerializer):
@@ -104,4 +110,179 @@ class FortiGatePolicySerializer(NetBoxModelSerializer):
             'comments', 'ai_description', 'fortigate_host', 'vdom', 'last_fetched',
             'access_control_method', 'created', 'last_updated', 'custom_fields', 'tags'
         ]
-        read_only_fields = ['last_fetched', 'created', 'last_updated']
\ No newline at end of file
+        read_only_fields = ['last_fetched', 'created', 'last_updated']
+
+
+# Sync Serializers
+
+class SyncRunSerializer(BaseModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='plugins-api:netbox_azure_groups-api:syncrun-detail')
+    rows_total = serializers.IntegerField(read_only=True)
+    throughput = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = SyncRun
+        fields = [
+            'id', 'url', 'display', 'source', 'source_host', 'operation', 'status', 'started', 'finished',
+            'duration', 'rows_created', 'rows_updated', 'rows_unchanged', 'rows_deleted', 'rows_total',
+            'throughput', 'error_count', 'errors'
+        ]
+        brief_fields = ('id', 'url', 'display', 'source', 'operation', 'status', 'started')
+
+
+class GroupSimilaritySerializer(BaseModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='plugins-api:netbox_azure_groups-api:groupsimilarity-detail')
+    group_a = AzureGroupSerializer(nested=True, read_only=True)
+    group_b = AzureGroupSerializer(nested=True, read_only=True)
+    percent = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = GroupSimilarity
+        fields = [
+            'id', 'url', 'display', 'group_a', 'group_b', 'jaccard', 'percent', 'shared_members',
+            'total_members', 'computed'
+        ]
+        brief_fields = ('id', 'url', 'display', 'jaccard')
+
+
+class RoleCandidateSerializer(BaseModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='plugins-api:netbox_azure_groups-api:rolecandidate-detail')
+    closest_group = AzureGroupSerializer(nested=True, read_only=True)
+
+    class Meta:
+        model = RoleCandidate
+        fields = [
+            'id', 'url', 'display', 'name', 'member_count', 'permission_count', 'cohesion', 'permissions',
+            'closest_group', 'closest_group_jaccard', 'matching_groups', 'computed'
+        ]
+        brief_fields = ('id', 'url', 'display', 'name', 'member_count')
+
+
+class AccessSnapshotSerializer(BaseModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='plugins-api:netbox_azure_groups-api:accesssnapshot-detail')
+
+    class Meta:
+        model = AccessSnapshot
+        fields = [
+            'id', 'url', 'display', 'date', 'is_baseline', 'grant_count', 'resource_count', 'added_count',
+            'removed_count', 'size_bytes', 'created'
+        ]
+        brief_fields = ('id', 'url', 'display', 'date')
+
+
+class GrantEventSerializer(BaseModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='plugins-api:netbox_azure_groups-api:grantevent-detail')
+
+    class Meta:
+        model = GrantEvent
+        fields = [
+            'id', 'url', 'display', 'occurred', 'event', 'grant_id', 'resource_id', 'contact_id', 'azure_group_id',
+            'control_method_id', 'access_level', 'previous_access_level', 'granted_via', 'is_active', 'user_name',
+            'request_id'
+        ]
+        brief_fields = ('id', 'url', 'display', 'occurred', 'event')
+
+
+class ChangeFeedEntrySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ChangeFeedEntry
+        fields = ['model', 'object_id', 'action', 'occurred', 'data']
+
+
+class AzureGroupSyncSerializer(serializers.ModelSerializer):
+    """Validates one group record of a bulk sync payload without touching the database."""
+
+    class Meta:
+        model = AzureGroup
+        fields = GROUP_SYNC_FIELDS
+        # Uniqueness is resolved by the upsert itself
+        extra_kwargs = {'object_id': {'validators': []}}
+
+    def validate_object_id(self, value):
+        try:
+            uuid.UUID(value)
+        except ValueError:
+            raise serializers.ValidationError('Invalid UUID format')
+        return value
+
+
+class BulkSyncSerializer(serializers.Serializer):
+    source = serializers.ChoiceField(choices=SyncSourceChoices)
+    source_host = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class BulkGroupSyncSerializer(BulkSyncSerializer):
+    complete = serializers.BooleanField(
+        default=False,
+        help_text='Payload is the full group list; soft-delete missing groups of the same sources'
+    )
+    groups = serializers.ListField(child=serializers.DictField())
+
+
+class MemberSyncSerializer(serializers.Serializer):
+    contact = serializers.IntegerField(required=False, allow_null=True)
+    device = serializers.IntegerField(required=False, allow_null=True)
+    membership_type = serializers.ChoiceField(
+        choices=GroupMembership._meta.get_field('membership_type').choices,
+        default='direct'
+    )
+    nested_via = serializers.ListField(child=serializers.IntegerField(), required=False, allow_null=True)
+
+    def validate(self, data):
+        if bool(data.get('contact')) == bool(data.get('device')):
+            raise serializers.ValidationError('Specify exactly one of contact or device')
+        return data
+
+
+class GroupMembersSyncSerializer(serializers.Serializer):
+    object_id = serializers.CharField(max_length=36)
+    members = MemberSyncSerializer(many=True)
+
+
+class BulkMembershipSyncSerializer(BulkSyncSerializer):
+    groups = GroupMembersSyncSerializer(many=True)
+
+
+class RulePreviewSerializer(serializers.Serializer):
+    membership_rule = serializers.CharField(
+        required=False,
+        help_text="Candidate rule; defaults to the group's current membership_rule"
+    )
+    sample_size = serializers.IntegerField(default=10, min_value=0, max_value=100)
+
+    def validate_membership_rule(self, value):
+        try:
+            compile_rule(value.strip())
+        except RuleError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+
+class AccessAtSerializer(serializers.Serializer):
+    date = serializers.DateField(help_text='Day to reconstruct the grant set for')
+
+
+class AccessDiffSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    resource_id = serializers.ListField(child=serializers.IntegerField(), required=False)
+    contact_id = serializers.ListField(child=serializers.IntegerField(), required=False)
+    azure_group_id = serializers.IntegerField(required=False)
+    business_unit = serializers.CharField(required=False)
+    stream = serializers.BooleanField(default=False, help_text='Stream every change as newline-delimited JSON')
+
+    def validate(self, data):
+        if data['start'] > data['end']:
+            raise serializers.ValidationError('start must not be after end')
+        return data
+
+
+class ChangeFeedSerializer(serializers.Serializer):
+    cursor = serializers.CharField(required=False, help_text='Cursor returned by the previous page; omit to start')
+    model = serializers.ListField(
+        child=serializers.ChoiceField(choices=[model._meta.model_name for model in FEED_MODELS]),
+        required=False,
+        help_text='Restrict the feed to these models (repeatable)'
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
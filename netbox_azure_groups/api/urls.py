@@ -17,4 +17,18 @@ router.register('access-grants', viewsets.AccessGrantViewSet)
 # FortiGate Integration
 router.register('fortigate-policies', viewsets.FortiGatePolicyViewSet)
 
+# Sync Ledger
+router.register('sync-runs', viewsets.SyncRunViewSet)
+
+# Analytics
+router.register('group-similarities', viewsets.GroupSimilarityViewSet)
+router.register('role-candidates', viewsets.RoleCandidateViewSet)
+
+# Access History
+router.register('access-snapshots', viewsets.AccessSnapshotViewSet)
+router.register('grant-events', viewsets.GrantEventViewSet)
+
+# Change Feed
+router.register('changes', viewsets.ChangeFeedViewSet)
+
 urlpatterns = router.urls
\ No newline at end of file
@@ -1,23 +1,107 @@
-from django.utils import timezone
+import json
+from collections import Counter
 from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count, Max, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from netbox.api.viewsets import NetBoxModelViewSet, NetBoxReadOnlyModelViewSet
+from netbox.plugins import get_plugin_config
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
-from netbox.api.viewsets import NetBoxModelViewSet
+from rest_framework.viewsets import GenericViewSet
+from tenancy.models import Contact
+
+from ..access_graph import (
+    blast_radius,
+    effective_contacts,
+    effective_devices,
+    effective_groups,
+    explain_access,
+    resource_overlap,
+    resource_row,
+)
+from ..caching import CONTACT, GROUP, RESOURCE, cached
+from ..change_feed import FEED_MODELS, CursorError, CursorExpiredError, read_changes
+from ..changelog import run_changes
+from ..etags import ConditionalGetMixin
+from ..filtersets import GrantEventFilterSet, GroupSimilarityFilterSet
+from ..metrics import InstrumentedViewSetMixin
 from ..models import (
-    AzureGroup, GroupMembership, GroupOwnership,
-    ProtectedResource, AccessControlMethod, AccessGrant,
-    FortiGatePolicy
+    AccessControlMethod,
+    AccessGrant,
+    AccessSnapshot,
+    AzureGroup,
+    ChangeFeedEntry,
+    FortiGatePolicy,
+    GrantEvent,
+    GroupMembership,
+    GroupOwnership,
+    GroupSimilarity,
+    ProtectedResource,
+    RoleCandidate,
+    SyncRun,
+    SyncSourceChoices,
+    SyncStatusChoices,
+)
+from ..models.azure_groups import GroupSourceChoices, GroupTypeChoices
+from ..rules import RuleError, preview_rule
+from ..snapshots import access_diff, diff_contacts, grants_on, split_key
+from ..sync import (
+    GROUP_SYNC_OPERATIONS,
+    GROUP_SYNC_SOURCES,
+    import_fortigate_policies,
+    reconcile_memberships,
+    sync_run,
+    upsert_groups,
 )
-from ..models.azure_groups import GroupTypeChoices, GroupSourceChoices
 from .serializers import (
-    AzureGroupSerializer, GroupMembershipSerializer, GroupOwnershipSerializer,
-    ProtectedResourceSerializer, AccessControlMethodSerializer, AccessGrantSerializer,
-    FortiGatePolicySerializer
+    AccessAtSerializer,
+    AccessControlMethodSerializer,
+    AccessDiffSerializer,
+    AccessGrantSerializer,
+    AccessSnapshotSerializer,
+    AzureGroupSerializer,
+    AzureGroupSyncSerializer,
+    BulkGroupSyncSerializer,
+    BulkMembershipSyncSerializer,
+    ChangeFeedEntrySerializer,
+    ChangeFeedSerializer,
+    FortiGatePolicySerializer,
+    GrantEventSerializer,
+    GroupMembershipSerializer,
+    GroupOwnershipSerializer,
+    GroupSimilaritySerializer,
+    ProtectedResourceSerializer,
+    RoleCandidateSerializer,
+    RulePreviewSerializer,
+    SyncRunSerializer,
 )
 
 
-class AzureGroupViewSet(NetBoxModelViewSet):
-    queryset = AzureGroup.objects.filter(is_deleted=False)
+def stale_threshold():
+    return timezone.now() - timedelta(hours=get_plugin_config('netbox_azure_groups', 'stale_threshold_hours'))
+
+
+def require_model_perms(request, model, *actions):
+    """
+    Check model-level permissions for a bulk action. A POST only has NetBox
+    check ``add``, but sync actions also change and delete.
+    """
+    perms = [f'{model._meta.app_label}.{action}_{model._meta.model_name}' for action in actions]
+    if not request.user.has_perms(perms):
+        raise PermissionDenied(f"Requires the {', '.join(perms)} permissions")
+
+
+class PluginModelViewSet(InstrumentedViewSetMixin, ConditionalGetMixin, NetBoxModelViewSet):
+    """Base viewset for all plugin models."""
+
+
+class AzureGroupViewSet(PluginModelViewSet):
+    queryset = AzureGroup.objects.all()
     serializer_class = AzureGroupSerializer
     filterset_fields = [
         'name', 'object_id', 'group_type', 'source', 'is_security_enabled',
@@ -39,55 +123,164 @@ class AzureGroupViewSet(NetBoxModelViewSet):
                 choice[0]: queryset.filter(group_type=choice[0]).count()
                 for choice in GroupTypeChoices.CHOICES
             },
-            'stale_count': queryset.filter(
-                last_sync__lt=timezone.now() - timedelta(hours=24)
-            ).count(),
-            'deleted_count': AzureGroup.objects.filter(is_deleted=True).count(),
+            'stale_count': queryset.filter(last_sync__lt=stale_threshold()).count(),
+            'deleted_count': AzureGroup.all_objects.filter(is_deleted=True).count(),
         })
     
     @action(detail=False, methods=['get'], url_path='sync-status')
     def sync_status(self, request):
-        """Basic sync health check."""
-        queryset = self.get_queryset()
-        stale_threshold = timezone.now() - timedelta(hours=24)
-        
-        stale_groups = queryset.filter(last_sync__lt=stale_threshold)
-        
+        """Sync health from the latest SyncRun."""
+        runs = SyncRun.objects.restrict(request.user, 'view').filter(
+            source__in=GROUP_SYNC_SOURCES, operation__in=GROUP_SYNC_OPERATIONS
+        )
+        if source := request.query_params.get('source'):
+            runs = runs.filter(source=source)
+        latest = runs.order_by('-started').first()
+
+        if latest is None:
+            health = 'unknown'
+        elif latest.status == SyncStatusChoices.FAILED:
+            health = 'failed'
+        elif latest.status == SyncStatusChoices.RUNNING:
+            health = 'syncing'
+        elif latest.finished < stale_threshold():
+            health = 'stale'
+        else:
+            health = 'healthy'
+
         return Response({
-            'last_update': queryset.order_by('-last_sync').first().last_sync if queryset.exists() else None,
-            'total_groups': queryset.count(),
-            'stale_groups': stale_groups.count(),
-            'health': 'healthy' if not stale_groups.exists() else 'stale'
+            'health': health,
+            'last_update': latest.finished if latest else None,
+            'last_run': SyncRunSerializer(latest, context={'request': request}).data if latest else None,
         })
 
+    @action(detail=False, methods=['post'], url_path='bulk-sync')
+    def bulk_sync(self, request):
+        """Upsert groups from a directory sync, keyed by object_id."""
+        payload = BulkGroupSyncSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        require_model_perms(
+            request, AzureGroup, 'add', 'change', *(['delete'] if payload.validated_data['complete'] else [])
+        )
+
+        with sync_run(payload.validated_data['source'], 'groups', payload.validated_data['source_host']) as run:
+            records = []
+            for record in payload.validated_data['groups']:
+                serializer = AzureGroupSyncSerializer(data=record)
+                if serializer.is_valid():
+                    records.append(serializer.validated_data)
+                else:
+                    run.add_error(f"{record.get('object_id', 'unknown')}: {serializer.errors}")
+            upsert_groups(
+                run, records,
+                complete=payload.validated_data['complete'],
+                seen_object_ids={r.get('object_id') for r in payload.validated_data['groups']}
+            )
+
+        return Response(SyncRunSerializer(run, context={'request': request}).data)
+
+    @action(detail=True, methods=['post'], url_path='rule-preview')
+    def rule_preview(self, request, pk=None):
+        """Match count, sample and membership delta for a candidate dynamic rule. Nothing is written."""
+        group = self.get_object()
+        payload = RulePreviewSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        rule = payload.validated_data.get('membership_rule') or group.membership_rule
+        if not rule:
+            return Response({'membership_rule': ['This group has no membership rule to preview']}, status=400)
+
+        try:
+            preview = preview_rule(group, rule, payload.validated_data['sample_size'], user=request.user)
+        except RuleError as e:
+            return Response({'membership_rule': [str(e)]}, status=400)
+        return Response({'group': group.pk, 'membership_rule': rule, **preview})
+
+    @action(detail=True, methods=['get'], url_path='blast-radius')
+    def blast_radius(self, request, pk=None):
+        """
+        Effective reach of this group including nested groups.
+
+        Without ``detail`` returns counts, the business-unit breakdown and the
+        most widely held overlapping resources. ``detail=contacts``,
+        ``devices`` or ``resources`` returns that list, paginated.
+        """
+        from dcim.api.serializers import DeviceSerializer
+        from tenancy.api.serializers import ContactSerializer
+
+        group = self.get_object()
+        detail = request.query_params.get('detail')
+        if not detail:
+            return Response(blast_radius(group))
+
+        group_ids = effective_groups(group)
+        if detail == 'contacts':
+            queryset = effective_contacts(group_ids).restrict(request.user, 'view').order_by('pk')
+            serializer_class = ContactSerializer
+        elif detail == 'devices':
+            queryset = effective_devices(group_ids).restrict(request.user, 'view').order_by('pk')
+            serializer_class = DeviceSerializer
+        elif detail == 'resources':
+            page = self.paginate_queryset(resource_overlap(group_ids))
+            return self.get_paginated_response([resource_row(row) for row in page])
+        else:
+            return Response({'detail': ['Expected one of: contacts, devices, resources']}, status=400)
+
+        page = self.paginate_queryset(queryset)
+        serializer = serializer_class(page, many=True, nested=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['get'], url_path='provides-access-to')
     def provides_access_to(self, request, pk=None):
         """List all resources this Azure group provides access to."""
         group = self.get_object()
-        access_methods = AccessControlMethod.objects.filter(azure_group=group).select_related('resource')
-        resources = [method.resource for method in access_methods]
-        
-        return Response({
-            'group': group.name,
-            'provides_access_to': [
-                {
-                    'resource': resource.name,
-                    'resource_type': resource.get_resource_type_display(),
-                    'access_level': method.get_access_level_display(),
-                    'control_method': method.name
-                }
-                for method, resource in zip(access_methods, resources)
-            ]
-        })
 
+        def compute():
+            access_methods = AccessControlMethod.objects.filter(azure_group=group).select_related('resource')
+            resources = [method.resource for method in access_methods]
+            return {
+                'group': group.name,
+                'provides_access_to': [
+                    {
+                        'resource': resource.name,
+                        'resource_type': resource.get_resource_type_display(),
+                        'access_level': method.get_access_level_display(),
+                        'control_method': method.name
+                    }
+                    for method, resource in zip(access_methods, resources)
+                ]
+            }
 
-class GroupMembershipViewSet(NetBoxModelViewSet):
+        return Response(cached('provides_access_to', (GROUP, group.pk), compute))
+
+
+class GroupMembershipViewSet(PluginModelViewSet):
     queryset = GroupMembership.objects.all().order_by('pk')
     serializer_class = GroupMembershipSerializer
     filterset_fields = ['group', 'contact', 'device', 'membership_type']
 
+    @action(detail=False, methods=['post'], url_path='bulk-sync')
+    def bulk_sync(self, request):
+        """Reconcile the full member list of each given group."""
+        payload = BulkMembershipSyncSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        require_model_perms(request, GroupMembership, 'add', 'change', 'delete')
+        entries = payload.validated_data['groups']
+
+        with sync_run(payload.validated_data['source'], 'memberships', payload.validated_data['source_host']) as run:
+            groups = AzureGroup.objects.in_bulk([e['object_id'] for e in entries], field_name='object_id')
+            group_members = {}
+            for entry in entries:
+                group = groups.get(entry['object_id'])
+                if group is None:
+                    run.add_error(f"{entry['object_id']}: unknown group")
+                    continue
+                group_members[group] = entry['members']
+            reconcile_memberships(run, group_members)
 
-class GroupOwnershipViewSet(NetBoxModelViewSet):
+        return Response(SyncRunSerializer(run, context={'request': request}).data)
+
+
+class GroupOwnershipViewSet(PluginModelViewSet):
     queryset = GroupOwnership.objects.all().order_by('pk')
     serializer_class = GroupOwnershipSerializer
     filterset_fields = ['group', 'contact']
@@ -95,7 +288,7 @@ class GroupOwnershipViewSet(NetBoxModelViewSet):
 
 # Access Control ViewSets
 
-class ProtectedResourceViewSet(NetBoxModelViewSet):
+class ProtectedResourceViewSet(PluginModelViewSet):
     queryset = ProtectedResource.objects.all()
     serializer_class = ProtectedResourceSerializer
     filterset_fields = [
@@ -107,25 +300,28 @@ class ProtectedResourceViewSet(NetBoxModelViewSet):
     def who_has_access(self, request, pk=None):
         """List all users with access to this resource."""
         resource = self.get_object()
-        access_grants = AccessGrant.objects.filter(
-            resource=resource, 
-            is_active=True
-        ).select_related('contact', 'azure_group', 'control_method')
-        
-        return Response({
-            'resource': resource.name,
-            'access_grants': [
-                {
-                    'contact': grant.contact.name if grant.contact else None,
-                    'access_level': grant.get_access_level_display(),
-                    'via_group': grant.azure_group.name,
-                    'control_method': grant.control_method.name,
-                    'granted_via': grant.get_granted_via_display(),
-                    'first_granted': grant.first_granted
-                }
-                for grant in access_grants
-            ]
-        })
+
+        def compute():
+            access_grants = AccessGrant.objects.filter(
+                resource=resource,
+                is_active=True
+            ).select_related('contact', 'azure_group', 'control_method')
+            return {
+                'resource': resource.name,
+                'access_grants': [
+                    {
+                        'contact': grant.contact.name if grant.contact else None,
+                        'access_level': grant.get_access_level_display(),
+                        'via_group': grant.azure_group.name,
+                        'control_method': grant.control_method.name,
+                        'granted_via': grant.get_granted_via_display(),
+                        'first_granted': grant.first_granted
+                    }
+                    for grant in access_grants
+                ]
+            }
+
+        return Response(cached('who_has_access', (RESOURCE, resource.pk), compute))
 
     @action(detail=True, methods=['get'], url_path='access-methods')
     def access_methods(self, request, pk=None):
@@ -150,8 +346,56 @@ class ProtectedResourceViewSet(NetBoxModelViewSet):
             ]
         })
 
+    @action(detail=True, methods=['get'], url_path='access-paths')
+    def access_paths(self, request, pk=None):
+        """Every group chain, control method and firewall policy through which a contact reaches this resource."""
+        resource = self.get_object()
+        contact_id = request.query_params.get('contact_id')
+        if not contact_id:
+            return Response({'error': 'contact_id parameter required'}, status=400)
+        contacts = Contact.objects.restrict(request.user, 'view')
+        contact = contacts.filter(pk=contact_id).first() if contact_id.isdigit() else None
+        if contact is None:
+            return Response({'error': f'Contact {contact_id} not found'}, status=404)
+        return Response(explain_access(contact, resource))
+
+    @action(detail=True, methods=['get'], url_path='access-at')
+    def access_at(self, request, pk=None):
+        """
+        Who held access to this resource on ``?date=``, reconstructed from access snapshots (paginated).
+        Only contacts the user may view are listed.
+        """
+        resource = self.get_object()
+        params = AccessAtSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        date = params.validated_data['date']
+
+        snapshot, grants = grants_on(date, [resource.pk])
+        if snapshot is None:
+            return Response({'date': [f'No access snapshot on or before {date}']}, status=404)
 
-class AccessControlMethodViewSet(NetBoxModelViewSet):
+        keys = grants.get(resource.pk, ())
+        contacts = Contact.objects.restrict(request.user, 'view')
+        visible = set(
+            contacts.filter(pk__in={split_key(key)[0] for key in keys}).values_list('pk', flat=True)
+        )
+        page = self.paginate_queryset(sorted(key for key in keys if split_key(key)[0] in visible))
+        contacts = contacts.in_bulk({split_key(key)[0] for key in page})
+        results = []
+        for key in page:
+            contact_id, access_level = split_key(key)
+            contact = contacts.get(contact_id)
+            results.append({
+                'contact': contact_id,
+                'contact_name': contact.name if contact else None,
+                'access_level': access_level,
+            })
+        response = self.get_paginated_response(results)
+        response.data['snapshot_date'] = snapshot.date
+        return response
+
+
+class AccessControlMethodViewSet(PluginModelViewSet):
     queryset = AccessControlMethod.objects.all()
     serializer_class = AccessControlMethodSerializer
     filterset_fields = [
@@ -159,7 +403,7 @@ class AccessControlMethodViewSet(NetBoxModelViewSet):
     ]
 
 
-class AccessGrantViewSet(NetBoxModelViewSet):
+class AccessGrantViewSet(PluginModelViewSet):
     queryset = AccessGrant.objects.all()
     serializer_class = AccessGrantSerializer
     filterset_fields = [
@@ -173,26 +417,30 @@ class AccessGrantViewSet(NetBoxModelViewSet):
         contact_id = request.query_params.get('contact_id')
         if not contact_id:
             return Response({'error': 'contact_id parameter required'}, status=400)
-        
-        grants = AccessGrant.objects.filter(
-            contact_id=contact_id,
-            is_active=True
-        ).select_related('resource', 'azure_group', 'control_method')
-        
-        return Response({
-            'contact_id': contact_id,
-            'resource_access': [
-                {
-                    'resource': grant.resource.name,
-                    'resource_type': grant.resource.get_resource_type_display(),
-                    'access_level': grant.get_access_level_display(),
-                    'via_group': grant.azure_group.name,
-                    'control_method': grant.control_method.name,
-                    'first_granted': grant.first_granted
-                }
-                for grant in grants
-            ]
-        })
+        if not contact_id.isdigit():
+            return Response({'error': 'contact_id must be an integer'}, status=400)
+
+        def compute():
+            grants = AccessGrant.objects.filter(
+                contact_id=contact_id,
+                is_active=True
+            ).select_related('resource', 'azure_group', 'control_method')
+            return {
+                'contact_id': contact_id,
+                'resource_access': [
+                    {
+                        'resource': grant.resource.name,
+                        'resource_type': grant.resource.get_resource_type_display(),
+                        'access_level': grant.get_access_level_display(),
+                        'via_group': grant.azure_group.name,
+                        'control_method': grant.control_method.name,
+                        'first_granted': grant.first_granted
+                    }
+                    for grant in grants
+                ]
+            }
+
+        return Response(cached('by_contact', (CONTACT, int(contact_id)), compute))
 
     @action(detail=False, methods=['get'], url_path='analytics')
     def analytics(self, request):
@@ -217,7 +465,7 @@ class AccessGrantViewSet(NetBoxModelViewSet):
 
 # FortiGate ViewSet
 
-class FortiGatePolicyViewSet(NetBoxModelViewSet):
+class FortiGatePolicyViewSet(PluginModelViewSet):
     queryset = FortiGatePolicy.objects.all()
     serializer_class = FortiGatePolicySerializer
     filterset_fields = [
@@ -233,46 +481,15 @@ class FortiGatePolicyViewSet(NetBoxModelViewSet):
         if not isinstance(policies_data, list):
             return Response({'error': 'Expected list of policies'}, status=400)
         
-        created_count = 0
-        updated_count = 0
-        errors = []
+        hosts = sorted({str(p.get('fortigate_host', '')) for p in policies_data if isinstance(p, dict)})
         
-        for policy_data in policies_data:
-            try:
-                policy_id = policy_data.get('policy_id')
-                fortigate_host = policy_data.get('fortigate_host')
-                vdom = policy_data.get('vdom', 'root')
-                
-                # Try to find existing policy
-                existing = FortiGatePolicy.objects.filter(
-                    policy_id=policy_id,
-                    fortigate_host=fortigate_host,
-                    vdom=vdom
-                ).first()
-                
-                if existing:
-                    # Update existing policy
-                    serializer = self.get_serializer(existing, data=policy_data, partial=True)
-                    if serializer.is_valid():
-                        serializer.save()
-                        updated_count += 1
-                    else:
-                        errors.append(f"Policy {policy_id}: {serializer.errors}")
-                else:
-                    # Create new policy
-                    serializer = self.get_serializer(data=policy_data)
-                    if serializer.is_valid():
-                        serializer.save()
-                        created_count += 1
-                    else:
-                        errors.append(f"Policy {policy_id}: {serializer.errors}")
-                        
-            except Exception as e:
-                errors.append(f"Policy {policy_data.get('policy_id', 'unknown')}: {str(e)}")
+        with sync_run(SyncSourceChoices.FORTIGATE, 'policies', ','.join(hosts)) as run:
+            errors = import_fortigate_policies(run, policies_data, self.get_serializer)
         
         return Response({
-            'created': created_count,
-            'updated': updated_count,
+            'sync_run': run.pk,
+            'created': run.rows_created,
+            'updated': run.rows_updated,
             'errors': errors
         })
 
@@ -325,4 +542,155 @@ class FortiGatePolicyViewSet(NetBoxModelViewSet):
                 host: queryset.filter(fortigate_host=host).count()
                 for host in queryset.values_list('fortigate_host', flat=True).distinct()
             }
-        })
\ No newline at end of file
+        })
+
+
+# Sync Ledger ViewSet
+
+class SyncRunViewSet(InstrumentedViewSetMixin, ConditionalGetMixin, NetBoxReadOnlyModelViewSet):
+    queryset = SyncRun.objects.all()
+    serializer_class = SyncRunSerializer
+    filterset_fields = ['source', 'source_host', 'operation', 'status']
+
+    @action(detail=False, methods=['get'])
+    def trend(self, request):
+        """Sync duration and volume per day (or hour) over a recent window."""
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({'days': ['Expected a whole number of days']}, status=400)
+        days = max(1, min(days, 365))
+        trunc = TruncHour if request.query_params.get('interval') == 'hour' else TruncDay
+        runs = self.filter_queryset(self.get_queryset()).filter(
+            started__gte=timezone.now() - timedelta(days=days),
+            status=SyncStatusChoices.COMPLETED,
+        )
+        buckets = runs.annotate(bucket=trunc('started')).values('bucket').annotate(
+            runs=Count('pk'),
+            avg_duration=Avg('duration'),
+            max_duration=Max('duration'),
+            rows_created=Sum('rows_created'),
+            rows_updated=Sum('rows_updated'),
+            rows_unchanged=Sum('rows_unchanged'),
+            rows_deleted=Sum('rows_deleted'),
+            errors=Sum('error_count'),
+        ).order_by('bucket')
+
+        return Response({
+            'days': days,
+            'trend': list(buckets),
+        })
+
+    @action(detail=True, methods=['get'])
+    def changes(self, request, pk=None):
+        """Coalesced changelog summaries written by this run, one per model."""
+        run = self.get_object()
+        summaries = run_changes(run).restrict(request.user, 'view')
+        return Response([
+            {'id': change.pk, 'time': change.time, **change.postchange_data}
+            for change in summaries
+        ])
+
+
+class GroupSimilarityViewSet(InstrumentedViewSetMixin, ConditionalGetMixin, NetBoxReadOnlyModelViewSet):
+    queryset = GroupSimilarity.objects.select_related('group_a', 'group_b')
+    serializer_class = GroupSimilaritySerializer
+    filterset_class = GroupSimilarityFilterSet
+
+
+class RoleCandidateViewSet(InstrumentedViewSetMixin, ConditionalGetMixin, NetBoxReadOnlyModelViewSet):
+    queryset = RoleCandidate.objects.select_related('closest_group')
+    serializer_class = RoleCandidateSerializer
+    filterset_fields = ['closest_group', 'contacts']
+
+    @action(detail=True, methods=['get'])
+    def members(self, request, pk=None):
+        """Contacts clustered into this candidate role (paginated)."""
+        from tenancy.api.serializers import ContactSerializer
+
+        candidate = self.get_object()
+        contacts = candidate.contacts.restrict(request.user, 'view').order_by('pk')
+        page = self.paginate_queryset(contacts)
+        serializer = ContactSerializer(page, many=True, nested=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
+
+
+class AccessSnapshotViewSet(InstrumentedViewSetMixin, ConditionalGetMixin, NetBoxReadOnlyModelViewSet):
+    queryset = AccessSnapshot.objects.all()
+    serializer_class = AccessSnapshotSerializer
+    filterset_fields = ['date', 'is_baseline']
+
+    @action(detail=False, methods=['get'])
+    def diff(self, request):
+        """Grants granted, revoked or changed in level between two dates (paginated, or streamed as NDJSON)."""
+        params = AccessDiffSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        azure_group = None
+        if 'azure_group_id' in data:
+            azure_group = AzureGroup.objects.restrict(request.user, 'view').filter(pk=data['azure_group_id']).first()
+            if azure_group is None:
+                return Response({'azure_group_id': ['Azure group not found']}, status=404)
+        contact_ids = diff_contacts(data.get('contact_id'), azure_group, data.get('business_unit'), request.user)
+        before, after, changes = access_diff(data['start'], data['end'], data.get('resource_id'), contact_ids)
+        snapshots = {
+            'start_snapshot': before.date if before else None,
+            'end_snapshot': after.date if after else None,
+        }
+
+        if data['stream']:
+            def lines():
+                yield json.dumps(snapshots, cls=DjangoJSONEncoder) + '\n'
+                for change in changes:
+                    yield json.dumps(change, cls=DjangoJSONEncoder) + '\n'
+            return StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+
+        changes = list(changes)
+        page = self.paginate_queryset(changes)
+        response = self.get_paginated_response(page)
+        response.data.update(snapshots)
+        response.data['summary'] = dict(Counter(change['change'] for change in changes))
+        return response
+
+
+class GrantEventViewSet(InstrumentedViewSetMixin, ConditionalGetMixin, NetBoxReadOnlyModelViewSet):
+    queryset = GrantEvent.objects.all()
+    serializer_class = GrantEventSerializer
+    filterset_class = GrantEventFilterSet
+
+
+class ChangeFeedViewSet(InstrumentedViewSetMixin, GenericViewSet):
+    """
+    Creates, updates and deletes of plugin objects after a cursor, in commit-safe order.
+
+    Only objects the user may view are included, honouring object permission
+    constraints; deletes are listed for every model they may view.
+    """
+    queryset = ChangeFeedEntry.objects.all()
+    serializer_class = ChangeFeedEntrySerializer
+
+    def list(self, request):
+        params = ChangeFeedSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        names = set(params.validated_data.get('model') or [])
+        labels = [
+            model._meta.label_lower for model in FEED_MODELS
+            if (not names or model._meta.model_name in names)
+            and request.user.has_perm(f'{model._meta.app_label}.view_{model._meta.model_name}')
+        ]
+
+        try:
+            entries, cursor, has_more = read_changes(
+                params.validated_data.get('cursor'), labels, params.validated_data['limit'], request.user
+            )
+        except CursorExpiredError as e:
+            return Response({'error': str(e)}, status=410)
+        except CursorError as e:
+            return Response({'error': str(e)}, status=400)
+
+        return Response({
+            'cursor': cursor,
+            'has_more': has_more,
+            'results': self.get_serializer(entries, many=True).data,
+        })
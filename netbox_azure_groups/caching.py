@@ -0,0 +1,194 @@
+"""
+Versioned cache for the hot access lookups.
+
+``who-has-access`` (per resource), ``by-contact`` (per contact) and
+``provides-access-to`` (per group) are cached under keys that embed a version
+token of the object they describe, e.g.
+``netbox_azure_groups:who_has_access:resource:12:3f9c0e1a2b4d5e6f``. Writes
+replace the tokens of the objects they affect once their transaction commits
+(see invalidate() and signals.py), so the next read misses and recomputes while
+the old entry simply ages out. Nothing is ever scanned or deleted.
+
+Tokens are random rather than counters: replacing any number of them is one
+``set_many()``, and concurrent bumps can never reuse a token a reader has
+already cached under. Tokens always live in the shared Django cache so every
+worker sees a bump. Payloads go to the cache alias ``access_cache_alias``
+(NetBox's Redis cache by default); with ``None`` they are kept in a
+per-process local-memory cache instead, which is safe because a key never
+changes meaning.
+
+The same tokens, kept per model (``model_ref()``), version whole tables for
+the API's ETags (see etags.py).
+
+Timeout and key prefix come from the plugin's ``caching_config``.
+"""
+import secrets
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from netbox.plugins import get_plugin_config
+
+RESOURCE = 'resource'
+CONTACT = 'contact'
+GROUP = 'group'
+MODEL = 'model'
+
+# Version tokens may expire; a missing token is simply replaced by a new one
+VERSION_TIMEOUT = 7 * 24 * 3600
+
+LOCAL_MAX_ENTRIES = 10000
+
+_local = None
+_local_lock = threading.Lock()
+_deferred = ContextVar('access_cache_deferred', default=None)
+
+
+def _caching_config():
+    from . import config
+    return config.caching_config
+
+
+def _version_key(ref):
+    scope, pk = ref
+    return f"{_caching_config()['cache_key']}:version:{scope}:{pk}"
+
+
+def payload_cache():
+    """Cache holding the cached payloads."""
+    global _local
+    alias = get_plugin_config('netbox_azure_groups', 'access_cache_alias')
+    if alias:
+        return caches[alias]
+    if _local is None:
+        with _local_lock:
+            if _local is None:
+                _local = LocMemCache('netbox_azure_groups', {
+                    'TIMEOUT': _caching_config()['timeout'],
+                    'OPTIONS': {'MAX_ENTRIES': LOCAL_MAX_ENTRIES},
+                })
+    return _local
+
+
+# Versions
+
+def _token():
+    return secrets.token_hex(8)
+
+
+def version(ref):
+    """Current version token of a ``(scope, pk)`` reference, creating one if needed."""
+    key = _version_key(ref)
+    token = cache.get(key)
+    if token is None:
+        token = _token()
+        if not cache.add(key, token, VERSION_TIMEOUT):
+            token = cache.get(key) or token
+    return token
+
+
+def bump(refs):
+    """Give each ``(scope, pk)`` reference a new version token."""
+    if refs:
+        cache.set_many({_version_key(ref): _token() for ref in refs}, VERSION_TIMEOUT)
+
+
+def model_ref(model):
+    """Reference versioning a whole table."""
+    return MODEL, model._meta.label_lower
+
+
+def invalidate(refs):
+    """
+    Bump ``refs`` once the surrounding transaction commits, so no reader can
+    cache pre-commit data under the new token.
+    """
+    refs = {ref for ref in refs if ref[1] is not None}
+    if not refs:
+        return
+    deferred = _deferred.get()
+    if deferred is not None:
+        deferred.update(refs)
+        return
+    transaction.on_commit(lambda: bump(refs))
+
+
+@contextmanager
+def deferred_invalidation():
+    """Collect the invalidations of a bulk write and bump them together at the end."""
+    if _deferred.get() is not None:
+        yield
+        return
+    refs = set()
+    token = _deferred.set(refs)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+        if refs:
+            transaction.on_commit(lambda: bump(refs))
+
+
+# Reads
+
+def cached(name, ref, compute):
+    """
+    Return ``compute()`` cached under ``name`` and the current version of ``ref``.
+
+    The version is read before computing: a write committing meanwhile bumps
+    it, so a result computed from older data is stored under a key nobody
+    reads again.
+    """
+    scope, pk = ref
+    key = f"{_caching_config()['cache_key']}:{name}:{scope}:{pk}:{version(ref)}"
+    payloads = payload_cache()
+    data = payloads.get(key)
+    if data is None:
+        data = compute()
+        payloads.set(key, data, _caching_config()['timeout'])
+    return data
+
+
+# Dependencies
+
+def grant_refs(resource_id, contact_id):
+    return {(RESOURCE, resource_id), (CONTACT, contact_id)}
+
+
+def method_refs(method):
+    """Entries showing a control method: its group and resource, and the contacts holding grants through it."""
+    from .models import AccessGrant
+
+    contacts = AccessGrant.objects.filter(control_method=method).values_list('contact_id', flat=True).distinct()
+    return {(GROUP, method.azure_group_id), (RESOURCE, method.resource_id)} | {(CONTACT, pk) for pk in contacts}
+
+
+def resource_refs(resource):
+    """Entries showing a resource's name or type."""
+    from .models import AccessControlMethod, AccessGrant
+
+    contacts = AccessGrant.objects.filter(resource=resource).values_list('contact_id', flat=True).distinct()
+    groups = AccessControlMethod.objects.filter(resource=resource).values_list('azure_group_id', flat=True).distinct()
+    return {(RESOURCE, resource.pk)} | {(CONTACT, pk) for pk in contacts} | {(GROUP, pk) for pk in groups}
+
+
+def group_refs(group):
+    """Entries showing a group's name."""
+    from .models import AccessGrant
+
+    grants = AccessGrant.objects.filter(azure_group=group).values_list('resource_id', 'contact_id').distinct()
+    refs = {(GROUP, group.pk)}
+    for resource_id, contact_id in grants:
+        refs |= grant_refs(resource_id, contact_id)
+    return refs
+
+
+def contact_refs(contact):
+    """Entries showing a contact's name."""
+    from .models import AccessGrant
+
+    resources = AccessGrant.objects.filter(contact=contact).values_list('resource_id', flat=True).distinct()
+    return {(CONTACT, contact.pk)} | {(RESOURCE, pk) for pk in resources}
@@ -0,0 +1,197 @@
+"""
+Incremental change feed for plugin models.
+
+Every create, update and delete of a plugin object appends a ChangeFeedEntry
+right after it, inside the same transaction whenever the write runs in one
+(signals.py; the membership sync inserts each group's entries in one batch). Entries
+are read in ``(txid, id)`` order behind an opaque cursor through
+``/api/plugins/azure-groups/changes/``.
+
+Sequence values are assigned at insert time, not at commit, so paging by ID
+alone would skip an entry whose transaction commits after a later one was
+read. Each read therefore stops at the oldest transaction still in progress
+(``txid_snapshot_xmin``): everything before it has committed or rolled back,
+and every entry still to come sorts after the cursor. A poll is one index range
+scan from the cursor, costing time in proportion to the changes returned
+rather than the table size.
+
+Entries older than ``change_feed_retention_days`` are purged
+(``purge_change_feed``). Cursors carry the time they were issued, and one older
+than the retention window is rejected as expired so the consumer knows to
+resync instead of silently missing changes.
+"""
+import base64
+import binascii
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from netbox.plugins import get_plugin_config
+
+from .models import (
+    AccessControlMethod,
+    AccessGrant,
+    AzureGroup,
+    ChangeActionChoices,
+    ChangeFeedEntry,
+    FortiGatePolicy,
+    GroupMembership,
+    GroupOwnership,
+    ProtectedResource,
+)
+
+FEED_MODELS = (
+    AzureGroup, GroupMembership, GroupOwnership, ProtectedResource, AccessControlMethod, AccessGrant, FortiGatePolicy,
+)
+
+_batch = ContextVar('change_feed_batch', default=None)
+
+PURGE_CHUNK = 10000
+
+
+class CursorError(ValueError):
+    pass
+
+
+class CursorExpiredError(CursorError):
+    pass
+
+
+# Writing
+
+def related_ids(instance):
+    """Foreign key values of ``instance``, keyed by attname."""
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields if field.many_to_one
+    }
+
+
+def record(instance, action):
+    """Append a feed entry for ``instance``; buffered inside batched_entries()."""
+    entry = ChangeFeedEntry(
+        model=instance._meta.label_lower, object_id=instance.pk, action=action, data=related_ids(instance)
+    )
+    batch = _batch.get()
+    if batch is not None:
+        batch.append(entry)
+    else:
+        entry.save()
+
+
+@contextmanager
+def batched_entries():
+    """
+    Insert the entries recorded in the block with one bulk INSERT at its end.
+
+    Use it inside the transaction making the changes, so the entries commit
+    (or roll back) with them.
+    """
+    if _batch.get() is not None:
+        yield
+        return
+    entries = []
+    token = _batch.set(entries)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+    if entries:
+        ChangeFeedEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+# Cursors
+
+def encode_cursor(txid, pk, issued=None):
+    issued = int((issued or timezone.now()).timestamp())
+    return base64.urlsafe_b64encode(f'{txid}.{pk}.{issued}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """``(txid, id, issued)`` of a cursor."""
+    try:
+        txid, pk, issued = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split('.')
+        return int(txid), int(pk), datetime.fromtimestamp(int(issued), tz=dt_timezone.utc)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError, OSError):
+        raise CursorError(f'Invalid cursor: {cursor}')
+
+
+# Reading
+
+def visible_horizon():
+    """Oldest transaction ID still in progress; all entries below it are final."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+def visible_entries(user, models=None):
+    """
+    Q matching the entries of objects ``user`` may view, honouring object permission constraints.
+
+    Deletes are kept for every model in ``models`` (labels; default all feed
+    models): a deleted object can no longer be checked against constraints.
+    """
+    visible = Q(pk__in=[])
+    for model in FEED_MODELS:
+        label = model._meta.label_lower
+        if models is not None and label not in models:
+            continue
+        manager = getattr(model, 'all_objects', model.objects)
+        visible |= Q(model=label) & (
+            Q(action=ChangeActionChoices.DELETED) | Q(object_id__in=manager.restrict(user, 'view').values('pk'))
+        )
+    return visible
+
+
+def read_changes(cursor=None, models=None, limit=100, user=None):
+    """
+    Entries after ``cursor`` in commit-safe order.
+
+    Returns ``(entries, next cursor, has_more)``. ``models`` restricts the
+    feed to the given model labels, and ``user`` to the objects they may view
+    (see visible_entries()); the cursor still advances past the entries left
+    out.
+    """
+    horizon = visible_horizon()
+    entries = ChangeFeedEntry.objects.filter(txid__lt=horizon)
+    if cursor:
+        txid, pk, issued = decode_cursor(cursor)
+        retention = get_plugin_config('netbox_azure_groups', 'change_feed_retention_days')
+        if issued < timezone.now() - timedelta(days=retention):
+            raise CursorExpiredError('Cursor has expired; resync and start a new feed')
+        entries = entries.filter(txid__gte=txid).filter(Q(txid__gt=txid) | Q(id__gt=pk))
+    if models is not None:
+        entries = entries.filter(model__in=models)
+    if user is not None:
+        entries = entries.filter(visible_entries(user, models))
+
+    entries = list(entries.order_by('txid', 'id')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if has_more:
+        last = entries[-1]
+        next_cursor = encode_cursor(last.txid, last.pk, last.occurred)
+    else:
+        # Everything below the horizon has been read; later entries all sort after it
+        next_cursor = encode_cursor(horizon, 0)
+    return entries, next_cursor, has_more
+
+
+# Retention
+
+def purge_entries(retention_days=None):
+    """Delete entries older than ``retention_days`` in chunks. Returns the number deleted."""
+    if retention_days is None:
+        retention_days = get_plugin_config('netbox_azure_groups', 'change_feed_retention_days')
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted = 0
+    while True:
+        pks = list(ChangeFeedEntry.objects.filter(occurred__lt=cutoff).values_list('pk', flat=True)[:PURGE_CHUNK])
+        if not pks:
+            return deleted
+        deleted += ChangeFeedEntry.objects.filter(pk__in=pks).delete()[0]
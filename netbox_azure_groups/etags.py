@@ -0,0 +1,79 @@
+"""
+Weak ETags and conditional GET for plugin API list and detail endpoints.
+
+A list's ETag is derived from one aggregate query over the filtered queryset,
+``count`` plus ``max(last_updated)`` (or ``max(id)`` for tables without it), and
+the model's table version from caching.py, which signals.py bumps on every
+write to the model or to objects it nests. The request path and query string,
+the user and the negotiated format are mixed in. When ``If-None-Match`` matches,
+the view answers 304 without loading or serializing any rows. Detail views do
+the same from the fetched object's ``last_updated``.
+
+ETags are weak: they identify equivalent content, not identical bytes.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .caching import model_ref, version
+
+
+def weak_etag(*parts):
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/{quote_etag(digest)}'
+
+
+def etag_matches(request, etag):
+    """Weak comparison of ``etag`` against the request's If-None-Match header."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    tags = parse_etags(header)
+    opaque = _opaque(etag)
+    return '*' in tags or any(_opaque(tag) == opaque for tag in tags)
+
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def freshness_field(model):
+    """Field whose maximum changes whenever a row is added or edited."""
+    names = {field.name for field in model._meta.concrete_fields}
+    return 'last_updated' if 'last_updated' in names else 'pk'
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+
+class ConditionalGetMixin:
+    """Weak ETags on ``list`` and ``retrieve``; a matching If-None-Match returns 304 before serializing."""
+
+    def _etag(self, request, model, *state):
+        return weak_etag(
+            request.get_full_path(), request.user.pk, getattr(request, 'accepted_media_type', ''),
+            version(model_ref(model)), *state
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        stats = queryset.order_by().aggregate(count=Count('pk'), latest=Max(freshness_field(queryset.model)))
+        etag = self._etag(request, queryset.model, stats['count'], stats['latest'])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self._etag(request, type(instance), instance.pk, getattr(instance, 'last_updated', None))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = Response(self.get_serializer(instance).data)
+        response['ETag'] = etag
+        return response
@@ -1,6 +1,12 @@
+from functools import partial
+
 import django_filters
+from django.db.models import Exists, OuterRef, Q
 from django_filters import filterset
-from .models import AzureGroup, GroupMembership, GroupOwnership, ProtectedResource
+from utilities.filters import MultiValueNumberFilter
+
+from .access_graph import effective_groups
+from .models import AzureGroup, GrantEvent, GroupMembership, GroupOwnership, GroupSimilarity, ProtectedResource
 
 
 # Minimal filtersets for migration purposes only
@@ -40,4 +46,82 @@ class ProtectedResourceFilterSet(filterset.FilterSet):
         fields = [
             'name', 'resource_type', 'environment', 'criticality', 
             'business_unit', 'is_active', 'owner_contact'
-        ]
\ No newline at end of file
+        ]
+
+
+class GroupSimilarityFilterSet(filterset.FilterSet):
+    group_id = django_filters.NumberFilter(method='filter_group', label='Either group (ID)')
+    min_jaccard = django_filters.NumberFilter(field_name='jaccard', lookup_expr='gte')
+
+    class Meta:
+        model = GroupSimilarity
+        fields = ['group_a', 'group_b']
+
+    def filter_group(self, queryset, name, value):
+        return queryset.filter(Q(group_a_id=value) | Q(group_b_id=value))
+
+
+class GrantEventFilterSet(filterset.FilterSet):
+    # Bounding "occurred" lets PostgreSQL skip the monthly partitions outside the range
+    occurred_after = django_filters.IsoDateTimeFilter(field_name='occurred', lookup_expr='gte')
+    occurred_before = django_filters.IsoDateTimeFilter(field_name='occurred', lookup_expr='lt')
+    grant_id = MultiValueNumberFilter()
+    resource_id = MultiValueNumberFilter()
+    contact_id = MultiValueNumberFilter()
+    azure_group_id = MultiValueNumberFilter()
+
+    class Meta:
+        model = GrantEvent
+        fields = ['event', 'access_level', 'is_active']
+
+
+# Azure group filters for the Contact and Device filtersets
+
+def _memberships(member_fk, group_ids, effective):
+    memberships = GroupMembership.objects.filter(**{member_fk: OuterRef('pk')})
+    if not effective:
+        return Exists(memberships.filter(group_id__in=group_ids).exclude(membership_type='nested'))
+    # Same expansion as the blast radius: the groups plus those nested inside them in the access graph
+    groups = AzureGroup.objects.filter(pk__in=group_ids)
+    return Exists(memberships.filter(group_id__in=set().union(*(effective_groups(group) for group in groups))))
+
+
+def filter_by_azure_groups(queryset, name, value, mode, effective):
+    """
+    Filter members by Azure group membership, one EXISTS per condition.
+
+    ``all`` requires a membership in every group, ``any`` in at least one and
+    ``none`` in none of them. ``effective`` counts a member of any group nested
+    inside a given group (see access_graph.effective_groups()) as a member of
+    it. Each EXISTS probes the (group, member) unique index.
+    """
+    if not value:
+        return queryset
+    if mode == 'all':
+        for group_id in set(value):
+            queryset = queryset.filter(_memberships(name, [group_id], effective))
+        return queryset
+    exists = _memberships(name, value, effective)
+    return queryset.filter(exists if mode == 'any' else ~exists)
+
+
+def azure_group_filters(member_fk):
+    """Filters keyed ``azure_group_{all,any,none}`` plus ``..._effective`` variants, taking AzureGroup IDs."""
+    filters = {}
+    for suffix, effective in (('', False), ('_effective', True)):
+        for mode, label in (('all', 'In all of'), ('any', 'In any of'), ('none', 'In none of')):
+            filters[f'azure_group_{mode}{suffix}'] = MultiValueNumberFilter(
+                field_name=member_fk,
+                method=partial(filter_by_azure_groups, mode=mode, effective=effective),
+                label=f'{label} these Azure groups (ID){" incl. nested" if effective else ""}',
+            )
+    return filters
+
+
+def register_member_filters():
+    """Add the Azure group filters to NetBox's Contact and Device filtersets (UI lists and REST API)."""
+    from dcim.filtersets import DeviceFilterSet
+    from tenancy.filtersets import ContactFilterSet
+
+    ContactFilterSet.base_filters.update(azure_group_filters('contact'))
+    DeviceFilterSet.base_filters.update(azure_group_filters('device'))
@@ -75,7 +75,6 @@ class AzureGroupFilterForm(NetBoxModelFilterSetForm):
     )
     is_security_enabled = forms.BooleanField(required=False)
     is_mail_enabled = forms.BooleanField(required=False)
-    is_deleted = forms.BooleanField(required=False)
 
 
 class GroupMembershipForm(NetBoxModelForm):
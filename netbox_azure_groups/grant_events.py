@@ -0,0 +1,190 @@
+"""
+Append-only AccessGrant history in a month-partitioned table.
+
+Every grant state change (granted, revoked, reactivated, level changed,
+deleted) is written as a GrantEvent by the AccessGrant signal handlers or by
+record_grant_events() for bulk pipelines. The table is range-partitioned by
+month on ``occurred``: time-range queries only scan the months they cover, and
+retention drops whole partitions instead of deleting rows.
+
+Partitions are named ``netbox_azure_groups_grantevent_pYYYY_MM`` and cover one
+UTC calendar month. The writer creates a missing month on first use, and the
+``manage_grant_partitions`` command creates ``grant_event_partitions_ahead``
+months in advance and drops those older than ``grant_event_retention_months``.
+PostgreSQL only, like NetBox itself.
+"""
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from netbox.context import current_request
+from netbox.plugins import get_plugin_config
+
+from .models import GrantEvent, GrantEventChoices
+
+logger = logging.getLogger(__name__)
+
+TABLE = GrantEvent._meta.db_table
+PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+# Months known to have a partition in this process
+_known_months = set()
+
+
+# Months and partitions
+
+def month_of(moment):
+    """(year, month) of a datetime in UTC."""
+    moment = moment.astimezone(dt_timezone.utc) if timezone.is_aware(moment) else moment
+    return moment.year, moment.month
+
+
+def add_months(month, count):
+    year, number = month
+    index = year * 12 + number - 1 + count
+    return index // 12, index % 12 + 1
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month[0]:04d}_{month[1]:02d}'
+
+
+def _bound(month):
+    return datetime(month[0], month[1], 1, tzinfo=dt_timezone.utc).isoformat()
+
+
+def existing_partitions():
+    """Months with a partition, sorted."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass',
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return sorted(
+        (int(match[1]), int(match[2])) for match in map(PARTITION_NAME.match, names) if match
+    )
+
+
+def ensure_partition(month):
+    """Create the partition for ``month`` unless it exists. Returns True if it was created."""
+    if month in _known_months:
+        return False
+    name = partition_name(month)
+    created = False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [name])
+        if cursor.fetchone()[0] is None:
+            try:
+                with transaction.atomic():
+                    cursor.execute(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{TABLE}" '
+                        f'FOR VALUES FROM (%s) TO (%s)',
+                        [_bound(month), _bound(add_months(month, 1))],
+                    )
+                created = True
+                logger.info(f'Created grant event partition {name}')
+            except DatabaseError:
+                # Another process created it between the check and the CREATE
+                cursor.execute('SELECT to_regclass(%s)', [name])
+                if cursor.fetchone()[0] is None:
+                    raise
+    # Only trust the partition once it is committed; a rollback would take it with it
+    transaction.on_commit(lambda: _known_months.add(month))
+    return created
+
+
+@dataclass
+class PartitionResult:
+    created: list = field(default_factory=list)
+    dropped: list = field(default_factory=list)
+
+
+def maintain_partitions(ahead=None, retention_months=None, dry_run=False):
+    """Create partitions up to ``ahead`` months from now and drop those entirely past retention."""
+    if ahead is None:
+        ahead = get_plugin_config('netbox_azure_groups', 'grant_event_partitions_ahead')
+    if retention_months is None:
+        retention_months = get_plugin_config('netbox_azure_groups', 'grant_event_retention_months')
+
+    result = PartitionResult()
+    current = month_of(timezone.now())
+    existing = set(existing_partitions())
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing and (dry_run or ensure_partition(month)):
+            result.created.append(partition_name(month))
+
+    # A partition is expired once its last day is older than the retention window
+    oldest_kept = add_months(current, -retention_months)
+    for month in sorted(existing):
+        if month >= oldest_kept:
+            break
+        result.dropped.append(partition_name(month))
+        if not dry_run:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS "{partition_name(month)}"')
+            _known_months.discard(month)
+            logger.info(f'Dropped expired grant event partition {partition_name(month)}')
+    return result
+
+
+# Recording
+
+def grant_event(grant, event, previous_access_level='', occurred=None):
+    """Unsaved GrantEvent describing ``grant`` after ``event``."""
+    request = current_request.get()
+    user = getattr(request, 'user', None)
+    return GrantEvent(
+        occurred=occurred or timezone.now(),
+        event=event,
+        grant_id=grant.pk,
+        resource_id=grant.resource_id,
+        contact_id=grant.contact_id,
+        azure_group_id=grant.azure_group_id,
+        control_method_id=grant.control_method_id,
+        access_level=grant.access_level,
+        previous_access_level=previous_access_level,
+        granted_via=grant.granted_via,
+        is_active=grant.is_active,
+        user_name=user.username if user is not None and user.is_authenticated else '',
+        request_id=getattr(request, 'id', None),
+    )
+
+
+def change_events(grant, original):
+    """
+    Events for saving ``grant`` over its ``original`` field values; empty if nothing tracked changed.
+
+    A level change is reported alongside a revocation or reactivation in the
+    same save, before it and with the same timestamp.
+    """
+    if not original:
+        return [grant_event(grant, GrantEventChoices.GRANTED)]
+    occurred = timezone.now()
+    events = []
+    if original.get('access_level') != grant.access_level:
+        events.append(grant_event(
+            grant, GrantEventChoices.LEVEL_CHANGED, previous_access_level=original['access_level'], occurred=occurred
+        ))
+    if original.get('is_active') and not grant.is_active:
+        events.append(grant_event(grant, GrantEventChoices.REVOKED, occurred=occurred))
+    elif not original.get('is_active') and grant.is_active:
+        events.append(grant_event(grant, GrantEventChoices.REACTIVATED, occurred=occurred))
+    return events
+
+
+def record_grant_events(events):
+    """Append GrantEvents and their outbox events, creating any missing monthly partitions first."""
+    from .outbox import grant_outbox_event, write_events
+
+    events = [event for event in events if event is not None]
+    for month in {month_of(event.occurred) for event in events}:
+        ensure_partition(month)
+    write_events([grant_outbox_event(event) for event in events])
+    return GrantEvent.objects.bulk_create(events, batch_size=1000)
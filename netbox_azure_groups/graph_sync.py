@@ -0,0 +1,466 @@
+"""
+Incremental Microsoft Graph sync using delta queries.
+
+Each configured tenant (``graph_tenants``) is read through ``/groups/delta``
+and ``/groups/{id}/members/delta``. The first sync pages through everything;
+the delta links Graph returns at the end are saved per tenant
+(GraphDeltaToken), so later syncs only transfer what changed since.
+
+HTTP runs on an asyncio event loop in a background thread (GraphReader), up
+to ``graph_concurrency`` requests at a time. The database side stays
+synchronous and consumes results as they arrive:
+
+* Group pages are fetched one ahead of the page being written, and each page
+  goes straight into upsert_groups(); groups Graph reports as removed are
+  soft-deleted.
+* Every group on a page gets its member delta fetched concurrently. Each
+  finished member delta is applied to the group's stored member set and
+  passed to reconcile_memberships(), and its delta link saved, while further
+  group pages are still being read. At most a few member deltas per worker
+  are outstanding, so memory is bounded by that rather than by the tenant.
+
+The groups delta selects ``members``, so a group also shows up in the
+incremental group delta when only its members changed; only those groups have
+their member delta read.
+
+Throttling (429, 503, 504) honours ``Retry-After``, and pauses every request
+to the tenant, not just the throttled one. A delta link Graph no longer
+accepts (410) falls back to a full sync of that scope.
+
+Users are matched to contacts by ``mail`` or ``userPrincipalName`` against the
+contact email, devices to devices by name. Other members (nested groups,
+service principals) and users without a contact are left out; a full sync
+(``--full``) matches them again.
+
+Requires httpx (``pip install netbox-azure-groups[client]``).
+"""
+import asyncio
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_datetime
+from netbox.plugins import get_plugin_config
+
+from .models import (
+    AzureGroup,
+    GraphDeltaToken,
+    GroupSourceChoices,
+    GroupTypeChoices,
+    MembershipTypeChoices,
+    SyncSourceChoices,
+)
+from .sync import reconcile_memberships, soft_delete_groups, sync_run, upsert_groups
+
+try:
+    import httpx
+
+    from netbox_azure_groups_client.client import retry_after
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+GRAPH_SCOPE = 'https://graph.microsoft.com/.default'
+
+GROUP_SELECT = (
+    'id,displayName,description,mail,mailEnabled,securityEnabled,groupTypes,membershipRule,'
+    'onPremisesSyncEnabled,createdDateTime,members'
+)
+MEMBER_SELECT = 'id,displayName,mail,userPrincipalName'
+
+USER = '#microsoft.graph.user'
+DEVICE = '#microsoft.graph.device'
+
+THROTTLE_STATUSES = {429, 503, 504}
+MAX_RETRIES = 6
+BACKOFF = 1.0
+MAX_BACKOFF = 120.0
+
+# Member deltas allowed to wait for the database, per worker
+OUTSTANDING_PER_WORKER = 4
+
+
+def require_httpx():
+    if httpx is None:
+        raise RuntimeError('The Graph sync requires httpx: pip install netbox-azure-groups[client]')
+
+
+class GraphError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(f'Graph returned {status}: {message}')
+        self.status = status
+
+
+class DeltaExpiredError(GraphError):
+    """Graph no longer accepts a delta link; the scope must be read in full."""
+
+
+# Decoding
+
+def group_type(obj):
+    types = obj.get('groupTypes') or []
+    dynamic = 'DynamicMembership' in types
+    if 'Unified' in types:
+        return GroupTypeChoices.DYNAMIC_M365 if dynamic else GroupTypeChoices.MICROSOFT365
+    if dynamic:
+        return GroupTypeChoices.DYNAMIC_SECURITY
+    if obj.get('mailEnabled'):
+        return GroupTypeChoices.MAIL_SECURITY if obj.get('securityEnabled') else GroupTypeChoices.DISTRIBUTION
+    return GroupTypeChoices.SECURITY
+
+
+def group_record(obj):
+    """
+    upsert_groups() record for a Graph group.
+
+    Incremental deltas may carry only the changed properties, so only fields
+    whose properties are present are set; upsert_groups() keeps the rest.
+    """
+    record = {'object_id': obj['id']}
+    if 'displayName' in obj:
+        record['name'] = (obj['displayName'] or '')[:256]
+    if 'description' in obj:
+        record['description'] = obj['description'] or ''
+    if 'mail' in obj:
+        record['mail'] = obj['mail'] or ''
+    if 'mailEnabled' in obj:
+        record['is_mail_enabled'] = bool(obj['mailEnabled'])
+    if 'securityEnabled' in obj:
+        record['is_security_enabled'] = bool(obj['securityEnabled'])
+    if 'membershipRule' in obj:
+        record['membership_rule'] = obj['membershipRule'] or ''
+    if 'groupTypes' in obj:
+        record['group_type'] = group_type(obj)
+        record['membership_type'] = (
+            MembershipTypeChoices.DYNAMIC if 'DynamicMembership' in (obj['groupTypes'] or [])
+            else MembershipTypeChoices.ASSIGNED
+        )
+    if 'onPremisesSyncEnabled' in obj:
+        on_premises = obj['onPremisesSyncEnabled']
+        record['source'] = GroupSourceChoices.ON_PREMISES if on_premises else GroupSourceChoices.AZURE_AD
+    if obj.get('createdDateTime'):
+        record['azure_created'] = parse_datetime(obj['createdDateTime'])
+    return record
+
+
+def resolve_members(objects):
+    """Directory object ID -> ``[kind, pk]`` for the users and devices that match a contact or device."""
+    from dcim.models import Device
+    from tenancy.models import Contact
+
+    emails, names = {}, {}
+    for obj in objects:
+        if obj.get('@odata.type') == USER:
+            for address in (obj.get('mail'), obj.get('userPrincipalName')):
+                if address:
+                    emails.setdefault(address.lower(), obj['id'])
+        elif obj.get('@odata.type') == DEVICE and obj.get('displayName'):
+            names.setdefault(obj['displayName'], obj['id'])
+
+    resolved = {}
+    if emails:
+        contacts = Contact.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=emails)
+        for pk, email in contacts.values_list('pk', 'email_lower'):
+            resolved.setdefault(emails[email], ['contact', pk])
+    if names:
+        for pk, name in Device.objects.filter(name__in=names).values_list('pk', 'name'):
+            resolved.setdefault(names[name], ['device', pk])
+    return resolved
+
+
+# Reading
+
+@dataclass
+class MemberDelta:
+    object_id: str
+    members: List[dict] = field(default_factory=list)
+    delta_link: Optional[str] = None
+    # Read from scratch rather than from a saved delta link
+    full: bool = False
+
+
+class GraphReader:
+    """
+    Graph client for one tenant, running its own event loop in a background thread.
+
+    Synchronous code submits coroutines with submit() and reads results from
+    the returned futures; pages() iterates a paged collection one page ahead.
+
+        with GraphReader(tenant) as reader:
+            for page in reader.pages(reader.url('groups/delta')):
+                ...
+    """
+
+    def __init__(self, tenant, concurrency=None, api_url=None, login_url=None):
+        require_httpx()
+        self.tenant = tenant
+        self.concurrency = concurrency or get_plugin_config('netbox_azure_groups', 'graph_concurrency')
+        self.api_url = (api_url or get_plugin_config('netbox_azure_groups', 'graph_api_url')).rstrip('/')
+        self.login_url = (login_url or get_plugin_config('netbox_azure_groups', 'graph_login_url')).rstrip('/')
+        self.loop = None
+        self._thread = None
+        self._access_token = None
+        self._token_expires = 0.0
+        self._resume_at = 0.0
+
+    def __enter__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        self.submit(self._open()).result()
+        return self
+
+    def __exit__(self, *exc):
+        self.submit(self._close()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    async def _open(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._token_lock = asyncio.Lock()
+        self._client = httpx.AsyncClient(
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+
+    async def _close(self):
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._client.aclose()
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def url(self, path, select=None):
+        return f'{self.api_url}/{path}' + (f'?$select={select}' if select else '')
+
+    def pages(self, url):
+        """Pages of a collection, following ``@odata.nextLink``; the next page is fetched while one is processed."""
+        future = self.submit(self.get(url))
+        try:
+            while future is not None:
+                page = future.result()
+                next_link = page.get('@odata.nextLink')
+                future = self.submit(self.get(next_link)) if next_link else None
+                yield page
+        finally:
+            if future is not None:
+                future.cancel()
+
+    # Requests
+
+    async def _token(self):
+        async with self._token_lock:
+            if self._access_token is None or time.monotonic() > self._token_expires:
+                response = await self._client.post(
+                    f"{self.login_url}/{self.tenant['tenant_id']}/oauth2/v2.0/token",
+                    data={
+                        'grant_type': 'client_credentials',
+                        'client_id': self.tenant['client_id'],
+                        'client_secret': self.tenant['client_secret'],
+                        'scope': GRAPH_SCOPE,
+                    },
+                )
+                if response.status_code != 200:
+                    raise GraphError(response.status_code, response.text)
+                data = response.json()
+                self._access_token = data['access_token']
+                # Renew a minute early so long syncs never send an expiring token
+                self._token_expires = time.monotonic() + int(data.get('expires_in', 3600)) - 60
+            return self._access_token
+
+    async def _wait_for_throttle(self):
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def get(self, url):
+        """GET one Graph page, retrying throttling and transient failures."""
+        attempt = 0
+        while True:
+            await self._wait_for_throttle()
+            response = None
+            try:
+                token = await self._token()
+                async with self._semaphore:
+                    response = await self._client.get(url, headers={'Authorization': f'Bearer {token}'})
+            except httpx.TransportError as e:
+                if attempt >= MAX_RETRIES:
+                    raise GraphError(None, repr(e))
+            else:
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code == 410:
+                    raise DeltaExpiredError(410, response.text)
+                if response.status_code == 401 and attempt == 0:
+                    self._access_token = None
+                elif response.status_code not in THROTTLE_STATUSES and response.status_code < 500 \
+                        or attempt >= MAX_RETRIES:
+                    raise GraphError(response.status_code, response.text)
+
+            delay = retry_after(response) if response is not None else None
+            if delay is not None:
+                # Graph throttles per tenant: hold back every request, not just this one
+                self._resume_at = max(self._resume_at, time.monotonic() + delay)
+            else:
+                await asyncio.sleep(random.uniform(0, min(BACKOFF * 2 ** attempt, MAX_BACKOFF)))
+            attempt += 1
+
+    async def member_delta(self, object_id, delta_link=''):
+        """All pages of a group's member delta, from ``delta_link`` or from scratch."""
+        initial = self.url(f'groups/{object_id}/members/delta', MEMBER_SELECT)
+        delta = MemberDelta(object_id, full=not delta_link)
+        url = delta_link or initial
+        while True:
+            try:
+                page = await self.get(url)
+            except DeltaExpiredError as e:
+                if delta.full:
+                    raise GraphError(e.status, f'member delta of {object_id} expired while being read')
+                logger.info(f'Member delta link of {object_id} expired; reading all members')
+                delta = MemberDelta(object_id, full=True)
+                url = initial
+                continue
+            delta.members.extend(page.get('value', []))
+            url = page.get('@odata.nextLink')
+            if not url:
+                delta.delta_link = page.get('@odata.deltaLink')
+                return delta
+
+
+# Syncing
+
+def apply_member_delta(run, tenant_id, delta, state):
+    """Apply a member delta to the stored member set ``state``, reconcile the group and save the delta link."""
+    members = {} if delta.full else dict(state)
+    resolved = resolve_members([obj for obj in delta.members if '@removed' not in obj])
+    for obj in delta.members:
+        if '@removed' in obj:
+            members.pop(obj['id'], None)
+        elif obj['id'] in resolved:
+            members[obj['id']] = resolved[obj['id']]
+
+    group = AzureGroup.objects.filter(object_id=delta.object_id).first()
+    if group is not None:
+        membership_type = 'dynamic' if group.membership_type == MembershipTypeChoices.DYNAMIC else 'direct'
+        reconcile_memberships(run, {
+            group: [{kind: pk, 'membership_type': membership_type} for kind, pk in members.values()]
+        })
+    GraphDeltaToken.objects.update_or_create(
+        tenant_id=tenant_id, scope=delta.object_id, defaults={'delta_link': delta.delta_link or '', 'members': members}
+    )
+
+
+class TenantSync:
+    """One pass over a tenant's group and member deltas inside a SyncRun."""
+
+    def __init__(self, reader, run, tenant_id, full):
+        self.reader = reader
+        self.run = run
+        self.tenant_id = tenant_id
+        self.full = full
+        self.pending = {}
+        self.states = {}
+
+    def sync(self, delta_link=''):
+        """Read the groups delta from ``delta_link`` (everything if empty). Returns the new delta link."""
+        url = delta_link or self.reader.url('groups/delta', GROUP_SELECT)
+        seen = set()
+        for page in self.reader.pages(url):
+            object_ids = self.apply_group_page(page)
+            seen.update(object_ids)
+            self.fetch_members(object_ids)
+            delta_link = page.get('@odata.deltaLink') or delta_link
+        self.drain(wait_all=True)
+        if self.full:
+            self.sweep(seen)
+        return delta_link
+
+    def apply_group_page(self, page):
+        records, removed = [], []
+        for obj in page.get('value', []):
+            if '@removed' in obj:
+                removed.append(obj['id'])
+            else:
+                records.append(group_record(obj))
+        upsert_groups(self.run, records)
+        if removed:
+            self.remove(removed)
+        return [record['object_id'] for record in records]
+
+    def remove(self, object_ids):
+        soft_delete_groups(self.run, AzureGroup.objects.filter(object_id__in=object_ids))
+        GraphDeltaToken.objects.filter(tenant_id=self.tenant_id, scope__in=object_ids).delete()
+
+    def sweep(self, seen):
+        """After a full read, remove the tenant's groups that Graph no longer returned."""
+        known = GraphDeltaToken.objects.filter(tenant_id=self.tenant_id).exclude(scope=GraphDeltaToken.GROUPS)
+        missing = set(known.values_list('scope', flat=True)) - seen
+        if missing:
+            self.remove(list(missing))
+
+    def fetch_members(self, object_ids):
+        object_ids = [object_id for object_id in dict.fromkeys(object_ids) if object_id not in self.pending]
+        tokens = {}
+        if not self.full:
+            tokens = {
+                token.scope: token
+                for token in GraphDeltaToken.objects.filter(tenant_id=self.tenant_id, scope__in=object_ids)
+            }
+        for object_id in object_ids:
+            token = tokens.get(object_id)
+            self.states[object_id] = token.members if token else {}
+            future = self.reader.submit(self.reader.member_delta(object_id, token.delta_link if token else ''))
+            self.pending[object_id] = future
+            # Backpressure: don't read further ahead than the database keeps up with
+            while len(self.pending) >= self.reader.concurrency * OUTSTANDING_PER_WORKER:
+                self.drain(block=True)
+        self.drain()
+
+    def drain(self, block=False, wait_all=False):
+        """Apply finished member deltas; wait for one (``block``) or all (``wait_all``) of them."""
+        while self.pending:
+            done, _ = concurrent.futures.wait(
+                self.pending.values(),
+                timeout=None if block or wait_all else 0,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                delta = future.result()
+                del self.pending[delta.object_id]
+                apply_member_delta(self.run, self.tenant_id, delta, self.states.pop(delta.object_id))
+            if not wait_all:
+                return
+
+
+def sync_tenant(tenant, full=False, **reader_options):
+    """Sync one ``graph_tenants`` entry. Returns its SyncRun."""
+    tenant_id = tenant['tenant_id']
+    delta_link = ''
+    if not full:
+        token = GraphDeltaToken.objects.filter(tenant_id=tenant_id, scope=GraphDeltaToken.GROUPS).first()
+        delta_link = token.delta_link if token else ''
+
+    with GraphReader(tenant, **reader_options) as reader, \
+            sync_run(SyncSourceChoices.GRAPH, 'graph_delta', tenant_id) as run:
+        try:
+            delta_link = TenantSync(reader, run, tenant_id, full=not delta_link).sync(delta_link)
+        except DeltaExpiredError:
+            logger.warning(f'Group delta link of tenant {tenant_id} expired; running a full sync')
+            delta_link = TenantSync(reader, run, tenant_id, full=True).sync()
+        GraphDeltaToken.objects.update_or_create(
+            tenant_id=tenant_id, scope=GraphDeltaToken.GROUPS, defaults={'delta_link': delta_link or ''}
+        )
+    return run
+
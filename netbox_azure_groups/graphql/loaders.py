@@ -0,0 +1,146 @@
+"""
+Per-request batch loaders for GraphQL relations.
+
+NetBox executes GraphQL synchronously, so relations cannot wait for a DataLoader
+tick to collect keys. Instead, every resolver that returns a list of objects
+queues the related keys of those objects (queue_related()). The first time a
+child resolver asks a loader for any key, the loader fetches every queued key
+in one query and serves the siblings from its cache; the fetched objects queue
+their own related keys in turn. A nested query therefore costs one query per
+relation in the selection, regardless of how many objects it returns.
+
+Related objects are restricted to what the requesting user may view.
+"""
+from dcim.models import Device
+from tenancy.models import Contact
+
+from ..models import (
+    AccessControlMethod,
+    AccessGrant,
+    AzureGroup,
+    FortiGatePolicy,
+    GroupMembership,
+    GroupOwnership,
+    ProtectedResource,
+)
+
+# Forward relations: model -> {field: related model}
+FORWARD = {
+    GroupMembership: {'group': AzureGroup, 'contact': Contact, 'device': Device},
+    GroupOwnership: {'group': AzureGroup, 'contact': Contact},
+    ProtectedResource: {'owner_contact': Contact},
+    AccessControlMethod: {'resource': ProtectedResource, 'azure_group': AzureGroup},
+    AccessGrant: {
+        'resource': ProtectedResource, 'contact': Contact, 'azure_group': AzureGroup,
+        'control_method': AccessControlMethod,
+    },
+    FortiGatePolicy: {'access_control_method': AccessControlMethod},
+}
+
+# Reverse relations: model -> {field: (child model, foreign key on the child)}
+REVERSE = {
+    AzureGroup: {
+        'memberships': (GroupMembership, 'group'),
+        'ownerships': (GroupOwnership, 'group'),
+        'access_control_methods': (AccessControlMethod, 'azure_group'),
+        'access_grants': (AccessGrant, 'azure_group'),
+    },
+    ProtectedResource: {
+        'access_control_methods': (AccessControlMethod, 'resource'),
+        'access_grants': (AccessGrant, 'resource'),
+    },
+    AccessControlMethod: {
+        'access_grants': (AccessGrant, 'control_method'),
+        'fortigate_policies': (FortiGatePolicy, 'access_control_method'),
+    },
+}
+
+
+class Loader:
+    """Fetches queued keys in one batch on first use and caches the results."""
+
+    def __init__(self, fetch, default=None):
+        self.fetch = fetch
+        self.default = default
+        self.cache = {}
+        self.queued = set()
+
+    def queue(self, keys):
+        self.queued.update(key for key in keys if key is not None and key not in self.cache)
+
+    def load(self, key):
+        if key is None:
+            return self.default
+        if key not in self.cache:
+            keys = self.queued | {key}
+            self.queued = set()
+            found = self.fetch(keys)
+            for batch_key in keys:
+                self.cache[batch_key] = found.get(batch_key, self.default)
+        return self.cache[key]
+
+
+def _loaders(info):
+    request = info.context.request
+    if not hasattr(request, '_azure_groups_loaders'):
+        request._azure_groups_loaders = {}
+    return request._azure_groups_loaders
+
+
+def object_loader(info, model):
+    """Loader of ``model`` instances by primary key."""
+    loaders = _loaders(info)
+    key = model._meta.label_lower
+    if key not in loaders:
+        user = info.context.request.user
+
+        def fetch(pks):
+            objects = model.objects.restrict(user, 'view').in_bulk(pks)
+            queue_related(info, list(objects.values()))
+            return objects
+
+        loaders[key] = Loader(fetch)
+    return loaders[key]
+
+
+def children_loader(info, model, fk):
+    """Loader of lists of ``model`` instances by the value of their foreign key ``fk``."""
+    loaders = _loaders(info)
+    key = f'{model._meta.label_lower}.{fk}'
+    if key not in loaders:
+        user = info.context.request.user
+
+        def fetch(parent_ids):
+            children = {}
+            objects = list(model.objects.restrict(user, 'view').filter(**{f'{fk}__in': parent_ids}).order_by('pk'))
+            queue_related(info, objects)
+            for child in objects:
+                children.setdefault(getattr(child, f'{fk}_id'), []).append(child)
+            return children
+
+        loaders[key] = Loader(fetch, default=[])
+    return loaders[key]
+
+
+def queue_related(info, objects):
+    """Queue the related keys of ``objects`` so the next relation lookup batches them all."""
+    if not objects:
+        return objects
+    model = type(objects[0])
+    for name, related in FORWARD.get(model, {}).items():
+        object_loader(info, related).queue(getattr(obj, f'{name}_id') for obj in objects)
+    for child, fk in REVERSE.get(model, {}).values():
+        children_loader(info, child, fk).queue(obj.pk for obj in objects)
+    return objects
+
+
+def load_related(info, obj, name):
+    """The object ``obj.<name>`` refers to, loaded in a batch."""
+    related = FORWARD[type(obj)][name]
+    return object_loader(info, related).load(getattr(obj, f'{name}_id'))
+
+
+def load_children(info, obj, name):
+    """The objects of reverse relation ``name`` of ``obj``, loaded in a batch."""
+    child, fk = REVERSE[type(obj)][name]
+    return children_loader(info, child, fk).load(obj.pk)
@@ -0,0 +1,95 @@
+from typing import List, Optional
+
+import strawberry
+from strawberry.types import Info
+
+from .. import models
+from .loaders import queue_related
+from .types import (
+    AccessControlMethodType,
+    AccessGrantType,
+    AzureGroupType,
+    FortiGatePolicyType,
+    GroupMembershipType,
+    GroupOwnershipType,
+    ProtectedResourceType,
+)
+
+
+def get_object(info, model, id):
+    return model.objects.restrict(info.context.request.user, 'view').get(pk=id)
+
+
+def get_list(info, model, id=None):
+    """Objects of ``model`` the user may view, with their relations queued for batch loading."""
+    queryset = model.objects.restrict(info.context.request.user, 'view').order_by('pk')
+    if id:
+        queryset = queryset.filter(pk__in=id)
+    return queue_related(info, list(queryset))
+
+
+@strawberry.type(name='Query')
+class AzureGroupsQuery:
+
+    @strawberry.field
+    def azure_group(self, info: Info, id: int) -> AzureGroupType:
+        return get_object(info, models.AzureGroup, id)
+
+    @strawberry.field
+    def azure_group_list(self, info: Info, id: Optional[List[int]] = None) -> List[AzureGroupType]:
+        return get_list(info, models.AzureGroup, id)
+
+    @strawberry.field
+    def group_membership(self, info: Info, id: int) -> GroupMembershipType:
+        return get_object(info, models.GroupMembership, id)
+
+    @strawberry.field
+    def group_membership_list(self, info: Info, id: Optional[List[int]] = None) -> List[GroupMembershipType]:
+        return get_list(info, models.GroupMembership, id)
+
+    @strawberry.field
+    def group_ownership(self, info: Info, id: int) -> GroupOwnershipType:
+        return get_object(info, models.GroupOwnership, id)
+
+    @strawberry.field
+    def group_ownership_list(self, info: Info, id: Optional[List[int]] = None) -> List[GroupOwnershipType]:
+        return get_list(info, models.GroupOwnership, id)
+
+    @strawberry.field
+    def protected_resource(self, info: Info, id: int) -> ProtectedResourceType:
+        return get_object(info, models.ProtectedResource, id)
+
+    @strawberry.field
+    def protected_resource_list(self, info: Info, id: Optional[List[int]] = None) -> List[ProtectedResourceType]:
+        return get_list(info, models.ProtectedResource, id)
+
+    @strawberry.field
+    def access_control_method(self, info: Info, id: int) -> AccessControlMethodType:
+        return get_object(info, models.AccessControlMethod, id)
+
+    @strawberry.field
+    def access_control_method_list(
+        self, info: Info, id: Optional[List[int]] = None
+    ) -> List[AccessControlMethodType]:
+        return get_list(info, models.AccessControlMethod, id)
+
+    @strawberry.field
+    def access_grant(self, info: Info, id: int) -> AccessGrantType:
+        return get_object(info, models.AccessGrant, id)
+
+    @strawberry.field
+    def access_grant_list(self, info: Info, id: Optional[List[int]] = None) -> List[AccessGrantType]:
+        return get_list(info, models.AccessGrant, id)
+
+    @strawberry.field
+    def fortigate_policy(self, info: Info, id: int) -> FortiGatePolicyType:
+        return get_object(info, models.FortiGatePolicy, id)
+
+    @strawberry.field
+    def fortigate_policy_list(self, info: Info, id: Optional[List[int]] = None) -> List[FortiGatePolicyType]:
+        return get_list(info, models.FortiGatePolicy, id)
+
+
+schema = [
+    AzureGroupsQuery,
+]
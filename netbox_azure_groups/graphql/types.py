@@ -0,0 +1,179 @@
+from typing import TYPE_CHECKING, Annotated, List, Optional
+
+import strawberry
+import strawberry_django
+from netbox.graphql.types import BaseObjectType
+from strawberry.types import Info
+
+from .. import models
+from .loaders import load_children, load_related
+
+if TYPE_CHECKING:
+    from dcim.graphql.types import DeviceType
+    from tenancy.graphql.types import ContactType
+
+__all__ = (
+    'AzureGroupType',
+    'GroupMembershipType',
+    'GroupOwnershipType',
+    'ProtectedResourceType',
+    'AccessControlMethodType',
+    'AccessGrantType',
+    'FortiGatePolicyType',
+)
+
+# Relations resolve through the batch loaders (see loaders.py) rather than per-object queries
+
+LAZY = strawberry.lazy('netbox_azure_groups.graphql.types')
+
+
+@strawberry_django.type(
+    models.AzureGroup,
+    fields=[
+        'id', 'object_id', 'name', 'description', 'group_type', 'source', 'is_security_enabled', 'is_mail_enabled',
+        'mail', 'membership_type', 'membership_rule', 'member_count', 'owner_count', 'azure_created',
+        'azure_modified', 'last_sync', 'is_deleted', 'deleted_at', 'custom_field_data', 'created', 'last_updated',
+    ]
+)
+class AzureGroupType(BaseObjectType):
+
+    @strawberry.field
+    def memberships(self, info: Info) -> List[Annotated['GroupMembershipType', LAZY]]:
+        return load_children(info, self, 'memberships')
+
+    @strawberry.field
+    def ownerships(self, info: Info) -> List[Annotated['GroupOwnershipType', LAZY]]:
+        return load_children(info, self, 'ownerships')
+
+    @strawberry.field
+    def access_control_methods(self, info: Info) -> List[Annotated['AccessControlMethodType', LAZY]]:
+        return load_children(info, self, 'access_control_methods')
+
+    @strawberry.field
+    def access_grants(self, info: Info) -> List[Annotated['AccessGrantType', LAZY]]:
+        return load_children(info, self, 'access_grants')
+
+
+@strawberry_django.type(
+    models.GroupMembership,
+    fields=['id', 'membership_type', 'nested_via', 'custom_field_data', 'created', 'last_updated']
+)
+class GroupMembershipType(BaseObjectType):
+
+    @strawberry.field
+    def group(self, info: Info) -> Optional[Annotated['AzureGroupType', LAZY]]:
+        return load_related(info, self, 'group')
+
+    @strawberry.field
+    def contact(self, info: Info) -> Optional[Annotated['ContactType', strawberry.lazy('tenancy.graphql.types')]]:
+        return load_related(info, self, 'contact')
+
+    @strawberry.field
+    def device(self, info: Info) -> Optional[Annotated['DeviceType', strawberry.lazy('dcim.graphql.types')]]:
+        return load_related(info, self, 'device')
+
+
+@strawberry_django.type(
+    models.GroupOwnership,
+    fields=['id', 'assigned_date', 'custom_field_data', 'created', 'last_updated']
+)
+class GroupOwnershipType(BaseObjectType):
+
+    @strawberry.field
+    def group(self, info: Info) -> Optional[Annotated['AzureGroupType', LAZY]]:
+        return load_related(info, self, 'group')
+
+    @strawberry.field
+    def contact(self, info: Info) -> Optional[Annotated['ContactType', strawberry.lazy('tenancy.graphql.types')]]:
+        return load_related(info, self, 'contact')
+
+
+@strawberry_django.type(
+    models.ProtectedResource,
+    fields=[
+        'id', 'name', 'resource_type', 'description', 'base_url', 'ip_addresses', 'physical_location',
+        'business_unit', 'criticality', 'is_active', 'custom_field_data', 'created', 'last_updated',
+    ]
+)
+class ProtectedResourceType(BaseObjectType):
+
+    @strawberry.field
+    def owner_contact(self, info: Info) -> Optional[Annotated['ContactType', strawberry.lazy('tenancy.graphql.types')]]:
+        return load_related(info, self, 'owner_contact')
+
+    @strawberry.field
+    def access_control_methods(self, info: Info) -> List[Annotated['AccessControlMethodType', LAZY]]:
+        return load_children(info, self, 'access_control_methods')
+
+    @strawberry.field
+    def access_grants(self, info: Info) -> List[Annotated['AccessGrantType', LAZY]]:
+        return load_children(info, self, 'access_grants')
+
+
+@strawberry_django.type(
+    models.AccessControlMethod,
+    fields=[
+        'id', 'control_type', 'name', 'description', 'access_level', 'configuration', 'is_active', 'last_verified',
+        'custom_field_data', 'created', 'last_updated',
+    ]
+)
+class AccessControlMethodType(BaseObjectType):
+
+    @strawberry.field
+    def resource(self, info: Info) -> Optional[Annotated['ProtectedResourceType', LAZY]]:
+        return load_related(info, self, 'resource')
+
+    @strawberry.field
+    def azure_group(self, info: Info) -> Optional[Annotated['AzureGroupType', LAZY]]:
+        return load_related(info, self, 'azure_group')
+
+    @strawberry.field
+    def access_grants(self, info: Info) -> List[Annotated['AccessGrantType', LAZY]]:
+        return load_children(info, self, 'access_grants')
+
+    @strawberry.field
+    def fortigate_policies(self, info: Info) -> List[Annotated['FortiGatePolicyType', LAZY]]:
+        return load_children(info, self, 'fortigate_policies')
+
+
+@strawberry_django.type(
+    models.AccessGrant,
+    fields=[
+        'id', 'access_level', 'granted_via', 'first_granted', 'last_verified', 'is_active', 'custom_field_data',
+        'created', 'last_updated',
+    ]
+)
+class AccessGrantType(BaseObjectType):
+
+    @strawberry.field
+    def resource(self, info: Info) -> Optional[Annotated['ProtectedResourceType', LAZY]]:
+        return load_related(info, self, 'resource')
+
+    @strawberry.field
+    def contact(self, info: Info) -> Optional[Annotated['ContactType', strawberry.lazy('tenancy.graphql.types')]]:
+        return load_related(info, self, 'contact')
+
+    @strawberry.field
+    def azure_group(self, info: Info) -> Optional[Annotated['AzureGroupType', LAZY]]:
+        return load_related(info, self, 'azure_group')
+
+    @strawberry.field
+    def control_method(self, info: Info) -> Optional[Annotated['AccessControlMethodType', LAZY]]:
+        return load_related(info, self, 'control_method')
+
+
+@strawberry_django.type(
+    models.FortiGatePolicy,
+    fields=[
+        'id', 'policy_id', 'name', 'uuid', 'status', 'action', 'source_interfaces', 'destination_interfaces',
+        'source_addresses', 'destination_addresses', 'services', 'nat_enabled', 'nat_type',
+        'nat_outbound_interface', 'nat_pool_name', 'utm_status', 'profile_group', 'log_traffic', 'schedule',
+        'groups', 'comments', 'ai_description', 'fortigate_host', 'vdom', 'last_fetched', 'custom_field_data',
+        'created', 'last_updated',
+    ]
+)
+class FortiGatePolicyType(BaseObjectType):
+
+    @strawberry.field
+    def access_control_method(self, info: Info) -> Optional[Annotated['AccessControlMethodType', LAZY]]:
+        return load_related(info, self, 'access_control_method')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_azure_groups.similarity import refresh_group_similarity
+
+
+class Command(BaseCommand):
+    help = 'Find near-duplicate Azure groups with MinHash/LSH and store them as group similarities'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, help='Override similarity_threshold (0-1)')
+        parser.add_argument('--permutations', type=int, help='Override similarity_permutations')
+        parser.add_argument('--min-members', type=int, help='Override similarity_min_members')
+
+    def handle(self, *args, **options):
+        threshold = options['threshold']
+        if threshold is not None and not 0 < threshold <= 1:
+            raise CommandError('--threshold must be between 0 and 1')
+
+        try:
+            result = refresh_group_similarity(
+                threshold=threshold,
+                num_perm=options['permutations'],
+                min_members=options['min_members'],
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f'{result.groups} groups hashed, {result.candidates} candidate pairs '
+            f'({result.bands} bands x {result.rows} rows)'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Stored {result.pairs} similar group pair(s)'))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_azure_groups.outbox import dispatch, outbox_enabled
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending outbox events to the configured outbox_endpoints in coalesced batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep dispatching until interrupted')
+        parser.add_argument('--interval', type=int, default=10, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        if not outbox_enabled():
+            raise CommandError('No outbox_endpoints are configured')
+        if options['interval'] < 1:
+            raise CommandError('--interval must be at least 1')
+
+        while True:
+            result = dispatch()
+            if result.events or options['verbosity'] > 1:
+                self.stdout.write(
+                    f'{result.events} event(s) as {result.changes} change(s) in {result.batches} batch(es), '
+                    f'{result.failed_batches} failed, {result.purged} purged'
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
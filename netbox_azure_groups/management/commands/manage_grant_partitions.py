@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_azure_groups.grant_events import existing_partitions, maintain_partitions, partition_name
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly grant history partitions and drop those past grant_event_retention_months'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, help='Override grant_event_partitions_ahead')
+        parser.add_argument('--months', type=int, help='Override grant_event_retention_months')
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without making them')
+
+    def handle(self, *args, **options):
+        if options['months'] is not None and options['months'] < 1:
+            raise CommandError('--months must be at least 1')
+
+        result = maintain_partitions(
+            ahead=options['ahead'], retention_months=options['months'], dry_run=options['dry_run']
+        )
+        created, dropped = ('Would create', 'Would drop') if options['dry_run'] else ('Created', 'Dropped')
+        for name in result.created:
+            self.stdout.write(f'{created} {name}')
+        for name in result.dropped:
+            self.stdout.write(f'{dropped} {name}')
+
+        if options['verbosity'] > 1:
+            for month in existing_partitions():
+                self.stdout.write(partition_name(month))
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} {len(result.created)} partition(s), {dropped.lower()} {len(result.dropped)}'
+        ))
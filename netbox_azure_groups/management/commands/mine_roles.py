@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_azure_groups.role_mining import refresh_role_candidates
+
+
+class Command(BaseCommand):
+    help = 'Cluster contacts by their access grants into candidate roles for review'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, help='Override role_similarity_threshold (0-1)')
+        parser.add_argument('--min-members', type=int, help='Override role_min_members')
+        parser.add_argument('--min-coverage', type=float, help='Override role_min_coverage (0-1)')
+
+    def handle(self, *args, **options):
+        for option in ('threshold', 'min_coverage'):
+            if options[option] is not None and not 0 < options[option] <= 1:
+                raise CommandError(f'--{option.replace("_", "-")} must be between 0 and 1')
+
+        try:
+            result = refresh_role_candidates(
+                threshold=options['threshold'],
+                min_members=options['min_members'],
+                min_coverage=options['min_coverage'],
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f'{result.contacts} contacts x {result.permissions} permissions, '
+            f'{result.distinct_sets} distinct access sets'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Stored {result.roles} candidate role(s)'))
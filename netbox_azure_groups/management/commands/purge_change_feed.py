@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_azure_groups.change_feed import purge_entries
+
+
+class Command(BaseCommand):
+    help = 'Delete change feed entries older than change_feed_retention_days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Override change_feed_retention_days')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        deleted = purge_entries(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} change feed entries'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from netbox_azure_groups.retention import expired_groups, purge_deleted_groups
+
+
+class Command(BaseCommand):
+    help = 'Purge soft-deleted Azure groups older than soft_delete_retention_days, in bounded chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Override soft_delete_retention_days')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction')
+        parser.add_argument('--limit', type=int, help='Maximum number of groups to purge in this run')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between chunks')
+        parser.add_argument('--dry-run', action='store_true', help='List expired groups without deleting')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            groups = expired_groups(options['days']).values_list('pk', 'name', 'deleted_at')
+            for pk, name, deleted_at in groups:
+                self.stdout.write(f'{pk}\t{name}\tdeleted {deleted_at:%Y-%m-%d}')
+            self.stdout.write(f'{len(groups)} group(s) eligible for purge')
+            return
+
+        def progress(group_id, model, count):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'group {group_id}: deleted {count} {model._meta.verbose_name_plural}')
+
+        result = purge_deleted_groups(
+            retention_days=options['days'],
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+            pause=options['pause'],
+            progress=progress,
+        )
+        for label, count in sorted(result.rows_deleted.items()):
+            self.stdout.write(f'{label}: {count} deleted')
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {result.groups_purged} group(s), skipped {result.groups_skipped}'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from netbox_azure_groups.snapshots import SnapshotError, take_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Record the current active access grants as the daily access snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Snapshot date (YYYY-MM-DD), default today')
+        parser.add_argument(
+            '--baseline', action='store_true', help='Store full grant sets instead of a delta'
+        )
+
+    def handle(self, *args, **options):
+        date = None
+        if options['date']:
+            date = parse_date(options['date'])
+            if date is None:
+                raise CommandError('--date must be YYYY-MM-DD')
+
+        try:
+            result = take_snapshot(date, baseline=True if options['baseline'] else None)
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        snapshot = result.snapshot
+        self.stdout.write(
+            f'{snapshot.grant_count} grants on {snapshot.resource_count} resources, '
+            f'+{snapshot.added_count}/-{snapshot.removed_count} since the previous snapshot'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {snapshot} snapshot in {result.segments} segment(s), {snapshot.size_bytes} bytes'
+        ))
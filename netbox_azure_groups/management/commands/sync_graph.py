@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from netbox.plugins import get_plugin_config
+
+from netbox_azure_groups.graph_sync import GraphError, sync_tenant
+
+
+class Command(BaseCommand):
+    help = 'Sync groups and memberships from Microsoft Graph, transferring only changes since the last sync'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Only sync this tenant ID')
+        parser.add_argument('--full', action='store_true', help='Ignore saved delta links and read everything')
+
+    def handle(self, *args, **options):
+        tenants = get_plugin_config('netbox_azure_groups', 'graph_tenants')
+        if options['tenant']:
+            tenants = [tenant for tenant in tenants if tenant['tenant_id'] == options['tenant']]
+        if not tenants:
+            raise CommandError('No matching graph_tenants are configured')
+
+        for tenant in tenants:
+            try:
+                run = sync_tenant(tenant, full=options['full'])
+            except (GraphError, RuntimeError) as e:
+                raise CommandError(f"{tenant['tenant_id']}: {e}")
+            self.stdout.write(
+                f"{tenant['tenant_id']}: {run.rows_created} created, {run.rows_updated} updated, "
+                f"{run.rows_unchanged} unchanged, {run.rows_deleted} deleted, {run.error_count} errors "
+                f"in {run.duration:.1f}s"
+            )
@@ -0,0 +1,146 @@
+"""
+Prometheus instrumentation for plugin API actions, UI views and template extensions.
+
+Metrics are registered in the default prometheus_client registry, so they are
+exported by NetBox's own ``/metrics`` endpoint when ``METRICS_ENABLED`` is set.
+Each observation costs a couple of ``perf_counter()`` calls plus one wrapper
+call per SQL statement, which is cheap enough to leave on permanently.
+"""
+import functools
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.db import connection
+from netbox.plugins import get_plugin_config
+from prometheus_client import Histogram
+
+LABELS = ['component', 'endpoint']
+
+REQUEST_SECONDS = Histogram(
+    'netbox_azure_groups_request_seconds',
+    'Wall time spent handling a plugin endpoint',
+    LABELS,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_QUERIES = Histogram(
+    'netbox_azure_groups_db_queries',
+    'Database queries executed per plugin endpoint call',
+    LABELS,
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000),
+)
+DB_SECONDS = Histogram(
+    'netbox_azure_groups_db_seconds',
+    'Database time spent per plugin endpoint call',
+    LABELS,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+ROWS_SERIALIZED = Histogram(
+    'netbox_azure_groups_rows_serialized',
+    'Rows returned per plugin API call',
+    LABELS,
+    buckets=(0, 1, 10, 50, 100, 250, 500, 1000, 5000, 10000),
+)
+
+
+def metrics_enabled():
+    return get_plugin_config('netbox_azure_groups', 'metrics_enabled')
+
+
+class QueryMeter:
+    """Database execute wrapper counting statements and their wall time."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += perf_counter() - start
+
+
+@contextmanager
+def observe(component, endpoint):
+    """
+    Time a block and record its wall time, query count and DB time.
+
+    Yields the QueryMeter so callers can set ``rows`` once the result size is
+    known. ``endpoint`` may also be a callable, resolved after the block runs,
+    for cases where the label is only known after dispatch.
+    """
+    if not metrics_enabled():
+        yield QueryMeter()
+        return
+
+    meter = QueryMeter()
+    start = perf_counter()
+    try:
+        with connection.execute_wrapper(meter):
+            yield meter
+    finally:
+        elapsed = perf_counter() - start
+        label = endpoint() if callable(endpoint) else endpoint
+        REQUEST_SECONDS.labels(component, label).observe(elapsed)
+        DB_QUERIES.labels(component, label).observe(meter.queries)
+        DB_SECONDS.labels(component, label).observe(meter.db_seconds)
+        if meter.rows is not None:
+            ROWS_SERIALIZED.labels(component, label).observe(meter.rows)
+
+
+def instrumented(component, endpoint):
+    """Decorator form of observe() for plain functions and methods."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with observe(component, endpoint):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count_rows(data):
+    """Number of serialized rows in a DRF response payload."""
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        results = data.get('results')
+        return len(results) if isinstance(results, list) else 1
+    return 0
+
+
+def metered_stream(content, component, endpoint):
+    """Iterate a streaming response body inside observe(), so queries run while it is sent are recorded."""
+    with observe(component, endpoint):
+        yield from content
+
+
+class InstrumentedViewSetMixin:
+    """
+    Records metrics for every viewset action, labelled ``<basename>.<action>``.
+
+    A streaming response is only consumed after dispatch returns, so its body
+    is observed separately, labelled ``<basename>.<action>.stream``.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        def label():
+            return f'{self.basename}.{getattr(self, "action", None) or "unknown"}'
+
+        with observe('api', label) as meter:
+            response = super().dispatch(request, *args, **kwargs)
+            meter.rows = count_rows(getattr(response, 'data', None))
+        if getattr(response, 'streaming', False) and metrics_enabled():
+            response.streaming_content = metered_stream(response.streaming_content, 'api', f'{label()}.stream')
+        return response
+
+
+class InstrumentedViewMixin:
+    """Records metrics for a UI view, labelled with the view class name."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with observe('ui', self.__class__.__name__):
+            return super().dispatch(request, *args, **kwargs)
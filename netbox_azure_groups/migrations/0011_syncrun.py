@@ -0,0 +1,42 @@
+# Sync run ledger
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0010_add_complete_fortigate_policy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('graph', 'Microsoft Graph'), ('on_premises', 'On-Premises AD'), ('fortigate', 'FortiGate')], help_text='System the data was synchronized from', max_length=20)),
+                ('source_host', models.CharField(blank=True, help_text='Tenant, domain or FortiGate host the run read from', max_length=200)),
+                ('operation', models.CharField(help_text='Sync path that wrote this run (e.g., "groups", "memberships")', max_length=50)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('started', models.DateTimeField(default=django.utils.timezone.now, help_text='When the run started')),
+                ('finished', models.DateTimeField(blank=True, help_text='When the run finished', null=True)),
+                ('duration', models.FloatField(blank=True, help_text='Run duration in seconds', null=True)),
+                ('rows_created', models.PositiveIntegerField(default=0)),
+                ('rows_updated', models.PositiveIntegerField(default=0)),
+                ('rows_unchanged', models.PositiveIntegerField(default=0)),
+                ('rows_deleted', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list, help_text='First errors reported during the run')),
+            ],
+            options={
+                'verbose_name': 'Sync Run',
+                'verbose_name_plural': 'Sync Runs',
+                'ordering': ['-started'],
+                'indexes': [
+                    models.Index(fields=['-started'], name='nbag_syncrun_started'),
+                    models.Index(fields=['source', '-started'], name='nbag_syncrun_source_started'),
+                ],
+            },
+        ),
+    ]
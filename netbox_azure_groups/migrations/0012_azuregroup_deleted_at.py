@@ -0,0 +1,31 @@
+# Soft-delete timestamp for retention purging
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Now
+
+
+def backfill_deleted_at(apps, schema_editor):
+    AzureGroup = apps.get_model('netbox_azure_groups', 'AzureGroup')
+    AzureGroup.objects.filter(is_deleted=True, deleted_at__isnull=True).update(
+        deleted_at=Coalesce('last_updated', Now())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0011_syncrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='azuregroup',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the group was soft-deleted; drives retention purging', null=True),
+        ),
+        migrations.RunPython(backfill_deleted_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='azuregroup',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='nbag_group_deleted_at'),
+        ),
+    ]
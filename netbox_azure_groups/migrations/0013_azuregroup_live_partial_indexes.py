@@ -0,0 +1,35 @@
+# Partial indexes covering live (not soft-deleted) groups
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0012_azuregroup_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='azuregroup',
+            options={'default_manager_name': 'all_objects', 'ordering': ['name'], 'verbose_name': 'Azure Group', 'verbose_name_plural': 'Azure Groups'},
+        ),
+        # The partial index replaces the plain index on name
+        migrations.AlterField(
+            model_name='azuregroup',
+            name='name',
+            field=models.CharField(help_text='Group display name', max_length=256),
+        ),
+        migrations.AddIndex(
+            model_name='azuregroup',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['name'], name='nbag_group_live_name'),
+        ),
+        migrations.AddIndex(
+            model_name='azuregroup',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['source', 'group_type'], name='nbag_group_live_source_type'),
+        ),
+        migrations.AddIndex(
+            model_name='azuregroup',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['last_sync'], name='nbag_group_live_last_sync'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Content hashes used by the sync paths to skip no-op writes.
+# Existing rows start with an empty hash and are filled in by their next sync.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0013_azuregroup_live_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='azuregroup',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Digest of the directory-synced fields, used to skip no-op sync writes', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='azuregroup',
+            name='membership_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Digest of the last synced member set; cleared when memberships change outside a sync', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='fortigatepolicy',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Digest of the fields fetched from FortiGate, used to skip no-op imports', max_length=32),
+        ),
+    ]
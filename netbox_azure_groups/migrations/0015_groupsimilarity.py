@@ -0,0 +1,39 @@
+# Near-duplicate group pairs found by the MinHash similarity job
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0014_content_hashes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jaccard', models.FloatField(help_text='Exact Jaccard similarity of the two member sets')),
+                ('shared_members', models.PositiveIntegerField(help_text='Members in both groups')),
+                ('total_members', models.PositiveIntegerField(help_text='Members in either group')),
+                ('computed', models.DateTimeField(default=django.utils.timezone.now, help_text='When the similarity job found this pair')),
+                ('group_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='netbox_azure_groups.azuregroup')),
+                ('group_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='netbox_azure_groups.azuregroup')),
+            ],
+            options={
+                'verbose_name': 'Group Similarity',
+                'verbose_name_plural': 'Group Similarities',
+                'ordering': ['-jaccard', 'group_a', 'group_b'],
+                'constraints': [
+                    models.UniqueConstraint(fields=('group_a', 'group_b'), name='nbag_similarity_unique_pair'),
+                ],
+                'indexes': [
+                    models.Index(fields=['-jaccard'], name='nbag_similarity_jaccard'),
+                    models.Index(fields=['group_b'], name='nbag_similarity_group_b'),
+                ],
+            },
+        ),
+    ]
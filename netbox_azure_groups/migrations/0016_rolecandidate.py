@@ -0,0 +1,37 @@
+# Candidate roles proposed by the role-mining job
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenancy', '0020_remove_contactgroupmembership'),
+        ('netbox_azure_groups', '0015_groupsimilarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoleCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('member_count', models.PositiveIntegerField()),
+                ('permission_count', models.PositiveIntegerField()),
+                ('cohesion', models.FloatField(help_text="Mean Jaccard similarity between each member's access and the role")),
+                ('permissions', models.JSONField(default=list, help_text='Access the role covers, as [resource ID, access level] pairs')),
+                ('closest_group_jaccard', models.FloatField(blank=True, null=True)),
+                ('matching_groups', models.JSONField(default=list, help_text='Best matching existing groups, as {"group", "jaccard"} objects')),
+                ('computed', models.DateTimeField(default=django.utils.timezone.now, help_text='When the role-mining job proposed this role')),
+                ('closest_group', models.ForeignKey(blank=True, help_text='Existing group whose members best match the role', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='netbox_azure_groups.azuregroup')),
+                ('contacts', models.ManyToManyField(blank=True, related_name='azure_role_candidates', to='tenancy.contact')),
+            ],
+            options={
+                'verbose_name': 'Role Candidate',
+                'verbose_name_plural': 'Role Candidates',
+                'ordering': ['-member_count', 'pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Daily access snapshots stored as baselines plus compressed deltas
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0016_rolecandidate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('is_baseline', models.BooleanField(default=False, help_text='Stores full grant sets rather than changes since the previous snapshot')),
+                ('grant_count', models.PositiveIntegerField(default=0, help_text='Active grants on this date')),
+                ('resource_count', models.PositiveIntegerField(default=0, help_text='Resources with at least one active grant on this date')),
+                ('added_count', models.PositiveIntegerField(default=0)),
+                ('removed_count', models.PositiveIntegerField(default=0)),
+                ('size_bytes', models.PositiveBigIntegerField(default=0, help_text='Compressed size of the stored segments')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Access Snapshot',
+                'verbose_name_plural': 'Access Snapshots',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AccessSnapshotSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource_id', models.PositiveBigIntegerField()),
+                ('added', models.BinaryField(help_text='Grant keys added (the full set in a baseline)')),
+                ('removed', models.BinaryField(blank=True, default=bytes, help_text='Grant keys removed since the previous snapshot')),
+                ('grant_count', models.PositiveIntegerField(help_text="The resource's active grants on the snapshot date")),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='netbox_azure_groups.accesssnapshot')),
+            ],
+            options={
+                'ordering': ['snapshot', 'resource_id'],
+                'constraints': [
+                    models.UniqueConstraint(fields=('snapshot', 'resource_id'), name='nbag_snapshot_segment_unique'),
+                ],
+                'indexes': [
+                    models.Index(fields=['resource_id', 'snapshot'], name='nbag_snapshot_segment_resource'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Baselines keep their full grant sets in a separate field so that every
+# snapshot, baselines included, also records its changes since the previous one.
+# Existing baselines are rewritten: full set moved, delta recomputed.
+
+import sys
+import zlib
+from array import array
+
+from django.db import migrations, models
+
+
+# Frozen copies of snapshots.encode_keys() / decode_keys(): gap-encoded uint64, zlib-compressed
+
+def encode_keys(keys):
+    if not keys:
+        return b''
+    gaps = array('Q', [keys[0]])
+    gaps.extend(b - a for a, b in zip(keys, keys[1:]))
+    if sys.byteorder == 'big':
+        gaps.byteswap()
+    return zlib.compress(gaps.tobytes())
+
+
+def decode_keys(data):
+    if not data:
+        return []
+    gaps = array('Q')
+    gaps.frombytes(zlib.decompress(bytes(data)))
+    if sys.byteorder == 'big':
+        gaps.byteswap()
+    keys = []
+    total = 0
+    for gap in gaps:
+        total += gap
+        keys.append(total)
+    return keys
+
+
+def split_baselines(apps, schema_editor):
+    AccessSnapshot = apps.get_model('netbox_azure_groups', 'AccessSnapshot')
+    AccessSnapshotSegment = apps.get_model('netbox_azure_groups', 'AccessSnapshotSegment')
+
+    state = {}
+    for snapshot in AccessSnapshot.objects.order_by('date'):
+        segments = {segment.resource_id: segment for segment in AccessSnapshotSegment.objects.filter(snapshot=snapshot)}
+        if not snapshot.is_baseline:
+            for resource_id, segment in segments.items():
+                keys = state.setdefault(resource_id, set())
+                keys.difference_update(decode_keys(segment.removed))
+                keys.update(decode_keys(segment.added))
+            continue
+
+        current = {resource_id: set(decode_keys(segment.added)) for resource_id, segment in segments.items()}
+        added_count = removed_count = 0
+        for resource_id in current.keys() | state.keys():
+            now, before = current.get(resource_id, set()), state.get(resource_id, set())
+            added, removed = sorted(now - before), sorted(before - now)
+            added_count += len(added)
+            removed_count += len(removed)
+            segment = segments.get(resource_id) or AccessSnapshotSegment(
+                snapshot=snapshot, resource_id=resource_id, grant_count=0
+            )
+            segment.full = segment.added
+            segment.added = encode_keys(added)
+            segment.removed = encode_keys(removed)
+            segment.save()
+        snapshot.added_count, snapshot.removed_count = added_count, removed_count
+        snapshot.save()
+        state = current
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0017_accesssnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accesssnapshotsegment',
+            name='full',
+            field=models.BinaryField(blank=True, default=bytes, help_text='All grant keys (baselines only)'),
+        ),
+        migrations.AlterField(
+            model_name='accesssnapshotsegment',
+            name='added',
+            field=models.BinaryField(blank=True, default=bytes, help_text='Grant keys added since the previous snapshot'),
+        ),
+        migrations.AlterField(
+            model_name='accesssnapshot',
+            name='is_baseline',
+            field=models.BooleanField(default=False, help_text='Also stores full grant sets'),
+        ),
+        migrations.RunPython(split_baselines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Append-only grant history, range-partitioned by month on "occurred".
+# Django cannot declare partitioned tables, so the table is created in SQL and
+# the model is unmanaged. Monthly partitions are created by grant_events.py.
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+CREATE_TABLE = """
+CREATE TABLE netbox_azure_groups_grantevent (
+    id bigserial NOT NULL,
+    occurred timestamp with time zone NOT NULL,
+    event varchar(20) NOT NULL,
+    grant_id bigint NULL,
+    resource_id bigint NOT NULL,
+    contact_id bigint NOT NULL,
+    azure_group_id bigint NOT NULL,
+    control_method_id bigint NOT NULL,
+    access_level varchar(20) NOT NULL,
+    previous_access_level varchar(20) NOT NULL DEFAULT '',
+    granted_via varchar(30) NOT NULL,
+    is_active boolean NOT NULL,
+    user_name varchar(150) NOT NULL DEFAULT '',
+    request_id uuid NULL,
+    PRIMARY KEY (id, occurred)
+) PARTITION BY RANGE (occurred);
+CREATE INDEX nbag_grantevent_occurred ON netbox_azure_groups_grantevent (occurred);
+CREATE INDEX nbag_grantevent_grant ON netbox_azure_groups_grantevent (grant_id, occurred);
+CREATE INDEX nbag_grantevent_resource ON netbox_azure_groups_grantevent (resource_id, occurred);
+CREATE INDEX nbag_grantevent_contact ON netbox_azure_groups_grantevent (contact_id, occurred);
+"""
+
+DROP_TABLE = 'DROP TABLE netbox_azure_groups_grantevent;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0018_accesssnapshotsegment_full'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(CREATE_TABLE, DROP_TABLE),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='GrantEvent',
+                    fields=[
+                        ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                        ('occurred', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('event', models.CharField(choices=[('granted', 'Granted'), ('revoked', 'Revoked'), ('reactivated', 'Reactivated'), ('level_changed', 'Level Changed'), ('deleted', 'Deleted')], max_length=20)),
+                        ('grant_id', models.BigIntegerField(blank=True, null=True)),
+                        ('resource_id', models.BigIntegerField()),
+                        ('contact_id', models.BigIntegerField()),
+                        ('azure_group_id', models.BigIntegerField()),
+                        ('control_method_id', models.BigIntegerField()),
+                        ('access_level', models.CharField(max_length=20)),
+                        ('previous_access_level', models.CharField(blank=True, max_length=20)),
+                        ('granted_via', models.CharField(max_length=30)),
+                        ('is_active', models.BooleanField(help_text='Whether the grant was active after the change')),
+                        ('user_name', models.CharField(blank=True, help_text='User whose request made the change, if any', max_length=150)),
+                        ('request_id', models.UUIDField(blank=True, null=True)),
+                    ],
+                    options={
+                        'verbose_name': 'Grant Event',
+                        'verbose_name_plural': 'Grant Events',
+                        'ordering': ['-occurred', '-id'],
+                        'db_table': 'netbox_azure_groups_grantevent',
+                        'managed': False,
+                    },
+                ),
+            ],
+        ),
+    ]
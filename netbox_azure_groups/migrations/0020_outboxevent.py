@@ -0,0 +1,39 @@
+# Transactional outbox for coalesced downstream change delivery
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0019_grantevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(help_text='Kind of entity that changed (e.g., "group_membership", "access_grant")', max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(help_text='created, updated or deleted', max_length=20)),
+                ('data', models.JSONField(default=dict, help_text='State of the entity after the change')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('delivered', 'Delivered'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('delivered', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Outbox Event',
+                'verbose_name_plural': 'Outbox Events',
+                'ordering': ['pk'],
+                'indexes': [
+                    models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt', 'id'], name='nbag_outbox_pending'),
+                    models.Index(fields=['status', 'created'], name='nbag_outbox_status'),
+                ],
+            },
+        ),
+    ]
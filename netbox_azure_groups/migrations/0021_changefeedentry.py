@@ -0,0 +1,36 @@
+# Incremental change feed ordered by writing transaction
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0020_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('txid', models.BigIntegerField(db_default=models.Func(function='txid_current', output_field=models.BigIntegerField()), editable=False)),
+                ('model', models.CharField(help_text='Model label, e.g. "netbox_azure_groups.groupmembership"', max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=20)),
+                ('occurred', models.DateTimeField(default=django.utils.timezone.now)),
+                ('data', models.JSONField(default=dict, help_text='IDs of the related objects, so deletes remain meaningful')),
+            ],
+            options={
+                'verbose_name': 'Change Feed Entry',
+                'verbose_name_plural': 'Change Feed Entries',
+                'ordering': ['txid', 'id'],
+                'indexes': [
+                    models.Index(fields=['txid', 'id'], name='nbag_feed_position'),
+                    models.Index(fields=['model', 'txid', 'id'], name='nbag_feed_model_position'),
+                    models.Index(fields=['occurred'], name='nbag_feed_occurred'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Delta links saved by the Microsoft Graph sync, per tenant
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0021_changefeedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GraphDeltaToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(help_text='Azure AD tenant ID', max_length=36)),
+                ('scope', models.CharField(help_text='"groups", or the object ID of the group whose members this tracks', max_length=36)),
+                ('delta_link', models.TextField(help_text='Link returning the changes since the last sync')),
+                ('members', models.JSONField(blank=True, default=dict, help_text='Directory object ID -> ["contact" or "device", primary key] of the resolved members')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Graph Delta Token',
+                'verbose_name_plural': 'Graph Delta Tokens',
+                'ordering': ['tenant_id', 'scope'],
+                'constraints': [
+                    models.UniqueConstraint(fields=('tenant_id', 'scope'), name='nbag_delta_token_scope'),
+                ],
+            },
+        ),
+    ]
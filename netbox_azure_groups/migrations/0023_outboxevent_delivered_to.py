@@ -0,0 +1,18 @@
+# Per-endpoint delivery tracking for outbox events
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_azure_groups', '0022_graphdeltatoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxevent',
+            name='delivered_to',
+            field=models.JSONField(blank=True, default=list, help_text='URLs of the endpoints that have accepted this event'),
+        ),
+    ]
@@ -20,6 +20,34 @@ from .azure_groups import (
     PolicyActionChoices,
     PolicyStatusChoices,
 )
+from .sync import (
+    SyncRun,
+    SyncSourceChoices,
+    SyncStatusChoices,
+)
+from .analytics import (
+    GroupSimilarity,
+    RoleCandidate,
+)
+from .snapshots import (
+    AccessSnapshot,
+    AccessSnapshotSegment,
+)
+from .history import (
+    GrantEvent,
+    GrantEventChoices,
+)
+from .outbox import (
+    OutboxEvent,
+    OutboxStatusChoices,
+)
+from .feed import (
+    ChangeActionChoices,
+    ChangeFeedEntry,
+)
+from .graph import (
+    GraphDeltaToken,
+)
 
 # Backward compatibility aliases for old model names
 # TODO: Remove these aliases after updating all references
@@ -47,6 +75,26 @@ __all__ = [
     'FortiGatePolicy',
     'PolicyActionChoices',
     'PolicyStatusChoices',
+    # Sync Ledger
+    'SyncRun',
+    'SyncSourceChoices',
+    'SyncStatusChoices',
+    # Analytics
+    'GroupSimilarity',
+    'RoleCandidate',
+    # Access History
+    'AccessSnapshot',
+    'AccessSnapshotSegment',
+    'GrantEvent',
+    'GrantEventChoices',
+    # Outbox
+    'OutboxEvent',
+    'OutboxStatusChoices',
+    # Change Feed
+    'ChangeFeedEntry',
+    'ChangeActionChoices',
+    # Graph Sync
+    'GraphDeltaToken',
     # Legacy aliases
     'ContactGroupMembership',
     'ContactGroupOwnership', 
@@ -0,0 +1,105 @@
+from django.db import models
+from django.utils import timezone
+from utilities.querysets import RestrictedQuerySet
+
+
+class GroupSimilarity(models.Model):
+    """A pair of Azure groups whose member sets overlap above the similarity threshold."""
+
+    # group_a always has the lower primary key so each pair is stored once
+    group_a = models.ForeignKey(
+        'netbox_azure_groups.AzureGroup',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    group_b = models.ForeignKey(
+        'netbox_azure_groups.AzureGroup',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    jaccard = models.FloatField(
+        help_text='Exact Jaccard similarity of the two member sets'
+    )
+    shared_members = models.PositiveIntegerField(
+        help_text='Members in both groups'
+    )
+    total_members = models.PositiveIntegerField(
+        help_text='Members in either group'
+    )
+    computed = models.DateTimeField(
+        default=timezone.now,
+        help_text='When the similarity job found this pair'
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-jaccard', 'group_a', 'group_b']
+        verbose_name = 'Group Similarity'
+        verbose_name_plural = 'Group Similarities'
+        constraints = [
+            models.UniqueConstraint(fields=['group_a', 'group_b'], name='nbag_similarity_unique_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['-jaccard'], name='nbag_similarity_jaccard'),
+            models.Index(fields=['group_b'], name='nbag_similarity_group_b'),
+        ]
+
+    def __str__(self):
+        return f'{self.group_a} ~ {self.group_b} ({self.percent}%)'
+
+    @property
+    def percent(self):
+        return round(self.jaccard * 100, 1)
+
+
+class RoleCandidate(models.Model):
+    """A cluster of contacts with near-identical access, proposed as a role for review."""
+
+    name = models.CharField(
+        max_length=200
+    )
+    member_count = models.PositiveIntegerField()
+    permission_count = models.PositiveIntegerField()
+    cohesion = models.FloatField(
+        help_text="Mean Jaccard similarity between each member's access and the role"
+    )
+    permissions = models.JSONField(
+        default=list,
+        help_text='Access the role covers, as [resource ID, access level] pairs'
+    )
+    contacts = models.ManyToManyField(
+        'tenancy.Contact',
+        blank=True,
+        related_name='azure_role_candidates'
+    )
+    closest_group = models.ForeignKey(
+        'netbox_azure_groups.AzureGroup',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Existing group whose members best match the role'
+    )
+    closest_group_jaccard = models.FloatField(
+        null=True,
+        blank=True
+    )
+    matching_groups = models.JSONField(
+        default=list,
+        help_text='Best matching existing groups, as {"group", "jaccard"} objects'
+    )
+    computed = models.DateTimeField(
+        default=timezone.now,
+        help_text='When the role-mining job proposed this role'
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-member_count', 'pk']
+        verbose_name = 'Role Candidate'
+        verbose_name_plural = 'Role Candidates'
+
+    def __str__(self):
+        return self.name
@@ -4,7 +4,10 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import timedelta
 from netbox.models import NetBoxModel
+from netbox.plugins import get_plugin_config
 from utilities.choices import ChoiceSet
+from utilities.querysets import RestrictedQuerySet
+from ..utils import fields_digest
 import uuid
 
 
@@ -48,6 +51,13 @@ class MembershipTypeChoices(ChoiceSet):
     ]
 
 
+class LiveAzureGroupManager(models.Manager.from_queryset(RestrictedQuerySet)):
+    """Manager excluding soft-deleted groups."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class AzureGroup(NetBoxModel):
     """
     Azure AD group representation in NetBox.
@@ -59,8 +69,7 @@ class AzureGroup(NetBoxModel):
         help_text="Azure AD object GUID"
     )
     name = models.CharField(
-        max_length=256, 
-        db_index=True,
+        max_length=256,
         help_text='Group display name'
     )
     description = models.TextField(
@@ -142,16 +151,117 @@ class AzureGroup(NetBoxModel):
         default=False,
         help_text="Soft delete flag for audit retention"
     )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='When the group was soft-deleted; drives retention purging'
+    )
+    content_hash = models.CharField(
+        max_length=32,
+        blank=True,
+        editable=False,
+        help_text='Digest of the directory-synced fields, used to skip no-op sync writes'
+    )
+    membership_hash = models.CharField(
+        max_length=32,
+        blank=True,
+        editable=False,
+        help_text='Digest of the last synced member set; cleared when memberships change outside a sync'
+    )
+
+    # Live groups only; use all_objects to include soft-deleted groups
+    objects = LiveAzureGroupManager()
+    all_objects = RestrictedQuerySet.as_manager()
 
     class Meta:
         ordering = ['name']
         verbose_name = 'Azure Group'
         verbose_name_plural = 'Azure Groups'
+        # Django internals (uniqueness checks, deletion, changelog lookups) must see every row
+        default_manager_name = 'all_objects'
         indexes = [
-            models.Index(fields=['source', 'group_type']),
-            models.Index(fields=['last_sync']),
+            # Partial indexes: plugin queries only ever scan live groups
+            models.Index(fields=['name'], condition=models.Q(is_deleted=False), name='nbag_group_live_name'),
+            models.Index(
+                fields=['source', 'group_type'],
+                condition=models.Q(is_deleted=False),
+                name='nbag_group_live_source_type'
+            ),
+            models.Index(fields=['last_sync'], condition=models.Q(is_deleted=False), name='nbag_group_live_last_sync'),
+            # Retention purge scans only soft-deleted rows
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(is_deleted=True),
+                name='nbag_group_deleted_at'
+            ),
         ]
 
+    # Fields written by directory syncs; content_hash covers exactly these
+    SYNC_FIELDS = (
+        'object_id', 'name', 'description', 'group_type', 'source', 'is_security_enabled',
+        'is_mail_enabled', 'mail', 'membership_type', 'membership_rule', 'azure_created', 'azure_modified',
+    )
+
+    # Fields that may be edited on groups mastered in on-premises AD
+    ON_PREMISES_EDITABLE_FIELDS = {'tags', 'custom_field_data', 'comments'}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot of the loaded values, so change checks don't need to refetch the row
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def _snapshot(self):
+        self._loaded_values = {f.attname: getattr(self, f.attname) for f in self._meta.concrete_fields}
+
+    def get_original_values(self):
+        """Field values as last loaded from or saved to the database (keyed by attname)."""
+        loaded = getattr(self, '_loaded_values', {})
+        missing = [f.attname for f in self._meta.concrete_fields if f.attname not in loaded]
+        if missing and self.pk:
+            # Deferred fields were not part of the snapshot
+            loaded.update(AzureGroup.all_objects.filter(pk=self.pk).values(*missing).get())
+        return loaded
+
+    def read_only_violation(self, original):
+        """Name of the first locked field changed on an on-premises group, or None."""
+        if GroupSourceChoices.ON_PREMISES not in (self.source, original.get('source')):
+            return None
+        for field in self._meta.concrete_fields:
+            if field.name not in self.ON_PREMISES_EDITABLE_FIELDS and field.attname in original:
+                if getattr(self, field.attname) != original[field.attname]:
+                    return field.name
+        return None
+
+    @classmethod
+    def check_source_restrictions(cls, instances):
+        """
+        Set-based read-only check for a batch of pending group updates.
+
+        Instances loaded from the database are compared against their snapshot;
+        originals for any others are fetched with a single query. Returns a
+        dict mapping each rejected instance's pk to an error message.
+        """
+        instances = [i for i in instances if i.pk]
+        unloaded = {i.pk for i in instances if not hasattr(i, '_loaded_values')}
+        originals = {}
+        if unloaded:
+            attnames = [f.attname for f in cls._meta.concrete_fields]
+            originals = {row['id']: row for row in cls.all_objects.filter(pk__in=unloaded).values(*attnames)}
+
+        errors = {}
+        for instance in instances:
+            if instance.pk in unloaded:
+                original = originals.get(instance.pk, {})
+            else:
+                original = instance.get_original_values()
+            field_name = instance.read_only_violation(original)
+            if field_name:
+                errors[instance.pk] = f"Cannot modify {field_name}: On-premises groups are read-only"
+        return errors
+
     def clean(self):
         # Validate UUID format for object_id
         if self.object_id:
@@ -161,20 +271,31 @@ class AzureGroup(NetBoxModel):
                 raise ValidationError({'object_id': 'Invalid UUID format'})
         
         # Enforce read-only for on-premises groups
-        if self.pk and self.source == GroupSourceChoices.ON_PREMISES:
-            original = AzureGroup.objects.get(pk=self.pk)
-            allowed_fields = {'tags', 'custom_field_data', 'comments'}
-            for field in self._meta.fields:
-                if field.name not in allowed_fields:
-                    if getattr(self, field.name) != getattr(original, field.name):
-                        raise ValidationError(
-                            f"Cannot modify {field.name}: On-premises groups are read-only"
-                        )
-    
+        if self.pk and get_plugin_config('netbox_azure_groups', 'enforce_source_restrictions'):
+            field_name = self.read_only_violation(self.get_original_values())
+            if field_name:
+                raise ValidationError(
+                    f"Cannot modify {field_name}: On-premises groups are read-only"
+                )
+    
+    def compute_content_hash(self):
+        return fields_digest({name: getattr(self, name) for name in self.SYNC_FIELDS}, self.SYNC_FIELDS)
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.compute_content_hash()
+        # Keep the soft-delete timestamp in step with the flag
+        if self.is_deleted and self.deleted_at is None:
+            self.deleted_at = timezone.now()
+        elif not self.is_deleted:
+            self.deleted_at = None
+        super().save(*args, **kwargs)
+        self._snapshot()
+
     @property
     def is_stale(self):
-        """Check if data is older than 24 hours."""
-        return self.last_sync < timezone.now() - timedelta(hours=24)
+        """Check if data is older than the configured stale threshold."""
+        hours = get_plugin_config('netbox_azure_groups', 'stale_threshold_hours')
+        return self.last_sync < timezone.now() - timedelta(hours=hours)
     
     @property
     def can_modify(self):
@@ -595,6 +716,26 @@ class AccessGrant(NetBoxModel):
     
     def __str__(self):
         return f'{self.contact.name} → {self.resource.name} (via {self.azure_group.name})'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot of the loaded values, so grant history can tell what a save changed without refetching
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_original_values(self):
+        """``is_active`` and ``access_level`` as last loaded from or saved to the database; empty if new."""
+        if self._state.adding or not self.pk:
+            return {}
+        loaded = getattr(self, '_loaded_values', {})
+        if 'is_active' not in loaded or 'access_level' not in loaded:
+            loaded = AccessGrant.objects.filter(pk=self.pk).values('is_active', 'access_level').first() or {}
+        return loaded
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {f.attname: getattr(self, f.attname) for f in self._meta.concrete_fields}
     
     def get_absolute_url(self):
         return reverse('plugins:netbox_azure_groups:accessgrant', args=[self.pk])
@@ -770,6 +911,13 @@ class FortiGatePolicy(NetBoxModel):
         help_text='When this policy was last fetched from FortiGate'
     )
     
+    content_hash = models.CharField(
+        max_length=32,
+        blank=True,
+        editable=False,
+        help_text='Digest of the fields fetched from FortiGate, used to skip no-op imports'
+    )
+
     # Link to Access Control (optional)
     access_control_method = models.ForeignKey(
         AccessControlMethod,
@@ -780,6 +928,14 @@ class FortiGatePolicy(NetBoxModel):
         help_text='Associated access control method if this policy provides resource access'
     )
     
+    # Fields fetched from the FortiGate; content_hash covers exactly these
+    SYNC_FIELDS = (
+        'policy_id', 'name', 'uuid', 'status', 'action', 'source_interfaces', 'destination_interfaces',
+        'source_addresses', 'destination_addresses', 'services', 'nat_enabled', 'nat_type',
+        'nat_outbound_interface', 'nat_pool_name', 'utm_status', 'profile_group', 'log_traffic',
+        'schedule', 'groups', 'comments', 'fortigate_host', 'vdom',
+    )
+
     class Meta:
         ordering = ['policy_id']
         verbose_name = 'FortiGate Policy'
@@ -792,6 +948,13 @@ class FortiGatePolicy(NetBoxModel):
             models.Index(fields=['last_fetched']),
         ]
     
+    def save(self, *args, **kwargs):
+        self.content_hash = self.compute_content_hash()
+        super().save(*args, **kwargs)
+
+    def compute_content_hash(self):
+        return fields_digest({name: getattr(self, name) for name in self.SYNC_FIELDS}, self.SYNC_FIELDS)
+
     def __str__(self):
         name_part = f": {self.name}" if self.name else ""
         return f"Policy {self.policy_id}{name_part} ({self.get_action_display()})"
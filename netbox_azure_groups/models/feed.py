@@ -0,0 +1,66 @@
+from django.db import models
+from django.db.models import Func
+from django.utils import timezone
+from utilities.choices import ChoiceSet
+from utilities.querysets import RestrictedQuerySet
+
+
+class ChangeActionChoices(ChoiceSet):
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+
+    CHOICES = [
+        (CREATED, 'Created', 'green'),
+        (UPDATED, 'Updated', 'blue'),
+        (DELETED, 'Deleted', 'red'),
+    ]
+
+
+class ChangeFeedEntry(models.Model):
+    """
+    One create, update or delete of a plugin object, for the incremental change feed (see change_feed.py).
+
+    ``txid`` is the writing transaction's ID, filled in by PostgreSQL. Readers
+    page through ``(txid, id)`` and only up to the oldest transaction still in
+    progress, so an entry can never appear behind a cursor already handed out.
+    """
+
+    id = models.BigAutoField(
+        primary_key=True
+    )
+    txid = models.BigIntegerField(
+        db_default=Func(function='txid_current', output_field=models.BigIntegerField()),
+        editable=False
+    )
+    model = models.CharField(
+        max_length=100,
+        help_text='Model label, e.g. "netbox_azure_groups.groupmembership"'
+    )
+    object_id = models.BigIntegerField()
+    action = models.CharField(
+        max_length=20,
+        choices=ChangeActionChoices
+    )
+    occurred = models.DateTimeField(
+        default=timezone.now
+    )
+    data = models.JSONField(
+        default=dict,
+        help_text='IDs of the related objects, so deletes remain meaningful'
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['txid', 'id']
+        verbose_name = 'Change Feed Entry'
+        verbose_name_plural = 'Change Feed Entries'
+        indexes = [
+            models.Index(fields=['txid', 'id'], name='nbag_feed_position'),
+            models.Index(fields=['model', 'txid', 'id'], name='nbag_feed_model_position'),
+            models.Index(fields=['occurred'], name='nbag_feed_occurred'),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id} {self.action}'
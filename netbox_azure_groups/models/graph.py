@@ -0,0 +1,47 @@
+from django.db import models
+from utilities.querysets import RestrictedQuerySet
+
+
+class GraphDeltaToken(models.Model):
+    """
+    Microsoft Graph delta link saved by the Graph sync (see graph_sync.py), per tenant.
+
+    ``scope`` is ``groups`` for the tenant's group delta, or a group's object
+    ID for its member delta. Member rows also keep the resolved member set the
+    delta applies to, and mark the group as belonging to the tenant.
+    """
+
+    GROUPS = 'groups'
+
+    tenant_id = models.CharField(
+        max_length=36,
+        help_text='Azure AD tenant ID'
+    )
+    scope = models.CharField(
+        max_length=36,
+        help_text='"groups", or the object ID of the group whose members this tracks'
+    )
+    delta_link = models.TextField(
+        help_text='Link returning the changes since the last sync'
+    )
+    members = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Directory object ID -> ["contact" or "device", primary key] of the resolved members'
+    )
+    updated = models.DateTimeField(
+        auto_now=True
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['tenant_id', 'scope']
+        verbose_name = 'Graph Delta Token'
+        verbose_name_plural = 'Graph Delta Tokens'
+        constraints = [
+            models.UniqueConstraint(fields=['tenant_id', 'scope'], name='nbag_delta_token_scope'),
+        ]
+
+    def __str__(self):
+        return f'{self.tenant_id} {self.scope}'
@@ -0,0 +1,84 @@
+from django.db import models
+from django.utils import timezone
+from utilities.choices import ChoiceSet
+from utilities.querysets import RestrictedQuerySet
+
+
+class GrantEventChoices(ChoiceSet):
+    GRANTED = 'granted'
+    REVOKED = 'revoked'
+    REACTIVATED = 'reactivated'
+    LEVEL_CHANGED = 'level_changed'
+    DELETED = 'deleted'
+
+    CHOICES = [
+        (GRANTED, 'Granted', 'green'),
+        (REVOKED, 'Revoked', 'red'),
+        (REACTIVATED, 'Reactivated', 'green'),
+        (LEVEL_CHANGED, 'Level Changed', 'orange'),
+        (DELETED, 'Deleted', 'gray'),
+    ]
+
+
+class GrantEvent(models.Model):
+    """
+    Append-only record of one AccessGrant state change.
+
+    The table is created by migration 0019 as a PostgreSQL table range-partitioned
+    by month on ``occurred`` (see grant_events.py), so Django does not manage it.
+    Grant, resource, contact, group and method are plain IDs: history must
+    outlive the rows it describes.
+    """
+
+    id = models.BigAutoField(
+        primary_key=True
+    )
+    occurred = models.DateTimeField(
+        default=timezone.now
+    )
+    event = models.CharField(
+        max_length=20,
+        choices=GrantEventChoices
+    )
+    grant_id = models.BigIntegerField(
+        null=True,
+        blank=True
+    )
+    resource_id = models.BigIntegerField()
+    contact_id = models.BigIntegerField()
+    azure_group_id = models.BigIntegerField()
+    control_method_id = models.BigIntegerField()
+    access_level = models.CharField(
+        max_length=20
+    )
+    previous_access_level = models.CharField(
+        max_length=20,
+        blank=True
+    )
+    granted_via = models.CharField(
+        max_length=30
+    )
+    is_active = models.BooleanField(
+        help_text='Whether the grant was active after the change'
+    )
+    user_name = models.CharField(
+        max_length=150,
+        blank=True,
+        help_text='User whose request made the change, if any'
+    )
+    request_id = models.UUIDField(
+        null=True,
+        blank=True
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        managed = False
+        db_table = 'netbox_azure_groups_grantevent'
+        ordering = ['-occurred', '-id']
+        verbose_name = 'Grant Event'
+        verbose_name_plural = 'Grant Events'
+
+    def __str__(self):
+        return f'{self.get_event_display()}: grant {self.grant_id} at {self.occurred:%Y-%m-%d %H:%M}'
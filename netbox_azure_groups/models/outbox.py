@@ -0,0 +1,81 @@
+from django.db import models
+from django.utils import timezone
+from utilities.choices import ChoiceSet
+from utilities.querysets import RestrictedQuerySet
+
+
+class OutboxStatusChoices(ChoiceSet):
+    PENDING = 'pending'
+    DELIVERED = 'delivered'
+    FAILED = 'failed'
+
+    CHOICES = [
+        (PENDING, 'Pending', 'blue'),
+        (DELIVERED, 'Delivered', 'green'),
+        (FAILED, 'Failed', 'red'),
+    ]
+
+
+class OutboxEvent(models.Model):
+    """
+    A change to deliver to downstream consumers, written in the same transaction as the change.
+
+    The dispatcher (outbox.py) coalesces pending events per ``(topic, object_id)``
+    and delivers them in batches.
+    """
+
+    topic = models.CharField(
+        max_length=50,
+        help_text='Kind of entity that changed (e.g., "group_membership", "access_grant")'
+    )
+    object_id = models.BigIntegerField()
+    action = models.CharField(
+        max_length=20,
+        help_text='created, updated or deleted'
+    )
+    data = models.JSONField(
+        default=dict,
+        help_text='State of the entity after the change'
+    )
+    created = models.DateTimeField(
+        default=timezone.now
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=OutboxStatusChoices,
+        default=OutboxStatusChoices.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now
+    )
+    delivered = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(
+        blank=True
+    )
+    delivered_to = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='URLs of the endpoints that have accepted this event'
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['pk']
+        verbose_name = 'Outbox Event'
+        verbose_name_plural = 'Outbox Events'
+        indexes = [
+            models.Index(
+                fields=['next_attempt', 'id'], name='nbag_outbox_pending', condition=models.Q(status='pending')
+            ),
+            models.Index(fields=['status', 'created'], name='nbag_outbox_status'),
+        ]
+
+    def __str__(self):
+        return f'{self.topic} {self.object_id} {self.action}'
@@ -0,0 +1,94 @@
+from django.db import models
+from django.utils import timezone
+from utilities.querysets import RestrictedQuerySet
+
+
+class AccessSnapshot(models.Model):
+    """
+    The effective access grant set on one day.
+
+    Every snapshot stores the grants added and removed since the previous one;
+    a baseline additionally stores every resource's full grant set. Grants are
+    kept per resource in AccessSnapshotSegment rows.
+    """
+
+    date = models.DateField(
+        unique=True
+    )
+    is_baseline = models.BooleanField(
+        default=False,
+        help_text='Also stores full grant sets'
+    )
+    grant_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Active grants on this date'
+    )
+    resource_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Resources with at least one active grant on this date'
+    )
+    added_count = models.PositiveIntegerField(
+        default=0
+    )
+    removed_count = models.PositiveIntegerField(
+        default=0
+    )
+    size_bytes = models.PositiveBigIntegerField(
+        default=0,
+        help_text='Compressed size of the stored segments'
+    )
+    created = models.DateTimeField(
+        default=timezone.now
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = 'Access Snapshot'
+        verbose_name_plural = 'Access Snapshots'
+
+    def __str__(self):
+        return f"{self.date} ({'baseline' if self.is_baseline else 'delta'})"
+
+
+class AccessSnapshotSegment(models.Model):
+    """One resource's grants in a snapshot, as compressed sorted grant keys (see snapshots.py)."""
+
+    snapshot = models.ForeignKey(
+        AccessSnapshot,
+        on_delete=models.CASCADE,
+        related_name='segments'
+    )
+    # Not a foreign key: history must outlive deleted resources
+    resource_id = models.PositiveBigIntegerField()
+    added = models.BinaryField(
+        blank=True,
+        default=bytes,
+        help_text='Grant keys added since the previous snapshot'
+    )
+    removed = models.BinaryField(
+        blank=True,
+        default=bytes,
+        help_text='Grant keys removed since the previous snapshot'
+    )
+    full = models.BinaryField(
+        blank=True,
+        default=bytes,
+        help_text='All grant keys (baselines only)'
+    )
+    grant_count = models.PositiveIntegerField(
+        help_text="The resource's active grants on the snapshot date"
+    )
+
+    class Meta:
+        ordering = ['snapshot', 'resource_id']
+        constraints = [
+            models.UniqueConstraint(fields=['snapshot', 'resource_id'], name='nbag_snapshot_segment_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['resource_id', 'snapshot'], name='nbag_snapshot_segment_resource'),
+        ]
+
+    def __str__(self):
+        return f'{self.snapshot} / resource {self.resource_id}'
@@ -0,0 +1,118 @@
+from django.db import models
+from django.utils import timezone
+from utilities.choices import ChoiceSet
+from utilities.querysets import RestrictedQuerySet
+
+
+class SyncSourceChoices(ChoiceSet):
+    GRAPH = 'graph'
+    ON_PREMISES = 'on_premises'
+    FORTIGATE = 'fortigate'
+
+    CHOICES = [
+        (GRAPH, 'Microsoft Graph'),
+        (ON_PREMISES, 'On-Premises AD'),
+        (FORTIGATE, 'FortiGate'),
+    ]
+
+
+class SyncStatusChoices(ChoiceSet):
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    CHOICES = [
+        (RUNNING, 'Running', 'blue'),
+        (COMPLETED, 'Completed', 'green'),
+        (FAILED, 'Failed', 'red'),
+    ]
+
+
+class SyncRun(models.Model):
+    """Ledger entry for one bulk sync or import run."""
+
+    source = models.CharField(
+        max_length=20,
+        choices=SyncSourceChoices,
+        help_text='System the data was synchronized from'
+    )
+    source_host = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text='Tenant, domain or FortiGate host the run read from'
+    )
+    operation = models.CharField(
+        max_length=50,
+        help_text='Sync path that wrote this run (e.g., "groups", "memberships")'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=SyncStatusChoices,
+        default=SyncStatusChoices.RUNNING
+    )
+    started = models.DateTimeField(
+        default=timezone.now,
+        help_text='When the run started'
+    )
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When the run finished'
+    )
+    duration = models.FloatField(
+        null=True,
+        blank=True,
+        help_text='Run duration in seconds'
+    )
+
+    # Row counters
+    rows_created = models.PositiveIntegerField(default=0)
+    rows_updated = models.PositiveIntegerField(default=0)
+    rows_unchanged = models.PositiveIntegerField(default=0)
+    rows_deleted = models.PositiveIntegerField(default=0)
+
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='First errors reported during the run'
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    # Cap on stored error messages; error_count keeps the full total
+    MAX_STORED_ERRORS = 100
+
+    class Meta:
+        ordering = ['-started']
+        verbose_name = 'Sync Run'
+        verbose_name_plural = 'Sync Runs'
+        indexes = [
+            models.Index(fields=['-started'], name='nbag_syncrun_started'),
+            models.Index(fields=['source', '-started'], name='nbag_syncrun_source_started'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_source_display()} {self.operation} @ {self.started:%Y-%m-%d %H:%M:%S}'
+
+    @property
+    def rows_total(self):
+        return self.rows_created + self.rows_updated + self.rows_unchanged + self.rows_deleted
+
+    @property
+    def throughput(self):
+        """Rows processed per second."""
+        if not self.duration:
+            return None
+        return round(self.rows_total / self.duration, 2)
+
+    def add_error(self, message):
+        self.error_count += 1
+        if len(self.errors) < self.MAX_STORED_ERRORS:
+            self.errors.append(str(message))
+
+    def finish(self, status=None):
+        self.finished = timezone.now()
+        self.duration = (self.finished - self.started).total_seconds()
+        self.status = status or SyncStatusChoices.COMPLETED
+        self.save()
@@ -11,6 +11,14 @@ menus = [
                     link_text='Azure Groups',
                     # No add button - read-only interface
                 ),
+                PluginMenuItem(
+                    link='plugins:netbox_azure_groups:groupsimilarity_list',
+                    link_text='Similar Groups',
+                ),
+                PluginMenuItem(
+                    link='plugins:netbox_azure_groups:rolecandidate_list',
+                    link_text='Role Candidates',
+                ),
             ]),
             ('Resources', [
                 PluginMenuItem(
@@ -0,0 +1,323 @@
+"""
+Transactional outbox for downstream consumers.
+
+NetBox emits one event per saved object, which floods consumers during bulk
+syncs (and the bulk paths switch those per-row events off; see changelog.py).
+Instead, the membership sync and grant history write OutboxEvent rows in the
+same transaction as the change itself, so an event exists exactly when its
+change committed.
+
+dispatch() then delivers them. It waits until events are
+``outbox_coalesce_seconds`` old, merges all pending events for the same entity
+into one net change, and POSTs JSON batches of up to ``outbox_batch_size``
+changes to each of ``outbox_endpoints``. A failed batch is retried with
+exponential backoff, up to ``outbox_max_attempts`` times, and only to the
+endpoints that have not accepted it. Later changes to the same entity wait for
+(and merge with) an earlier one that is still being retried. Delivery is at
+least once: consumers should treat ``event_ids`` as idempotency keys.
+
+Nothing is written unless at least one endpoint is configured.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+
+import requests
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from netbox.plugins import get_plugin_config
+
+from .models import OutboxEvent, OutboxStatusChoices
+
+logger = logging.getLogger(__name__)
+
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+MEMBERSHIP_TOPIC = 'group_membership'
+GRANT_TOPIC = 'access_grant'
+
+# Backoff after the n-th failed attempt: RETRY_BASE * 2**(n - 1), capped
+RETRY_BASE = timedelta(seconds=30)
+RETRY_MAX = timedelta(hours=1)
+
+DELIVERY_TIMEOUT = 10
+
+# How long claimed events stay hidden from other dispatchers while their batches are sent
+CLAIM_LEASE = timedelta(minutes=15)
+
+
+def outbox_enabled():
+    return bool(get_plugin_config('netbox_azure_groups', 'outbox_endpoints'))
+
+
+# Writing
+
+def outbox_event(topic, object_id, action, data):
+    """Unsaved OutboxEvent; write it with write_events() inside the change's transaction."""
+    return OutboxEvent(topic=topic, object_id=object_id, action=action, data=data)
+
+
+def write_events(events):
+    """Append outbox events if any endpoint is configured."""
+    if events and outbox_enabled():
+        OutboxEvent.objects.bulk_create(events, batch_size=1000)
+
+
+def membership_event(membership, action, group=None):
+    group = group or membership.group
+    return outbox_event(MEMBERSHIP_TOPIC, membership.pk, action, {
+        'group': group.pk,
+        'group_object_id': str(group.object_id),
+        'contact': membership.contact_id,
+        'device': membership.device_id,
+        'membership_type': membership.membership_type,
+        'nested_via': membership.nested_via,
+    })
+
+
+def grant_outbox_event(event):
+    """Outbox event for a GrantEvent."""
+    action = {'granted': CREATED, 'deleted': DELETED}.get(event.event, UPDATED)
+    return outbox_event(GRANT_TOPIC, event.grant_id, action, {
+        'event': event.event,
+        'resource': event.resource_id,
+        'contact': event.contact_id,
+        'azure_group': event.azure_group_id,
+        'control_method': event.control_method_id,
+        'access_level': event.access_level,
+        'previous_access_level': event.previous_access_level,
+        'is_active': event.is_active,
+    })
+
+
+# Coalescing
+
+def coalesce(events):
+    """
+    Merge events per ``(topic, object_id)`` into net changes, in order of first appearance.
+
+    Created then deleted cancels out; created then updated is still created;
+    anything ending in a delete is deleted; otherwise updated. The data is that
+    of the last event.
+    """
+    merged = OrderedDict()
+    for event in events:
+        key = (event.topic, event.object_id)
+        change = merged.get(key)
+        if change is None:
+            merged[key] = change = {
+                'topic': event.topic,
+                'object_id': event.object_id,
+                'first_action': event.action,
+                'event_ids': [],
+                'first_seen': event.created,
+            }
+        change.update(action=event.action, data=event.data, last_seen=event.created)
+        change['event_ids'].append(event.pk)
+
+    changes = []
+    for change in merged.values():
+        first_action = change.pop('first_action')
+        if first_action == CREATED and change['action'] == DELETED:
+            action = None
+        elif first_action == CREATED:
+            action = CREATED
+        elif change['action'] == DELETED:
+            action = DELETED
+        else:
+            action = UPDATED
+        change['action'] = action
+        changes.append(change)
+    return changes
+
+
+# Delivery
+
+@dataclass
+class DispatchResult:
+    events: int = 0
+    changes: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    purged: int = 0
+
+
+def sign(body, secret):
+    return hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+
+
+def deliver(endpoint, changes):
+    """POST one batch to an endpoint. Raises on failure."""
+    body = json.dumps(
+        {'batch_id': str(uuid.uuid4()), 'sent': timezone.now(), 'changes': changes}, cls=DjangoJSONEncoder
+    ).encode()
+    headers = {'Content-Type': 'application/json', **endpoint.get('headers', {})}
+    if endpoint.get('secret'):
+        headers['X-Hook-Signature'] = sign(body, endpoint['secret'])
+    response = requests.post(
+        endpoint['url'], data=body, headers=headers, timeout=endpoint.get('timeout', DELIVERY_TIMEOUT),
+        verify=endpoint.get('ssl_verification', True),
+    )
+    response.raise_for_status()
+
+
+def _backoff(attempts):
+    return min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+
+
+def dispatch(window=None, batch_size=None, endpoints=None, max_attempts=None, limit=10000):
+    """
+    Deliver pending outbox events that have aged past the coalescing window.
+
+    Rows are claimed in a short transaction with SELECT ... FOR UPDATE SKIP
+    LOCKED and leased for CLAIM_LEASE by moving their ``next_attempt``, so
+    several dispatchers can run side by side without sending a change twice.
+    Batches are sent outside any transaction and the outcome is recorded
+    afterwards; events of a dispatcher that dies mid-way are picked up again
+    once the lease runs out.
+
+    Each endpoint is sent the coalesced events it has not accepted yet
+    (``delivered_to``), so a failure at one endpoint is retried there alone.
+    An event is delivered once every endpoint subscribed to its topic has
+    accepted it.
+    """
+    config = _outbox_settings()
+    window = config['outbox_coalesce_seconds'] if window is None else window
+    batch_size = batch_size or config['outbox_batch_size']
+    endpoints = config['outbox_endpoints'] if endpoints is None else endpoints
+    max_attempts = max_attempts or config['outbox_max_attempts']
+
+    result = DispatchResult()
+    now = timezone.now()
+    events = claim(now, window, limit)
+    if not events:
+        return result
+    result.events = len(events)
+    result.changes = len(coalesce(events))
+
+    errors = {}
+    for endpoint in endpoints:
+        url, topics = endpoint['url'], endpoint.get('topics')
+        todo = {
+            event.pk: event for event in events
+            if (not topics or event.topic in topics) and url not in event.delivered_to
+        }
+        changes = coalesce(todo.values())
+        # Cancelled-out changes need no delivery
+        accepted = [change for change in changes if change['action'] is None]
+        pending = [change for change in changes if change['action'] is not None]
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            result.batches += 1
+            try:
+                deliver(endpoint, batch)
+            except requests.RequestException as e:
+                error = f'{url}: {e}'
+                logger.warning(f'Outbox delivery failed: {error}')
+                result.failed_batches += 1
+                for change in batch:
+                    errors.update(dict.fromkeys(change['event_ids'], error))
+            else:
+                accepted.extend(batch)
+
+        for change in accepted:
+            for pk in change['event_ids']:
+                todo[pk].delivered_to.append(url)
+
+    recorded = timezone.now()
+    for event in events:
+        if event.pk not in errors:
+            event.status = OutboxStatusChoices.DELIVERED
+            event.delivered = recorded
+            event.last_error = ''
+            continue
+        event.attempts += 1
+        event.last_error = errors[event.pk][:1000]
+        if event.attempts >= max_attempts:
+            # Not backed off: a newer change to the entity claims it again right away (see claim())
+            event.status = OutboxStatusChoices.FAILED
+            event.next_attempt = recorded
+        else:
+            event.status = OutboxStatusChoices.PENDING
+            event.next_attempt = recorded + _backoff(event.attempts)
+    OutboxEvent.objects.bulk_update(
+        events, ['status', 'delivered', 'last_error', 'attempts', 'next_attempt', 'delivered_to'], batch_size=1000
+    )
+
+    result.purged = purge_delivered(config['outbox_retention_days'])
+    return result
+
+
+def claim(now, window, limit):
+    """
+    Lock and lease up to ``limit`` due events older than ``window`` seconds. Returns them in order.
+
+    Changes to one entity never overtake each other. An event waits while an
+    older undelivered event of its entity is backing off or leased by another
+    dispatcher, and merges with it once that is due. Failed events (out of
+    attempts) are claimed again with the newer events of their entity.
+    """
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True).filter(
+                status=OutboxStatusChoices.PENDING, next_attempt__lte=now,
+                created__lte=now - timedelta(seconds=window),
+            ).order_by('pk')[:limit]
+        )
+        if events:
+            events = _in_entity_order(events, now)
+            OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(next_attempt=now + CLAIM_LEASE)
+    return events
+
+
+def _in_entity_order(events, now):
+    """Add the failed events of the claimed entities, then drop events queued behind an unclaimed older one."""
+    keys = {(event.topic, event.object_id) for event in events}
+    earlier = OutboxEvent.objects.filter(
+        status__in=(OutboxStatusChoices.PENDING, OutboxStatusChoices.FAILED),
+        object_id__in={object_id for _, object_id in keys},
+        pk__lt=max(event.pk for event in events),
+    )
+    failed = earlier.filter(status=OutboxStatusChoices.FAILED, next_attempt__lte=now).select_for_update(
+        skip_locked=True
+    )
+    events += [event for event in failed if (event.topic, event.object_id) in keys]
+
+    unclaimed = earlier.exclude(pk__in=[event.pk for event in events]).values('topic', 'object_id').annotate(
+        first=Min('pk')
+    ).order_by()
+    blocked = {
+        (row['topic'], row['object_id']): row['first'] for row in unclaimed
+        if (row['topic'], row['object_id']) in keys
+    }
+    events = [
+        event for event in events
+        if (event.topic, event.object_id) not in blocked or event.pk < blocked[(event.topic, event.object_id)]
+    ]
+    return sorted(events, key=lambda event: event.pk)
+
+
+def _outbox_settings():
+    return {
+        name: get_plugin_config('netbox_azure_groups', name) for name in (
+            'outbox_endpoints', 'outbox_coalesce_seconds', 'outbox_batch_size', 'outbox_max_attempts',
+            'outbox_retention_days',
+        )
+    }
+
+
+def purge_delivered(retention_days):
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = OutboxEvent.objects.filter(status=OutboxStatusChoices.DELIVERED, delivered__lt=cutoff).delete()
+    return deleted
+
@@ -0,0 +1,110 @@
+"""
+Retention purge for soft-deleted AzureGroups.
+
+Deleting a large group in one statement cascades through memberships, access
+grants and control methods inside a single transaction and holds locks for the
+whole duration. The purge below removes dependents in bounded chunks instead,
+one short transaction per chunk, so it can run alongside a live sync.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from netbox.plugins import get_plugin_config
+
+from .models import AccessControlMethod, AccessGrant, AzureGroup, GroupMembership, GroupOwnership
+
+logger = logging.getLogger(__name__)
+
+# Dependents of a group, in deletion order, with the FK pointing at the group.
+# Grants go before control methods so the method cascade has nothing left to do.
+GROUP_DEPENDENTS = (
+    (AccessGrant, 'azure_group'),
+    (GroupMembership, 'group'),
+    (GroupOwnership, 'group'),
+    (AccessControlMethod, 'azure_group'),
+)
+
+
+@dataclass
+class PurgeResult:
+    groups_purged: int = 0
+    groups_skipped: int = 0
+    rows_deleted: dict = field(default_factory=dict)
+
+    def add(self, model, count):
+        label = model._meta.label
+        self.rows_deleted[label] = self.rows_deleted.get(label, 0) + count
+
+
+def expired_groups(retention_days=None):
+    """Soft-deleted groups past the retention window, oldest first (partial index on deleted_at)."""
+    if retention_days is None:
+        retention_days = get_plugin_config('netbox_azure_groups', 'soft_delete_retention_days')
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    return AzureGroup.all_objects.filter(is_deleted=True, deleted_at__lt=cutoff).order_by('deleted_at')
+
+
+def _lock_if_still_deleted(group_id):
+    """
+    Lock the group row for the current transaction if it is still soft-deleted.
+
+    Returns False when a sync has resurrected the group or currently holds the
+    row, in which case the purge leaves it alone.
+    """
+    return AzureGroup.all_objects.select_for_update(skip_locked=True).filter(
+        pk=group_id, is_deleted=True
+    ).exists()
+
+
+def purge_group(group_id, batch_size, result, pause=0.0, progress=None):
+    """Delete one soft-deleted group and its dependents in chunks. Returns True if purged."""
+    for model, fk in GROUP_DEPENDENTS:
+        while True:
+            with transaction.atomic():
+                if not _lock_if_still_deleted(group_id):
+                    return False
+                pks = list(model.objects.filter(**{f'{fk}_id': group_id}).values_list('pk', flat=True)[:batch_size])
+                if not pks:
+                    break
+                model.objects.filter(pk__in=pks).delete()
+            result.add(model, len(pks))
+            if progress:
+                progress(group_id, model, len(pks))
+            if pause:
+                time.sleep(pause)
+
+    with transaction.atomic():
+        if not _lock_if_still_deleted(group_id):
+            return False
+        AzureGroup.all_objects.filter(pk=group_id).delete()
+    result.add(AzureGroup, 1)
+    return True
+
+
+def purge_deleted_groups(retention_days=None, batch_size=1000, limit=None, pause=0.0, progress=None):
+    """
+    Purge expired soft-deleted groups.
+
+    Each chunk re-checks, under a row lock, that the group is still deleted, so
+    a group resurrected by a concurrent sync stops being purged at the next
+    chunk boundary (any memberships removed before that are restored by the
+    next membership sync). Groups whose row is locked by a sync are skipped and
+    picked up on the next run.
+    """
+    result = PurgeResult()
+    group_ids = expired_groups(retention_days).values_list('pk', flat=True)
+    if limit:
+        group_ids = group_ids[:limit]
+
+    for group_id in list(group_ids):
+        if purge_group(group_id, batch_size, result, pause=pause, progress=progress):
+            result.groups_purged += 1
+        else:
+            result.groups_skipped += 1
+            logger.info(f'Skipped purge of group {group_id}: resurrected or locked by a running sync')
+
+    return result
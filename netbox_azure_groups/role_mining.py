@@ -0,0 +1,266 @@
+"""
+Role mining from access grants.
+
+Builds a sparse contact x (resource, access level) matrix from active
+AccessGrants and clusters contacts with near-identical access into candidate
+roles:
+
+1. Contacts with identical access collapse into one weighted row.
+2. Distinct access sets are assigned, most common first, to the first role
+   whose leader set is within ``role_similarity_threshold`` (Jaccard), or start
+   a new role. Only leaders sharing a permission with the set are compared,
+   through an inverted index that grows with each new leader.
+3. A role's permissions are those held by at least ``role_min_coverage`` of
+   its members, and existing Azure groups are ranked by how closely their
+   members match the role's members.
+
+Requires NumPy and SciPy (``pip install netbox-azure-groups[analytics]``).
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.utils import timezone
+from netbox.plugins import get_plugin_config
+
+from .models import AccessGrant, GroupMembership, ProtectedResource, RoleCandidate
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+logger = logging.getLogger(__name__)
+
+# Existing groups reported per candidate role
+MATCHING_GROUPS = 3
+
+
+def require_scipy():
+    if sparse is None:
+        raise RuntimeError('Role mining requires NumPy and SciPy: pip install netbox-azure-groups[analytics]')
+
+
+@dataclass
+class RoleMiningResult:
+    contacts: int = 0
+    permissions: int = 0
+    distinct_sets: int = 0
+    roles: int = 0
+
+
+@dataclass
+class AccessMatrix:
+    matrix: object        # csr_matrix, contacts x permissions, 0/1
+    contact_ids: object   # ndarray, row -> Contact pk
+    permissions: list     # column -> (resource pk, access level)
+
+
+def access_matrix():
+    """Active grants as a binary CSR matrix."""
+    require_scipy()
+    contact_index, permission_index = {}, {}
+    rows, cols = [], []
+    grants = AccessGrant.objects.filter(is_active=True).values_list('contact_id', 'resource_id', 'access_level')
+    for contact_id, resource_id, access_level in grants.iterator(chunk_size=10000):
+        rows.append(contact_index.setdefault(contact_id, len(contact_index)))
+        cols.append(permission_index.setdefault((resource_id, access_level), len(permission_index)))
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(len(contact_index), len(permission_index)),
+    )
+    # Several grants (via different groups) can give the same access
+    matrix.data[:] = 1
+    return AccessMatrix(
+        matrix=matrix,
+        contact_ids=np.fromiter(contact_index, dtype=np.int64, count=len(contact_index)),
+        permissions=list(permission_index),
+    )
+
+
+def distinct_rows(matrix):
+    """Collapse identical rows. Returns (unique matrix, row -> unique index, weight per unique row)."""
+    keys = {}
+    inverse = np.empty(matrix.shape[0], dtype=np.int64)
+    first = []
+    for row in range(matrix.shape[0]):
+        key = np.sort(matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]]).tobytes()
+        if key not in keys:
+            keys[key] = len(first)
+            first.append(row)
+        inverse[row] = keys[key]
+    weights = np.bincount(inverse, minlength=len(first))
+    return matrix[first], inverse, weights
+
+
+def leader_clusters(unique, weights, threshold):
+    """Assign each distinct access set to a role, most common sets first. Returns the role index per set."""
+    sizes = np.diff(unique.indptr)
+    order = np.lexsort((-sizes, -weights))
+    assignment = np.full(unique.shape[0], -1, dtype=np.int64)
+    # Leaders grow one at a time: an inverted index of their permissions, and their sizes
+    holders = defaultdict(list)
+    leader_sizes = np.empty(unique.shape[0], dtype=np.float64)
+    leaders = 0
+
+    for index in order:
+        columns = unique.indices[unique.indptr[index]:unique.indptr[index + 1]]
+        hits = [leader for column in columns for leader in holders.get(column, ())]
+        if hits:
+            candidates, shared = np.unique(hits, return_counts=True)
+            jaccard = shared / (leader_sizes[candidates] + sizes[index] - shared)
+            best = int(jaccard.argmax())
+            if jaccard[best] >= threshold:
+                assignment[index] = candidates[best]
+                continue
+        assignment[index] = leaders
+        for column in columns:
+            holders[column].append(leaders)
+        leader_sizes[leaders] = sizes[index]
+        leaders += 1
+    return assignment
+
+
+def mine_roles(threshold=None, min_members=None, min_coverage=None):
+    """Cluster contacts into candidate roles. Returns ``(result, [role dicts])`` without writing anything."""
+    require_scipy()
+    if threshold is None:
+        threshold = get_plugin_config('netbox_azure_groups', 'role_similarity_threshold')
+    if min_members is None:
+        min_members = get_plugin_config('netbox_azure_groups', 'role_min_members')
+    if min_coverage is None:
+        min_coverage = get_plugin_config('netbox_azure_groups', 'role_min_coverage')
+
+    access = access_matrix()
+    grants = access.matrix
+    result = RoleMiningResult(contacts=grants.shape[0], permissions=grants.shape[1])
+    if not grants.nnz:
+        return result, []
+
+    unique, inverse, weights = distinct_rows(grants)
+    result.distinct_sets = unique.shape[0]
+    role_of_contact = leader_clusters(unique, weights, threshold)[inverse]
+    n_roles = int(role_of_contact.max()) + 1
+
+    # contacts x roles assignment, then per-role permission coverage in one product
+    role_members = sparse.csr_matrix(
+        (np.ones(grants.shape[0], dtype=np.float32), (np.arange(grants.shape[0]), role_of_contact)),
+        shape=(grants.shape[0], n_roles),
+    )
+    role_sizes = np.asarray(role_members.sum(axis=0)).ravel()
+    coverage = (role_members.T @ grants).multiply(1 / role_sizes[:, None]).tocsr()
+    role_permissions = (coverage >= min_coverage).astype(np.float32).tocsr()
+    permission_counts = np.diff(role_permissions.indptr)
+
+    # Each member's Jaccard similarity to their role's permissions
+    shared = np.asarray(grants.multiply(role_permissions[role_of_contact]).sum(axis=1)).ravel()
+    member_sizes = np.diff(grants.indptr)
+    union = member_sizes + permission_counts[role_of_contact] - shared
+    member_jaccard = np.divide(shared, union, out=np.zeros_like(shared, dtype=np.float64), where=union > 0)
+    cohesion = np.bincount(role_of_contact, weights=member_jaccard, minlength=n_roles) / role_sizes
+
+    matches = matching_groups(access.contact_ids, role_members, role_sizes)
+
+    roles = []
+    for role in np.argsort(-role_sizes, kind='stable'):
+        if role_sizes[role] < min_members or not permission_counts[role]:
+            continue
+        columns = role_permissions.indices[role_permissions.indptr[role]:role_permissions.indptr[role + 1]]
+        roles.append({
+            'contact_ids': access.contact_ids[role_of_contact == role].tolist(),
+            'permissions': sorted(list(access.permissions[column]) for column in columns),
+            'cohesion': float(cohesion[role]),
+            'matching_groups': matches.get(int(role), []),
+        })
+    result.roles = len(roles)
+    return result, roles
+
+
+def matching_groups(contact_ids, role_members, role_sizes):
+    """Top existing groups per role by Jaccard similarity of their contact members to the role's members."""
+    row_of_contact = {int(contact_id): row for row, contact_id in enumerate(contact_ids)}
+    group_index = {}
+    rows, cols = [], []
+    memberships = GroupMembership.objects.filter(
+        group__is_deleted=False, contact__isnull=False
+    ).values_list('group_id', 'contact_id')
+    # Whole group sizes, not just members with grants
+    group_sizes = {}
+    for group_id, contact_id in memberships.iterator(chunk_size=10000):
+        group_sizes[group_id] = group_sizes.get(group_id, 0) + 1
+        row = row_of_contact.get(contact_id)
+        if row is not None:
+            rows.append(group_index.setdefault(group_id, len(group_index)))
+            cols.append(row)
+    if not group_index:
+        return {}
+
+    group_members = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(group_index), role_members.shape[0])
+    )
+    group_ids = np.fromiter(group_index, dtype=np.int64, count=len(group_index))
+    sizes = np.array([group_sizes.get(int(group_id), 0) for group_id in group_ids], dtype=np.float64)
+
+    shared = (group_members @ role_members).tocsc()
+    matches = {}
+    for role in range(shared.shape[1]):
+        start, end = shared.indptr[role], shared.indptr[role + 1]
+        if start == end:
+            continue
+        groups = shared.indices[start:end]
+        overlap = shared.data[start:end]
+        jaccard = overlap / (sizes[groups] + role_sizes[role] - overlap)
+        top = np.argsort(-jaccard)[:MATCHING_GROUPS]
+        matches[role] = [
+            {'group': int(group_ids[groups[i]]), 'jaccard': round(float(jaccard[i]), 4)} for i in top
+        ]
+    return matches
+
+
+def refresh_role_candidates(threshold=None, min_members=None, min_coverage=None):
+    """Re-mine roles and replace the stored RoleCandidate rows."""
+    result, roles = mine_roles(threshold, min_members, min_coverage)
+    resource_ids = {resource_id for role in roles for resource_id, _ in role['permissions']}
+    resource_names = dict(ProtectedResource.objects.filter(pk__in=resource_ids).values_list('pk', 'name'))
+    now = timezone.now()
+
+    with transaction.atomic():
+        RoleCandidate.objects.all().delete()
+        candidates = RoleCandidate.objects.bulk_create([
+            RoleCandidate(
+                name=_role_name(index, role, resource_names),
+                member_count=len(role['contact_ids']),
+                permission_count=len(role['permissions']),
+                cohesion=role['cohesion'],
+                permissions=role['permissions'],
+                matching_groups=role['matching_groups'],
+                closest_group_id=role['matching_groups'][0]['group'] if role['matching_groups'] else None,
+                closest_group_jaccard=role['matching_groups'][0]['jaccard'] if role['matching_groups'] else None,
+                computed=now,
+            )
+            for index, role in enumerate(roles, start=1)
+        ])
+        through = RoleCandidate.contacts.through
+        through.objects.bulk_create(
+            [
+                through(rolecandidate_id=candidate.pk, contact_id=contact_id)
+                for candidate, role in zip(candidates, roles)
+                for contact_id in role['contact_ids']
+            ],
+            batch_size=5000,
+        )
+
+    logger.info(
+        f'Role mining: {result.contacts} contacts, {result.permissions} permissions, '
+        f'{result.distinct_sets} distinct access sets, {result.roles} candidate roles'
+    )
+    return result
+
+
+def _role_name(index, role, resource_names):
+    resources = sorted({resource_names.get(resource_id, f'#{resource_id}') for resource_id, _ in role['permissions']})
+    summary = ', '.join(resources[:3]) + (f' +{len(resources) - 3}' if len(resources) > 3 else '')
+    return f'Role {index}: {summary}'[:200]
@@ -0,0 +1,556 @@
+"""
+Azure AD dynamic membership rules.
+
+Parses the rule grammar Azure uses for dynamic groups, for example::
+
+    (user.department -eq "Sales") -and (user.accountEnabled -eq true)
+    device.deviceOSType -startsWith "Windows" -or device.displayName -match "^lab-"
+
+and compiles the parsed rule into a Django ``Q`` over Contacts (``user.*``
+rules) or Devices (``device.*`` rules), so a group's members can be computed in
+a single query. Rule properties map to model fields through
+DEFAULT_PROPERTY_MAP plus the ``rule_property_map`` plugin setting; anything
+unmapped is looked up as a custom field named after the property in snake case
+(``user.employeeId`` -> ``custom_field_data.employee_id``).
+
+Conditions that have no Q equivalent (``-any``/``-all`` over multi-valued
+properties, except ``user.memberOf -any``) are evaluated in Python on the rows
+matched by the rest of the rule.
+"""
+import operator
+import re
+from dataclasses import dataclass
+from functools import lru_cache, reduce
+
+from django.db.models import Exists, OuterRef, Q
+from netbox.plugins import get_plugin_config
+
+__all__ = (
+    'RuleError',
+    'CompiledRule',
+    'compile_rule',
+    'parse_rule',
+    'preview_rule',
+    'rule_members',
+)
+
+# Rule property (lower case) -> model field path, per target
+DEFAULT_PROPERTY_MAP = {
+    'user': {
+        'displayname': 'name',
+        'mail': 'email',
+        'userprincipalname': 'email',
+        'jobtitle': 'title',
+        'telephonenumber': 'phone',
+        'mobile': 'phone',
+        'streetaddress': 'address',
+    },
+    'device': {
+        'displayname': 'name',
+        'deviceostype': 'platform__name',
+        'devicemanufacturer': 'device_type__manufacturer__name',
+        'devicemodel': 'device_type__model',
+        'serialnumber': 'serial',
+    },
+}
+
+# Multi-valued property resolved through GroupMembership rather than a field
+MEMBER_OF = 'memberof'
+
+COMPARISON_OPERATORS = {
+    'eq', 'ne', 'startswith', 'notstartswith', 'contains', 'notcontains',
+    'match', 'notmatch', 'in', 'notin', 'le', 'ge',
+}
+QUANTIFIERS = {'any', 'all'}
+NEGATED = {
+    'ne': 'eq', 'notstartswith': 'startswith', 'notcontains': 'contains', 'notmatch': 'match', 'notin': 'in',
+}
+CONNECTIVES = {'and', 'or', 'not'}
+
+EXTENSION_PREFIX = re.compile(r'^extension_[0-9a-f]{32}_', re.IGNORECASE)
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<punct>[()\[\],])
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<operator>-[A-Za-z]+)
+  | (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<word>[A-Za-z_][\w.]*)
+''', re.VERBOSE)
+
+
+class RuleError(ValueError):
+    """A membership rule that cannot be parsed or does not apply to a single target."""
+
+
+# Syntax tree
+
+@dataclass(frozen=True)
+class And:
+    children: tuple
+
+
+@dataclass(frozen=True)
+class Or:
+    children: tuple
+
+
+@dataclass(frozen=True)
+class Not:
+    child: object
+
+
+@dataclass(frozen=True)
+class Compare:
+    target: str
+    prop: str
+    op: str
+    value: object
+
+
+@dataclass(frozen=True)
+class Quantified:
+    target: str
+    prop: str
+    op: str
+    predicate: Compare
+
+
+# Parser
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise RuleError(f'Unexpected character {text[position]!r} at position {position}')
+        kind = match.lastgroup
+        if kind != 'space':
+            tokens.append((kind, match.group(), position))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.index = 0
+        self.targets = set()
+
+    def peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else (None, None, None)
+
+    def advance(self):
+        token = self.peek()
+        if token[0] is None:
+            raise RuleError('Unexpected end of rule')
+        self.index += 1
+        return token
+
+    def expect(self, value):
+        kind, text, position = self.advance()
+        if text != value:
+            raise RuleError(f'Expected {value!r} at position {position}, found {text!r}')
+
+    def keyword(self):
+        """The operator or connective at the cursor, lower case without the dash, or None."""
+        kind, text, _ = self.peek()
+        if kind == 'operator':
+            return text[1:].lower()
+        if kind == 'word' and text.lower() in CONNECTIVES | COMPARISON_OPERATORS | QUANTIFIERS:
+            return text.lower()
+        return None
+
+    def parse(self):
+        if not self.tokens:
+            raise RuleError('Rule is empty')
+        node = self.expression()
+        if self.index < len(self.tokens):
+            _, text, position = self.peek()
+            raise RuleError(f'Unexpected {text!r} at position {position}')
+        return node
+
+    def expression(self):
+        children = [self.conjunction()]
+        while self.keyword() == 'or':
+            self.advance()
+            children.append(self.conjunction())
+        return children[0] if len(children) == 1 else Or(tuple(children))
+
+    def conjunction(self):
+        children = [self.unary()]
+        while self.keyword() == 'and':
+            self.advance()
+            children.append(self.unary())
+        return children[0] if len(children) == 1 else And(tuple(children))
+
+    def unary(self):
+        if self.keyword() == 'not':
+            self.advance()
+            return Not(self.unary())
+        if self.peek()[1] == '(':
+            self.advance()
+            node = self.expression()
+            self.expect(')')
+            return node
+        return self.condition()
+
+    def property(self):
+        kind, text, position = self.advance()
+        if kind != 'word' or '.' not in text:
+            raise RuleError(f'Expected a property such as user.department at position {position}, found {text!r}')
+        target, _, prop = text.partition('.')
+        return target.lower(), prop, position
+
+    def operator(self):
+        negate = False
+        if self.keyword() == 'not':
+            self.advance()
+            negate = True
+        kind, text, position = self.advance()
+        op = self.keyword_of(kind, text)
+        if op not in COMPARISON_OPERATORS | QUANTIFIERS:
+            raise RuleError(f'Unknown operator {text!r} at position {position}')
+        return op, negate, position
+
+    @staticmethod
+    def keyword_of(kind, text):
+        if kind == 'operator':
+            return text[1:].lower()
+        return text.lower() if kind == 'word' else None
+
+    def condition(self):
+        target, prop, position = self.property()
+        if target not in DEFAULT_PROPERTY_MAP:
+            raise RuleError(f'Unsupported rule target {target!r} at position {position}; use user or device')
+        self.targets.add(target)
+
+        op, negate, position = self.operator()
+        if op in QUANTIFIERS:
+            self.expect('(')
+            predicate = self.predicate()
+            self.expect(')')
+            node = Quantified(target, prop, op, predicate)
+        else:
+            value = self.value()
+            if op in ('in', 'notin') and not isinstance(value, tuple):
+                raise RuleError(f'-{op} needs a list value at position {position}')
+            node = Compare(target, prop, op, value)
+        return Not(node) if negate else node
+
+    def predicate(self):
+        """The inner condition of -any/-all: ``_ -op value`` or ``group.objectId -in [...]``."""
+        kind, text, position = self.advance()
+        if kind != 'word':
+            raise RuleError(f'Expected _ or a property at position {position}, found {text!r}')
+        op, negate, _ = self.operator()
+        if op in QUANTIFIERS or negate:
+            raise RuleError(f'Only a plain comparison is supported inside -any/-all at position {position}')
+        return Compare('', text.lower(), op, self.value())
+
+    def value(self):
+        kind, text, position = self.advance()
+        if text == '[':
+            items = []
+            if self.peek()[1] != ']':
+                items.append(self.value())
+                while self.peek()[1] == ',':
+                    self.advance()
+                    items.append(self.value())
+            self.expect(']')
+            return tuple(items)
+        if kind == 'string':
+            return re.sub(r'\\(.)', r'\1', text[1:-1])
+        if kind == 'number':
+            return float(text) if '.' in text else int(text)
+        if kind == 'word' and text.lower() in ('true', 'false'):
+            return text.lower() == 'true'
+        if kind == 'word' and text.lower() == 'null':
+            return None
+        raise RuleError(f'Expected a value at position {position}, found {text!r}')
+
+
+def parse_rule(text):
+    """Parse a rule into its syntax tree. Returns ``(tree, target)`` where target is 'user' or 'device'."""
+    parser = _Parser(text)
+    tree = parser.parse()
+    if len(parser.targets) != 1:
+        raise RuleError('A rule must reference either user or device properties, not both')
+    return tree, parser.targets.pop()
+
+
+# Property resolution
+
+def _snake_case(name):
+    return re.sub(r'(?<=[a-z0-9])([A-Z])', r'_\1', name).lower()
+
+
+# Properties come from user-written rules, so the cache is bounded
+@lru_cache(maxsize=512)
+def field_path(target, prop):
+    """Model field path for a rule property; unmapped properties resolve to custom fields."""
+    overrides = {
+        key.lower(): value for key, value in get_plugin_config('netbox_azure_groups', 'rule_property_map').items()
+    }
+    path = overrides.get(f'{target}.{prop}'.lower()) or DEFAULT_PROPERTY_MAP[target].get(prop.lower())
+    if path:
+        return path
+    return f'custom_field_data__{_snake_case(EXTENSION_PREFIX.sub("", prop))}'
+
+
+def _target_model(target):
+    if target == 'user':
+        from tenancy.models import Contact
+        return Contact
+    from dcim.models import Device
+    return Device
+
+
+def _member_fk(target):
+    return 'contact' if target == 'user' else 'device'
+
+
+# Q compiler
+
+class _UnsupportedError(Exception):
+    pass
+
+
+LOOKUPS = {'startswith': 'istartswith', 'contains': 'icontains', 'match': 'iregex', 'le': 'lte', 'ge': 'gte'}
+
+
+def _compare_q(path, op, value):
+    if op in NEGATED:
+        return ~_compare_q(path, NEGATED[op], value)
+    if op == 'in':
+        if not value:
+            return Q(pk__in=[])
+        return reduce(operator.or_, (_compare_q(path, 'eq', item) for item in value))
+    if op == 'eq':
+        if value is None:
+            return Q(**{f'{path}__isnull': True})
+        lookup = 'iexact' if isinstance(value, str) else 'exact'
+        return Q(**{f'{path}__{lookup}': value})
+    return Q(**{f'{path}__{LOOKUPS[op]}': value})
+
+
+def _compile(node, target):
+    if isinstance(node, And):
+        return reduce(operator.and_, (_compile(child, target) for child in node.children))
+    if isinstance(node, Or):
+        return reduce(operator.or_, (_compile(child, target) for child in node.children))
+    if isinstance(node, Not):
+        return ~_compile(node.child, target)
+    if isinstance(node, Quantified):
+        predicate = node.predicate
+        if node.prop.lower() == MEMBER_OF and node.op == 'any' and predicate.prop == 'group.objectid' \
+                and predicate.op in ('eq', 'in'):
+            from .models import GroupMembership
+            object_ids = predicate.value if predicate.op == 'in' else (predicate.value,)
+            return Q(Exists(GroupMembership.objects.filter(
+                **{_member_fk(target): OuterRef('pk')}, group__object_id__in=list(object_ids)
+            )))
+        raise _UnsupportedError
+    return _compare_q(field_path(target, node.prop), node.op, node.value)
+
+
+# In-memory evaluator
+
+def _resolve(obj, path):
+    if path.startswith('custom_field_data__'):
+        return (obj.custom_field_data or {}).get(path[len('custom_field_data__'):])
+    for attribute in path.split('__'):
+        obj = getattr(obj, attribute, None)
+        if obj is None:
+            return None
+    return obj
+
+
+def _fold(value):
+    return value.casefold() if isinstance(value, str) else value
+
+
+def _compare(actual, op, value):
+    if op in NEGATED:
+        return not _compare(actual, NEGATED[op], value)
+    if op == 'in':
+        return any(_compare(actual, 'eq', item) for item in value)
+    if op == 'eq':
+        return _fold(actual) == _fold(value)
+    if actual is None:
+        return False
+    if op == 'startswith':
+        return _fold(str(actual)).startswith(_fold(str(value)))
+    if op == 'contains':
+        return _fold(str(value)) in _fold(str(actual))
+    if op == 'match':
+        return re.search(str(value), str(actual), re.IGNORECASE) is not None
+    try:
+        return actual <= value if op == 'le' else actual >= value
+    except TypeError:
+        return False
+
+
+def evaluate(node, target, obj, member_of=None):
+    """
+    Evaluate a syntax tree against one Contact or Device.
+
+    ``member_of`` is the set of AzureGroup object IDs the object belongs to;
+    it is only consulted by ``memberOf`` conditions.
+    """
+    if isinstance(node, And):
+        return all(evaluate(child, target, obj, member_of) for child in node.children)
+    if isinstance(node, Or):
+        return any(evaluate(child, target, obj, member_of) for child in node.children)
+    if isinstance(node, Not):
+        return not evaluate(node.child, target, obj, member_of)
+    if isinstance(node, Quantified):
+        if node.prop.lower() == MEMBER_OF:
+            values = [str(object_id).lower() for object_id in member_of or ()]
+            predicate = Compare('', node.predicate.prop, node.predicate.op, _lower_ids(node.predicate.value))
+        else:
+            values = _resolve(obj, field_path(target, node.prop))
+            values = [] if values is None else values if isinstance(values, (list, tuple)) else [values]
+            predicate = node.predicate
+        matches = (_compare(value, predicate.op, predicate.value) for value in values)
+        return any(matches) if node.op == 'any' else all(matches)
+    return _compare(_resolve(obj, field_path(target, node.prop)), node.op, node.value)
+
+
+def _lower_ids(value):
+    if isinstance(value, tuple):
+        return tuple(str(item).lower() for item in value)
+    return str(value).lower()
+
+
+def _uses_member_of(node):
+    if isinstance(node, (And, Or)):
+        return any(_uses_member_of(child) for child in node.children)
+    if isinstance(node, Not):
+        return _uses_member_of(node.child)
+    return isinstance(node, Quantified) and node.prop.lower() == MEMBER_OF
+
+
+# Compiled rules
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """
+    A parsed rule split into a database filter and Python-side conditions.
+
+    ``q`` holds every top-level conjunct that compiles to a Q; ``residual``
+    holds the rest, which must all hold for a row matched by ``q``.
+    """
+    text: str
+    target: str
+    tree: object
+    q: Q
+    residual: tuple
+
+    @property
+    def model(self):
+        return _target_model(self.target)
+
+    @property
+    def in_database(self):
+        """True if the whole rule runs as a single query."""
+        return not self.residual
+
+    def filter(self, queryset=None):
+        """Contacts or Devices matching the rule, as a queryset."""
+        if queryset is None:
+            queryset = self.model.objects.all()
+        queryset = queryset.filter(self.q)
+        if not self.residual:
+            return queryset
+
+        candidates = list(queryset)
+        member_of = self._member_of([obj.pk for obj in candidates]) if _uses_member_of(And(self.residual)) else {}
+        pks = [
+            obj.pk for obj in candidates
+            if all(evaluate(node, self.target, obj, member_of.get(obj.pk)) for node in self.residual)
+        ]
+        return self.model.objects.filter(pk__in=pks)
+
+    def matches(self, obj):
+        """Evaluate the full rule against one object in Python."""
+        member_of = self._member_of([obj.pk]).get(obj.pk) if _uses_member_of(self.tree) else None
+        return evaluate(self.tree, self.target, obj, member_of)
+
+    def _member_of(self, pks):
+        from .models import GroupMembership
+        fk = _member_fk(self.target)
+        member_of = {}
+        for pk, object_id in GroupMembership.objects.filter(**{f'{fk}__in': pks}).values_list(
+            fk, 'group__object_id'
+        ):
+            member_of.setdefault(pk, set()).add(object_id)
+        return member_of
+
+
+@lru_cache(maxsize=512)
+def compile_rule(text):
+    """Parse and compile a rule. Results are cached by rule text."""
+    tree, target = parse_rule(text)
+    conjuncts = tree.children if isinstance(tree, And) else (tree,)
+    q = Q()
+    residual = []
+    for node in conjuncts:
+        try:
+            q &= _compile(node, target)
+        except _UnsupportedError:
+            residual.append(node)
+    return CompiledRule(text=text, target=target, tree=tree, q=q, residual=tuple(residual))
+
+
+def rule_members(group, queryset=None):
+    """Contacts or Devices matched by a group's ``membership_rule``."""
+    if not group.membership_rule:
+        raise RuleError(f'Group {group} has no membership rule')
+    return compile_rule(group.membership_rule.strip()).filter(queryset)
+
+
+def _sample(queryset, size):
+    return [{'id': obj.pk, 'display': str(obj)} for obj in queryset.order_by('pk')[:size]]
+
+
+def preview_rule(group, text, sample_size=10, user=None):
+    """
+    Compare what ``text`` would match against the group's current memberships, without writing anything.
+
+    Matches, additions and removals are counted with subqueries in the
+    database; only the samples are loaded as objects. When ``user`` is given,
+    the counts and samples only cover the objects they may view.
+    """
+    from .models import GroupMembership
+
+    def visible(queryset):
+        return queryset.restrict(user, 'view') if user is not None else queryset
+
+    rule = compile_rule(text.strip())
+    model = rule.model
+    fk = _member_fk(rule.target)
+    matched = rule.filter(visible(model.objects.all()))
+    current = visible(model.objects.filter(
+        pk__in=GroupMembership.objects.filter(group=group, **{f'{fk}__isnull': False}).values(fk)
+    ))
+
+    to_add = matched.exclude(pk__in=current.values('pk'))
+    to_remove = current.exclude(pk__in=matched.values('pk'))
+    match_count = matched.count()
+    add_count = to_add.count()
+
+    return {
+        'target': model._meta.label_lower,
+        'in_database': rule.in_database,
+        'match_count': match_count,
+        'current_count': current.count(),
+        'add_count': add_count,
+        'remove_count': to_remove.count(),
+        'unchanged_count': match_count - add_count,
+        'sample': _sample(matched, sample_size),
+        'add_sample': _sample(to_add, sample_size),
+        'remove_sample': _sample(to_remove, sample_size),
+    }
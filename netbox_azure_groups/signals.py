@@ -0,0 +1,191 @@
+from functools import lru_cache
+
+from dcim.models import Device
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from tenancy.models import Contact
+
+from . import caching, change_feed
+from .access_graph import GROUP, MEMBERSHIP, METHOD, POLICY, record_change
+from .grant_events import change_events, grant_event, record_grant_events
+from .models import (
+    AccessControlMethod,
+    AccessGrant,
+    AzureGroup,
+    ChangeActionChoices,
+    FortiGatePolicy,
+    GrantEventChoices,
+    GroupMembership,
+    GroupOwnership,
+    ProtectedResource,
+    SyncRun,
+)
+from .sync import clear_membership_hash
+
+
+@receiver(post_save, sender=GroupMembership)
+@receiver(post_delete, sender=GroupMembership)
+def invalidate_membership_hash(sender, instance, **kwargs):
+    """Any membership write may diverge from the last synced member set, so force the next sync to reconcile."""
+    clear_membership_hash(instance.group_id)
+
+
+@receiver(post_save, sender=GroupMembership)
+@receiver(post_delete, sender=GroupMembership)
+def access_graph_membership_changed(sender, instance, **kwargs):
+    if instance.contact_id:
+        record_change(MEMBERSHIP, instance.pk)
+
+
+@receiver(post_save, sender=AccessControlMethod)
+@receiver(post_delete, sender=AccessControlMethod)
+def access_graph_method_changed(sender, instance, **kwargs):
+    record_change(METHOD, instance.pk)
+
+
+@receiver(post_save, sender=FortiGatePolicy)
+@receiver(post_delete, sender=FortiGatePolicy)
+def access_graph_policy_changed(sender, instance, created=False, **kwargs):
+    # Unlinked policies are not in the graph unless they just lost their link
+    if instance.access_control_method_id or not created:
+        record_change(POLICY, instance.pk)
+
+
+@receiver(post_save, sender=AzureGroup)
+def access_graph_group_created(sender, instance, created, **kwargs):
+    # New object IDs may appear in nested_via chains
+    if created:
+        record_change(GROUP, instance.pk)
+
+
+@receiver(pre_save, sender=AccessGrant)
+def remember_grant_state(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._history_original = instance.get_original_values()
+
+
+@receiver(post_save, sender=AccessGrant)
+def record_grant_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_grant_events(change_events(instance, instance.__dict__.pop('_history_original', {})))
+
+
+@receiver(post_delete, sender=AccessGrant)
+def record_grant_deletion(sender, instance, **kwargs):
+    record_grant_events([grant_event(instance, GrantEventChoices.DELETED)])
+
+
+# Access lookup cache (see caching.py). Deleting a resource, group, method or
+# contact cascades to its grants, whose own post_delete bumps the affected entries.
+
+# Fields shown by the cached lookups; renaming these fans out to every entry showing them
+CACHED_DISPLAY_FIELDS = {
+    ProtectedResource: ('name', 'resource_type'),
+    Contact: ('name',),
+}
+
+
+@receiver(post_save, sender=AccessGrant)
+@receiver(post_delete, sender=AccessGrant)
+def access_cache_grant_changed(sender, instance, **kwargs):
+    refs = caching.grant_refs(instance.resource_id, instance.contact_id)
+    # A grant moved to another resource or contact also leaves the old entries
+    loaded = getattr(instance, '_loaded_values', {})
+    if 'resource_id' in loaded and 'contact_id' in loaded:
+        refs |= caching.grant_refs(loaded['resource_id'], loaded['contact_id'])
+    caching.invalidate(refs)
+
+
+@receiver(pre_save, sender=AccessControlMethod)
+def access_cache_remember_method(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk:
+        instance._cache_original = AccessControlMethod.objects.filter(pk=instance.pk).values_list(
+            'azure_group_id', 'resource_id'
+        ).first()
+
+
+@receiver(post_save, sender=AccessControlMethod)
+@receiver(post_delete, sender=AccessControlMethod)
+def access_cache_method_changed(sender, instance, **kwargs):
+    refs = caching.method_refs(instance)
+    original = instance.__dict__.pop('_cache_original', None)
+    if original:
+        refs |= {(caching.GROUP, original[0]), (caching.RESOURCE, original[1])}
+    caching.invalidate(refs)
+
+
+@receiver(pre_save, sender=ProtectedResource)
+@receiver(pre_save, sender=Contact)
+def access_cache_remember_display(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk:
+        fields = CACHED_DISPLAY_FIELDS[sender]
+        instance._cache_original = sender._base_manager.filter(pk=instance.pk).values_list(*fields).first()
+
+
+@receiver(post_save, sender=ProtectedResource)
+def access_cache_resource_changed(sender, instance, created, **kwargs):
+    original = instance.__dict__.pop('_cache_original', None)
+    if original != tuple(getattr(instance, field) for field in CACHED_DISPLAY_FIELDS[sender]) and not created:
+        caching.invalidate(caching.resource_refs(instance))
+    else:
+        caching.invalidate({(caching.RESOURCE, instance.pk)})
+
+
+@receiver(post_save, sender=Contact)
+def access_cache_contact_changed(sender, instance, created, **kwargs):
+    original = instance.__dict__.pop('_cache_original', None)
+    if original != (instance.name,) and not created:
+        caching.invalidate(caching.contact_refs(instance))
+
+
+@receiver(post_save, sender=AzureGroup)
+def access_cache_group_changed(sender, instance, created, **kwargs):
+    if not created and instance.get_original_values().get('name') != instance.name:
+        caching.invalidate(caching.group_refs(instance))
+    else:
+        caching.invalidate({(caching.GROUP, instance.pk)})
+
+
+# Table versions for API ETags (see etags.py). A write bumps its own model and
+# every model whose API representation nests it. Bulk-recomputed and
+# append-only tables (similarities, role candidates, snapshots, grant events)
+# need none: their ETags change with their row IDs.
+
+VERSIONED_MODELS = (
+    AzureGroup, GroupMembership, GroupOwnership, ProtectedResource, AccessControlMethod, AccessGrant,
+    FortiGatePolicy, SyncRun,
+)
+
+
+@lru_cache(maxsize=None)
+def versioned_dependents(model):
+    models = {model} if model in VERSIONED_MODELS else set()
+    for versioned in VERSIONED_MODELS:
+        if any(field.related_model is model for field in versioned._meta.concrete_fields if field.is_relation):
+            models.add(versioned)
+    return frozenset(caching.model_ref(versioned) for versioned in models)
+
+
+def table_version_changed(sender, **kwargs):
+    caching.invalidate(versioned_dependents(sender))
+
+
+for _model in VERSIONED_MODELS + (Contact, Device):
+    post_save.connect(table_version_changed, sender=_model, dispatch_uid=f'table_version_save_{_model._meta.label}')
+    post_delete.connect(table_version_changed, sender=_model, dispatch_uid=f'table_version_delete_{_model._meta.label}')
+
+
+# Change feed (see change_feed.py)
+
+def change_feed_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        change_feed.record(instance, ChangeActionChoices.CREATED if created else ChangeActionChoices.UPDATED)
+
+
+def change_feed_deleted(sender, instance, **kwargs):
+    change_feed.record(instance, ChangeActionChoices.DELETED)
+
+
+for _model in change_feed.FEED_MODELS:
+    post_save.connect(change_feed_saved, sender=_model, dispatch_uid=f'change_feed_save_{_model._meta.label}')
+    post_delete.connect(change_feed_deleted, sender=_model, dispatch_uid=f'change_feed_delete_{_model._meta.label}')
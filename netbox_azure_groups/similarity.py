@@ -0,0 +1,182 @@
+"""
+Near-duplicate group detection with MinHash and LSH banding.
+
+Exact pairwise Jaccard over tens of thousands of groups is quadratic. Instead
+each group's member set is reduced to a fixed-length MinHash signature, the
+signatures are split into bands, and only groups sharing a band bucket become
+candidate pairs. Candidates are then checked with exact set intersection and
+the pairs at or above the threshold are stored as GroupSimilarity rows.
+
+Requires NumPy (``pip install netbox-azure-groups[analytics]``).
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import combinations
+
+from django.db import transaction
+from django.utils import timezone
+from netbox.plugins import get_plugin_config
+
+from .models import GroupMembership, GroupSimilarity
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Universal hash family h(x) = (a * x + b) mod p; with p < 2**31 the products fit in uint64
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Members hashed per step, bounding the permutations x members matrix
+HASH_CHUNK = 8192
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError('Group analytics require NumPy: pip install netbox-azure-groups[analytics]')
+
+
+@dataclass
+class SimilarityResult:
+    groups: int = 0
+    candidates: int = 0
+    pairs: int = 0
+    bands: int = 0
+    rows: int = 0
+
+
+def member_sets(min_members=1):
+    """
+    Member tokens per live group as sorted unique int arrays.
+
+    Contacts and devices share one token space (``2 * pk`` and ``2 * pk + 1``),
+    so a contact and a device with the same primary key never collide.
+    """
+    require_numpy()
+    tokens = defaultdict(list)
+    memberships = GroupMembership.objects.filter(group__is_deleted=False).values_list(
+        'group_id', 'contact_id', 'device_id'
+    )
+    for group_id, contact_id, device_id in memberships.iterator(chunk_size=10000):
+        tokens[group_id].append(contact_id * 2 if contact_id else device_id * 2 + 1)
+    return {
+        group_id: np.unique(np.array(members, dtype=np.int64))
+        for group_id, members in tokens.items()
+        if len(members) >= min_members
+    }
+
+
+class MinHasher:
+    """MinHash signatures of ``num_perm`` permutations, reproducible for a given seed."""
+
+    def __init__(self, num_perm=128, seed=1):
+        require_numpy()
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, members):
+        values = (members.astype(np.uint64) % np.uint64(MERSENNE_PRIME))[None, :]
+        signature = np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        for start in range(0, values.shape[1], HASH_CHUNK):
+            chunk = values[:, start:start + HASH_CHUNK]
+            hashed = (self.a * chunk + self.b) % np.uint64(MERSENNE_PRIME)
+            np.minimum(signature, hashed.min(axis=1), out=signature)
+        return signature
+
+
+def choose_bands(num_perm, threshold):
+    """
+    Pick (bands, rows) with bands * rows == num_perm.
+
+    A pair with similarity s becomes a candidate with probability
+    ``1 - (1 - s**rows)**bands``, whose steep part sits near
+    ``(1 / bands) ** (1 / rows)``. Take the most selective split whose knee is
+    still comfortably below the threshold, so true pairs are rarely missed.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold * 0.92:
+            best = (bands, rows)
+    return best
+
+
+def candidate_pairs(signatures, bands, rows):
+    """Group ID pairs sharing at least one band bucket."""
+    pairs = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for group_id, signature in signatures.items():
+            buckets[signature[band * rows:(band + 1) * rows].tobytes()].append(group_id)
+        for members in buckets.values():
+            if len(members) > 1:
+                pairs.update(combinations(sorted(members), 2))
+    return pairs
+
+
+def exact_jaccard(a, b):
+    shared = np.intersect1d(a, b, assume_unique=True).size
+    total = a.size + b.size - shared
+    return (shared / total if total else 0.0), shared, total
+
+
+def find_similar_groups(threshold=None, num_perm=None, min_members=None, seed=1):
+    """Compute near-duplicate group pairs. Returns ``(result, [(group_a, group_b, jaccard, shared, total)])``."""
+    require_numpy()
+    if threshold is None:
+        threshold = get_plugin_config('netbox_azure_groups', 'similarity_threshold')
+    if num_perm is None:
+        num_perm = get_plugin_config('netbox_azure_groups', 'similarity_permutations')
+    if min_members is None:
+        min_members = get_plugin_config('netbox_azure_groups', 'similarity_min_members')
+
+    sets = member_sets(min_members)
+    hasher = MinHasher(num_perm, seed)
+    signatures = {group_id: hasher.signature(members) for group_id, members in sets.items()}
+    bands, rows = choose_bands(num_perm, threshold)
+    candidates = candidate_pairs(signatures, bands, rows)
+
+    matches = []
+    for a, b in candidates:
+        small, large = sorted((sets[a].size, sets[b].size))
+        # Jaccard can never exceed the size ratio
+        if small / large < threshold:
+            continue
+        jaccard, shared, total = exact_jaccard(sets[a], sets[b])
+        if jaccard >= threshold:
+            matches.append((a, b, jaccard, shared, total))
+
+    result = SimilarityResult(
+        groups=len(sets), candidates=len(candidates), pairs=len(matches), bands=bands, rows=rows
+    )
+    return result, matches
+
+
+def refresh_group_similarity(threshold=None, num_perm=None, min_members=None, seed=1):
+    """Recompute near-duplicate pairs and replace the stored GroupSimilarity rows."""
+    result, matches = find_similar_groups(threshold, num_perm, min_members, seed)
+    now = timezone.now()
+    with transaction.atomic():
+        GroupSimilarity.objects.all().delete()
+        GroupSimilarity.objects.bulk_create(
+            [
+                GroupSimilarity(
+                    group_a_id=a, group_b_id=b, jaccard=jaccard, shared_members=shared, total_members=total,
+                    computed=now,
+                )
+                for a, b, jaccard, shared, total in matches
+            ],
+            batch_size=1000,
+        )
+    logger.info(
+        f'Group similarity: {result.groups} groups, {result.candidates} candidate pairs '
+        f'({result.bands} bands x {result.rows} rows), {result.pairs} pairs stored'
+    )
+    return result
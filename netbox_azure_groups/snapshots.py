@@ -0,0 +1,332 @@
+"""
+Point-in-time access history.
+
+take_snapshot() records the day's active AccessGrants. Each grant is reduced to
+an integer key, ``contact_id << 3 | access level code``, and each resource's
+keys are stored as one sorted array: gaps between neighbours as little-endian
+uint64, zlib-compressed. Gaps between neighbouring contact IDs are small, so a
+resource's grants typically cost about a byte each.
+
+Every snapshot stores the keys added and removed per resource since the
+previous snapshot. Every ``snapshot_baseline_interval_days`` a baseline also
+stores the full sets. Reconstructing a date reads the nearest earlier baseline
+plus the deltas up to that date, optionally for a single resource; diffing two
+dates merges only the deltas in between (see access_diff()).
+"""
+import heapq
+import logging
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from netbox.plugins import get_plugin_config
+
+from .models import AccessGrant, AccessSnapshot, AccessSnapshotSegment
+
+logger = logging.getLogger(__name__)
+
+# Stable codes for grant keys; never renumber, only append
+LEVEL_CODES = {
+    'read': 0,
+    'write': 1,
+    'admin': 2,
+    'full': 3,
+    'physical': 4,
+}
+OTHER_LEVEL = 7
+LEVEL_NAMES = {code: level for level, code in LEVEL_CODES.items()}
+LEVEL_BITS = 3
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+# Grant keys
+
+def grant_key(contact_id, access_level):
+    return contact_id << LEVEL_BITS | LEVEL_CODES.get(access_level, OTHER_LEVEL)
+
+
+def split_key(key):
+    """(contact_id, access level) for a grant key."""
+    return key >> LEVEL_BITS, LEVEL_NAMES.get(key & ((1 << LEVEL_BITS) - 1), 'other')
+
+
+def encode_keys(keys):
+    """Compress a sorted sequence of unique non-negative ints."""
+    if not keys:
+        return b''
+    gaps = array('Q', [keys[0]])
+    gaps.extend(b - a for a, b in zip(keys, keys[1:]))
+    if sys.byteorder == 'big':
+        gaps.byteswap()
+    return zlib.compress(gaps.tobytes())
+
+
+def decode_keys(data):
+    """Inverse of encode_keys(); returns a sorted list."""
+    if not data:
+        return []
+    gaps = array('Q')
+    gaps.frombytes(zlib.decompress(bytes(data)))
+    if sys.byteorder == 'big':
+        gaps.byteswap()
+    keys = []
+    total = 0
+    for gap in gaps:
+        total += gap
+        keys.append(total)
+    return keys
+
+
+# Snapshots
+
+@dataclass
+class SnapshotResult:
+    snapshot: AccessSnapshot
+    segments: int = 0
+
+
+def current_grants():
+    """Active grants right now as {resource_id: set of grant keys}."""
+    grants = {}
+    rows = AccessGrant.objects.filter(is_active=True).values_list('resource_id', 'contact_id', 'access_level')
+    for resource_id, contact_id, access_level in rows.iterator(chunk_size=10000):
+        grants.setdefault(resource_id, set()).add(grant_key(contact_id, access_level))
+    return grants
+
+
+def snapshot_chain(date):
+    """The baseline at or before ``date`` followed by the deltas up to ``date``, oldest first."""
+    baseline = AccessSnapshot.objects.filter(date__lte=date, is_baseline=True).order_by('-date').first()
+    if baseline is None:
+        return []
+    return list(AccessSnapshot.objects.filter(date__gte=baseline.date, date__lte=date).order_by('date'))
+
+
+def replay(chain, resource_ids=None):
+    """Apply the segments of a snapshot chain. Returns {resource_id: set of grant keys}."""
+    segments = AccessSnapshotSegment.objects.filter(snapshot__in=chain)
+    if resource_ids is not None:
+        segments = segments.filter(resource_id__in=resource_ids)
+    baseline = chain[0].pk if chain else None
+
+    grants = {}
+    for snapshot_id, resource_id, added, removed, full in segments.order_by('snapshot__date').values_list(
+        'snapshot_id', 'resource_id', 'added', 'removed', 'full'
+    ).iterator(chunk_size=500):
+        if snapshot_id == baseline:
+            grants[resource_id] = set(decode_keys(full))
+            continue
+        keys = grants.setdefault(resource_id, set())
+        keys.difference_update(decode_keys(removed))
+        keys.update(decode_keys(added))
+    return {resource_id: keys for resource_id, keys in grants.items() if keys}
+
+
+def grants_on(date, resource_ids=None):
+    """
+    Reconstruct the grant set on ``date`` from the latest snapshot at or before it.
+
+    Returns ``(snapshot, {resource_id: set of grant keys})``; ``snapshot`` is
+    None when no snapshot that old exists.
+    """
+    chain = snapshot_chain(date)
+    if not chain:
+        return None, {}
+    return chain[-1], replay(chain, resource_ids)
+
+
+def take_snapshot(date=None, baseline=None):
+    """
+    Record the current grant set as the snapshot for ``date`` (default today).
+
+    Re-running on the latest snapshot's date replaces it. ``baseline`` forces
+    (True) or suppresses (False) storing full sets; by default they are stored
+    when the last baseline is ``snapshot_baseline_interval_days`` old.
+    """
+    date = date or timezone.localdate()
+    latest = AccessSnapshot.objects.order_by('-date').first()
+    if latest is not None and latest.date > date:
+        raise SnapshotError(f'A snapshot for {latest.date} already exists; snapshots must be taken in date order')
+
+    current = current_grants()
+
+    with transaction.atomic():
+        if latest is not None and latest.date == date:
+            latest.delete()
+            latest = AccessSnapshot.objects.order_by('-date').first()
+
+        if baseline is None:
+            interval = get_plugin_config('netbox_azure_groups', 'snapshot_baseline_interval_days')
+            last_baseline = AccessSnapshot.objects.filter(is_baseline=True).order_by('-date').first()
+            baseline = last_baseline is None or date - last_baseline.date >= timedelta(days=interval)
+        if latest is None:
+            baseline = True
+
+        snapshot = AccessSnapshot(date=date, is_baseline=baseline)
+        _, previous = grants_on(latest.date) if latest is not None else (None, {})
+        segments = []
+        for resource_id in current.keys() | previous.keys():
+            now, before = current.get(resource_id, set()), previous.get(resource_id, set())
+            added, removed = sorted(now - before), sorted(before - now)
+            if not (added or removed or baseline and now):
+                continue
+            segments.append(AccessSnapshotSegment(
+                resource_id=resource_id, added=encode_keys(added), removed=encode_keys(removed),
+                full=encode_keys(sorted(now)) if baseline else b'', grant_count=len(now),
+            ))
+            snapshot.added_count += len(added)
+            snapshot.removed_count += len(removed)
+
+        snapshot.grant_count = sum(len(keys) for keys in current.values())
+        snapshot.resource_count = len(current)
+        snapshot.size_bytes = sum(
+            len(segment.added) + len(segment.removed) + len(segment.full) for segment in segments
+        )
+        snapshot.save()
+        for segment in segments:
+            segment.snapshot = snapshot
+        AccessSnapshotSegment.objects.bulk_create(segments, batch_size=500)
+
+    logger.info(
+        f"Access snapshot {snapshot}: {snapshot.grant_count} grants on {snapshot.resource_count} resources, "
+        f"+{snapshot.added_count}/-{snapshot.removed_count}, {snapshot.size_bytes} bytes"
+    )
+    return SnapshotResult(snapshot=snapshot, segments=len(segments))
+
+
+# Diffs
+
+GRANTED = 'granted'
+REVOKED = 'revoked'
+LEVEL_CHANGED = 'level_changed'
+
+
+def snapshot_on(date):
+    """The latest snapshot at or before ``date``."""
+    return AccessSnapshot.objects.filter(date__lte=date).order_by('-date').first()
+
+
+def _stream(keys, order, added):
+    for key in keys:
+        yield key, order, added
+
+
+def net_changes(segments):
+    """
+    Merge one resource's delta segments, oldest first, into net key changes.
+
+    Each segment's added and removed arrays are sorted, so a k-way merge visits
+    every key's events in key then date order. A key's first event tells whether
+    it was present before the range (a removal means it was), its last event
+    whether it is present after. Yields ``(key, added, date)`` for keys whose
+    presence differs, ``date`` being the key's last change.
+    """
+    streams = []
+    dates = []
+    for order, (date, added, removed) in enumerate(segments):
+        dates.append(date)
+        streams.append(_stream(decode_keys(added), order, True))
+        streams.append(_stream(decode_keys(removed), order, False))
+
+    current = first = last = None
+    for key, order, added in heapq.merge(*streams):
+        if key != current:
+            if current is not None and (not first) != last[1]:
+                yield current, last[1], dates[last[0]]
+            current, first = key, added
+        last = (order, added)
+    if current is not None and (not first) != last[1]:
+        yield current, last[1], dates[last[0]]
+
+
+def access_diff(start, end, resource_ids=None, contact_ids=None):
+    """
+    Grants that differ between the snapshots in effect on ``start`` and ``end``.
+
+    Only the deltas in between are read, one resource at a time, so the result
+    can be streamed. Returns ``(start snapshot, end snapshot, changes)`` where
+    ``changes`` yields dicts per resource and contact: ``granted``, ``revoked`` or
+    ``level_changed`` with the levels held before and after. ``start snapshot``
+    is None when ``start`` predates all snapshots (everything counts as granted).
+    """
+    before, after = snapshot_on(start), snapshot_on(end)
+    if after is None or (before is not None and before.date >= after.date):
+        return before, after, iter(())
+
+    segments = AccessSnapshotSegment.objects.filter(snapshot__date__lte=after.date)
+    if before is not None:
+        segments = segments.filter(snapshot__date__gt=before.date)
+    if resource_ids is not None:
+        segments = segments.filter(resource_id__in=resource_ids)
+    rows = segments.order_by('resource_id', 'snapshot__date').values_list(
+        'resource_id', 'snapshot__date', 'added', 'removed'
+    ).iterator(chunk_size=500)
+    contact_ids = set(contact_ids) if contact_ids is not None else None
+
+    def changes():
+        for resource_id, resource_rows in groupby(rows, key=itemgetter(0)):
+            keyed = (
+                (key, added, date) for key, added, date in net_changes(row[1:] for row in resource_rows)
+                if contact_ids is None or key >> LEVEL_BITS in contact_ids
+            )
+            for contact_id, contact_changes in groupby(keyed, key=lambda change: change[0] >> LEVEL_BITS):
+                yield _contact_change(resource_id, contact_id, list(contact_changes))
+
+    return before, after, changes()
+
+
+def _contact_change(resource_id, contact_id, changes):
+    old_levels = [split_key(key)[1] for key, added, _ in changes if not added]
+    new_levels = [split_key(key)[1] for key, added, _ in changes if added]
+    if not old_levels:
+        change = GRANTED
+    elif not new_levels:
+        change = REVOKED
+    else:
+        change = LEVEL_CHANGED
+    return {
+        'resource': resource_id,
+        'contact': contact_id,
+        'change': change,
+        'old_levels': old_levels,
+        'new_levels': new_levels,
+        'date': max(date for _, _, date in changes),
+    }
+
+
+def diff_contacts(contact_ids=None, azure_group=None, business_unit=None, user=None):
+    """
+    Contact IDs a diff is restricted to, or None for all.
+
+    ``azure_group`` keeps the group's current effective members and
+    ``business_unit`` contacts whose ``user.department`` currently matches.
+    Given a ``user``, only contacts they may view are kept.
+    """
+    from tenancy.models import Contact
+
+    from .access_graph import effective_contacts, effective_groups
+    from .rules import field_path
+
+    visible = Contact.objects.restrict(user, 'view') if user is not None else Contact.objects.all()
+    contacts = None
+    if contact_ids:
+        contacts = visible.filter(pk__in=contact_ids)
+    if azure_group is not None:
+        members = effective_contacts(effective_groups(azure_group))
+        contacts = (contacts if contacts is not None else visible).filter(pk__in=members.values('pk'))
+    if business_unit:
+        unit = Q(**{field_path('user', 'department'): business_unit})
+        contacts = (contacts if contacts is not None else visible).filter(unit)
+    if contacts is None:
+        return None
+    return set(contacts.values_list('pk', flat=True))
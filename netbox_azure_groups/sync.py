@@ -0,0 +1,400 @@
+"""
+Bulk sync paths shared by the REST API and sync engines.
+
+Every path runs inside sync_run(), which records a SyncRun ledger entry with
+timings, row counters and errors.
+
+Most sync writes are no-ops. Each path compares a content hash of the incoming
+record with the one stored on the row; unchanged rows only get their
+``last_sync``/``last_fetched`` timestamp bumped in a single UPDATE, and full
+saves are reserved for real changes. Those saves are change-logged as one
+summary per model per run (see changelog.py) rather than one entry per row.
+"""
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.utils import timezone
+from netbox.plugins import get_plugin_config
+
+from .access_graph import deferred_changes
+from .caching import deferred_invalidation, invalidate, model_ref
+from .change_feed import batched_entries
+from .changelog import coalesced_changelog
+from .models import AzureGroup, FortiGatePolicy, GroupMembership, SyncRun, SyncSourceChoices, SyncStatusChoices
+from .outbox import CREATED, DELETED, UPDATED, membership_event, write_events
+from .utils import fields_digest
+
+logger = logging.getLogger(__name__)
+
+# Fields a directory sync is allowed to write on AzureGroup
+GROUP_SYNC_FIELDS = AzureGroup.SYNC_FIELDS
+
+# Member attributes covered by AzureGroup.membership_hash
+MEMBER_HASH_FIELDS = ('members',)
+
+# Payload keys an unchanged FortiGate policy may carry and still skip saving
+HASHED_POLICY_FIELDS = frozenset(FortiGatePolicy.SYNC_FIELDS)
+
+# Runs that sync Azure groups and their members; sync-status reports on these only
+GROUP_SYNC_SOURCES = (SyncSourceChoices.GRAPH, SyncSourceChoices.ON_PREMISES)
+GROUP_SYNC_OPERATIONS = ('groups', 'memberships', 'graph_delta')
+
+_hash_clears = ContextVar('membership_hash_clears', default=None)
+
+
+def clear_membership_hash(group_id):
+    """Force the next sync of a group to reconcile its members, batched inside deferred_hash_clears()."""
+    pending = _hash_clears.get()
+    if pending is not None:
+        pending.add(group_id)
+        return
+    AzureGroup.all_objects.filter(pk=group_id).exclude(membership_hash='').update(membership_hash='')
+
+
+@contextmanager
+def deferred_hash_clears():
+    """
+    Collect the membership hash clears of a bulk write and issue them as one
+    UPDATE at the end. Yields the pending group IDs; discard a group that the
+    block re-hashes itself.
+    """
+    pending = _hash_clears.get()
+    if pending is not None:
+        yield pending
+        return
+    pending = set()
+    token = _hash_clears.set(pending)
+    try:
+        yield pending
+    finally:
+        _hash_clears.reset(token)
+        if pending:
+            AzureGroup.all_objects.filter(pk__in=pending).exclude(membership_hash='').update(membership_hash='')
+
+
+@contextmanager
+def sync_run(source, operation, source_host=''):
+    """
+    Record a SyncRun around a block of sync work.
+
+    The run row is committed before the work starts so a crashed sync still
+    leaves a ``running``/``failed`` entry behind. Writes inside the block are
+    change-logged in coalesced form; record them on ``run.changelog``. Access
+    graph and cache invalidations, and membership hash clears, are published
+    as one batch at the end.
+    """
+    run = SyncRun.objects.create(source=source, operation=operation, source_host=source_host[:200])
+    try:
+        with deferred_changes(), deferred_invalidation(), deferred_hash_clears(), \
+                coalesced_changelog(run) as changelog:
+            run.changelog = changelog
+            yield run
+    except Exception as e:
+        run.add_error(e)
+        run.finish(SyncStatusChoices.FAILED)
+        raise
+    run.finish()
+    logger.info(
+        f"Sync run {run.pk} ({run.source}/{run.operation}) finished in {run.duration:.1f}s: "
+        f"{run.rows_created} created, {run.rows_updated} updated, {run.rows_unchanged} unchanged, "
+        f"{run.rows_deleted} deleted, {run.error_count} errors"
+    )
+
+
+def touch(model, pks, field_name):
+    """Bump a sync timestamp on unchanged rows with one UPDATE, bypassing save() and its side effects."""
+    if pks:
+        model._base_manager.filter(pk__in=pks).update(**{field_name: timezone.now()})
+        invalidate({model_ref(model)})
+
+
+def upsert_groups(run, records, complete=False, seen_object_ids=None):
+    """
+    Create or update AzureGroups keyed by ``object_id``.
+
+    ``records`` are validated dicts limited to GROUP_SYNC_FIELDS. Existing rows
+    are fetched in one query, and the on-premises read-only rule is checked for
+    the whole batch against that prefetch; only an on-premises sync may change
+    groups mastered on-premises. With ``complete=True`` the payload is treated
+    as the full group list for the sources it contains, and live groups of
+    those sources that are missing from it are soft-deleted. ``seen_object_ids``
+    lets the caller include records that failed validation so they are not swept.
+    An ``object_id`` repeated within ``records`` is an error; its first record
+    is applied.
+    """
+    unique = {}
+    for record in records:
+        if record['object_id'] in unique:
+            run.add_error(f"{record['object_id']}: repeated in the payload; only the first record was applied")
+        else:
+            unique[record['object_id']] = record
+    records = list(unique.values())
+    object_ids = set(unique)
+    # Include soft-deleted groups so a reappearing group is resurrected, not duplicated
+    existing = AzureGroup.all_objects.in_bulk(object_ids, field_name='object_id')
+    sources = set()
+    pending = []
+    unchanged = []
+
+    for record in records:
+        sources.add(record.get('source', AzureGroup._meta.get_field('source').default))
+        group = existing.get(record['object_id'])
+        if group is None:
+            group = AzureGroup(**record)
+            group.save()
+            run.changelog.created(group)
+            run.rows_created += 1
+            continue
+
+        merged = {name: record.get(name, getattr(group, name)) for name in GROUP_SYNC_FIELDS}
+        if fields_digest(merged, GROUP_SYNC_FIELDS) == group.content_hash and not group.is_deleted:
+            unchanged.append(group.pk)
+            continue
+
+        diff = {name: (getattr(group, name), value) for name, value in record.items() if getattr(group, name) != value}
+        if group.is_deleted:
+            diff['is_deleted'] = (True, False)
+        for name, value in record.items():
+            setattr(group, name, value)
+        group.is_deleted = False
+        pending.append((group, diff))
+
+    violations = {}
+    if run.source != SyncSourceChoices.ON_PREMISES and \
+            get_plugin_config('netbox_azure_groups', 'enforce_source_restrictions'):
+        violations = AzureGroup.check_source_restrictions([group for group, diff in pending])
+
+    for group, diff in pending:
+        if group.pk in violations:
+            run.add_error(f'{group.object_id}: {violations[group.pk]}')
+            continue
+        group.save()
+        run.changelog.updated(group, diff)
+        run.rows_updated += 1
+
+    touch(AzureGroup, unchanged, 'last_sync')
+    run.rows_unchanged += len(unchanged)
+
+    if complete and sources:
+        keep = object_ids | set(seen_object_ids or ())
+        soft_delete_groups(run, AzureGroup.objects.filter(source__in=sources).exclude(object_id__in=keep))
+
+
+def soft_delete_groups(run, queryset):
+    """Soft-delete the live groups in ``queryset`` with one UPDATE."""
+    missing = dict(queryset.filter(is_deleted=False).values_list('pk', 'name'))
+    if not missing:
+        return
+    now = timezone.now()
+    run.rows_deleted += AzureGroup.objects.filter(pk__in=missing).update(
+        is_deleted=True, deleted_at=now, last_updated=now
+    )
+    invalidate({model_ref(AzureGroup)})
+    for pk, name in missing.items():
+        run.changelog.deleted(AzureGroup, pk, name)
+
+
+def _member_key(contact_id, device_id):
+    return ('contact', contact_id) if contact_id else ('device', device_id)
+
+
+def _member_label(group, key):
+    # Cheap changelog label; str(GroupMembership) would fetch the member
+    return f'{group.name}: {key[0]} {key[1]}'
+
+
+def membership_digest(members):
+    """Order-independent digest of a group's desired member set."""
+    canonical = sorted(
+        (_member_key(m.get('contact'), m.get('device')), m.get('membership_type', 'direct'), m.get('nested_via') or [])
+        for m in members
+    )
+    return fields_digest({'members': canonical}, MEMBER_HASH_FIELDS)
+
+
+def reconcile_memberships(run, group_members):
+    """
+    Make each group's memberships match the given member lists.
+
+    ``group_members`` maps an AzureGroup to a list of member dicts with
+    ``contact`` or ``device`` (primary keys), ``membership_type`` and
+    ``nested_via``. Groups whose member set hashes to the stored
+    ``membership_hash`` are skipped without reading their memberships. Current
+    memberships for the remaining groups are read in one query; each group is
+    then reconciled in its own short transaction, together with its outbox
+    events.
+    """
+    from dcim.models import Device
+    from tenancy.models import Contact
+
+    # Resolve member references up front so bad IDs become errors, not IntegrityErrors
+    contact_ids = {m['contact'] for members in group_members.values() for m in members if m.get('contact')}
+    device_ids = {m['device'] for members in group_members.values() for m in members if m.get('device')}
+    known_contacts = set(Contact.objects.filter(pk__in=contact_ids).values_list('pk', flat=True))
+    known_devices = set(Device.objects.filter(pk__in=device_ids).values_list('pk', flat=True))
+
+    changed_groups = {}
+    for group, members in group_members.items():
+        desired = {}
+        for member in members:
+            contact_id, device_id = member.get('contact'), member.get('device')
+            if contact_id and contact_id not in known_contacts:
+                run.add_error(f'{group.object_id}: unknown contact {contact_id}')
+                continue
+            if device_id and device_id not in known_devices:
+                run.add_error(f'{group.object_id}: unknown device {device_id}')
+                continue
+            desired[_member_key(contact_id, device_id)] = member
+
+        digest = membership_digest(desired.values())
+        if digest == group.membership_hash:
+            run.rows_unchanged += len(desired)
+        else:
+            changed_groups[group] = (desired, digest)
+
+    current = defaultdict(dict)
+    for membership in GroupMembership.objects.filter(group__in=list(changed_groups)):
+        current[membership.group_id][_member_key(membership.contact_id, membership.device_id)] = membership
+
+    for group, (desired, digest) in changed_groups.items():
+        existing = current.get(group.pk, {})
+        events = []
+        with transaction.atomic(), batched_entries(), deferred_hash_clears() as cleared:
+            for key, member in desired.items():
+                membership_type = member.get('membership_type', 'direct')
+                nested_via = member.get('nested_via')
+                membership = existing.get(key)
+                label = _member_label(group, key)
+                if membership is None:
+                    membership = GroupMembership(
+                        group=group,
+                        contact_id=member.get('contact'),
+                        device_id=member.get('device'),
+                        membership_type=membership_type,
+                        nested_via=nested_via,
+                    )
+                    membership.save()
+                    run.changelog.created(membership, label)
+                    events.append(membership_event(membership, CREATED, group))
+                    run.rows_created += 1
+                elif (membership.membership_type, membership.nested_via) != (membership_type, nested_via):
+                    diff = {
+                        'membership_type': (membership.membership_type, membership_type),
+                        'nested_via': (membership.nested_via, nested_via),
+                    }
+                    membership.membership_type = membership_type
+                    membership.nested_via = nested_via
+                    membership.save()
+                    run.changelog.updated(membership, diff, label)
+                    events.append(membership_event(membership, UPDATED, group))
+                    run.rows_updated += 1
+                else:
+                    run.rows_unchanged += 1
+
+            stale = {membership.pk: key for key, membership in existing.items() if key not in desired}
+            if stale:
+                GroupMembership.objects.filter(pk__in=stale).delete()
+                run.rows_deleted += len(stale)
+                for pk, key in stale.items():
+                    run.changelog.deleted(GroupMembership, pk, _member_label(group, key))
+                    events.append(membership_event(existing[key], DELETED, group))
+            write_events(events)
+
+            # The member set now matches the digest; drop the clear queued by the writes above
+            cleared.discard(group.pk)
+            updates = {'membership_hash': digest}
+            if get_plugin_config('netbox_azure_groups', 'auto_calculate_counts'):
+                updates['member_count'] = len(desired)
+            AzureGroup.all_objects.filter(pk=group.pk).update(**updates)
+            invalidate({model_ref(AzureGroup)})
+            group.membership_hash = digest
+
+
+def policy_key(policy_data):
+    """
+    Return the (fortigate_host, vdom, policy_id) key of a policy record in the
+    stored types, or None when the policy_id is not an integer.
+    """
+    try:
+        policy_id = int(policy_data.get('policy_id'))
+    except (TypeError, ValueError):
+        return None
+    return str(policy_data.get('fortigate_host')), str(policy_data.get('vdom', 'root')), policy_id
+
+
+def import_fortigate_policies(run, policies, get_serializer):
+    """
+    Upsert FortiGate policies keyed by (fortigate_host, vdom, policy_id).
+
+    Existing policies are fetched in one query. Incoming records carrying only
+    hashed fields (FortiGatePolicy.SYNC_FIELDS) whose content hash matches the
+    stored one skip validation and saving entirely and only have
+    ``last_fetched`` bumped; the rest go through ``get_serializer`` (the
+    viewset's serializer factory) for full validation.
+
+    Returns every error message; ``run.errors`` keeps only the first
+    SyncRun.MAX_STORED_ERRORS.
+    """
+    errors = []
+
+    def error(message):
+        errors.append(message)
+        run.add_error(message)
+
+    valid = [p for p in policies if isinstance(p, dict)]
+    for policy_data in policies:
+        if not isinstance(policy_data, dict):
+            error(f'Invalid policy record: {policy_data!r}')
+
+    keys = {policy_key(p) for p in valid} - {None}
+    existing = {
+        (policy.fortigate_host, policy.vdom, policy.policy_id): policy
+        for policy in FortiGatePolicy.objects.filter(
+            fortigate_host__in={k[0] for k in keys}, policy_id__in={k[2] for k in keys}
+        )
+    }
+
+    unchanged = []
+    for policy_data in valid:
+        policy_id = policy_data.get('policy_id')
+        try:
+            # Records without a usable key go to the serializer, which reports why
+            key = policy_key(policy_data)
+            policy = existing.get(key)
+            # Fields outside the hash (tags, custom fields, ...) can only be compared by saving
+            if policy is not None and policy_data.keys() <= HASHED_POLICY_FIELDS:
+                merged = {name: policy_data.get(name, getattr(policy, name)) for name in FortiGatePolicy.SYNC_FIELDS}
+                if fields_digest(merged, FortiGatePolicy.SYNC_FIELDS) == policy.content_hash:
+                    unchanged.append(policy.pk)
+                    continue
+            if policy is not None:
+                before = {name: getattr(policy, name) for name in FortiGatePolicy.SYNC_FIELDS}
+                serializer = get_serializer(policy, data=policy_data, partial=True)
+            else:
+                serializer = get_serializer(data=policy_data)
+
+            if serializer.is_valid():
+                saved = serializer.save()
+                # A key repeated later in the payload updates this row instead of colliding with it
+                existing[key] = saved
+                if policy is None:
+                    run.changelog.created(saved)
+                    run.rows_created += 1
+                else:
+                    diff = {
+                        name: (old, getattr(saved, name)) for name, old in before.items()
+                        if getattr(saved, name) != old
+                    }
+                    run.changelog.updated(saved, diff)
+                    run.rows_updated += 1
+            else:
+                error(f"Policy {policy_id}: {serializer.errors}")
+        except Exception as e:
+            error(f"Policy {policy_id or 'unknown'}: {str(e)}")
+
+    touch(FortiGatePolicy, unchanged, 'last_fetched')
+    run.rows_unchanged += len(unchanged)
+    return errors
@@ -1,6 +1,6 @@
 import django_tables2 as tables
 from netbox.tables import BaseTable, ChoiceFieldColumn
-from .models import AzureGroup, ProtectedResource
+from .models import AzureGroup, GroupSimilarity, ProtectedResource, RoleCandidate
 
 
 class AzureGroupTable(BaseTable):
@@ -53,4 +53,42 @@ class ProtectedResourceTable(BaseTable):
         default_columns = (
             'id', 'name', 'resource_type', 'environment', 'criticality', 
             'is_active', 'access_method_count', 'grant_count'
-        )
\ No newline at end of file
+        )
+
+
+class GroupSimilarityTable(BaseTable):
+    group_a = tables.Column(verbose_name='Group', linkify=True)
+    group_b = tables.Column(verbose_name='Similar Group', linkify=True)
+    percent = tables.Column(verbose_name='Similarity (%)', accessor='percent', order_by=('jaccard',))
+    shared_members = tables.Column(verbose_name='Shared')
+    total_members = tables.Column(verbose_name='Total')
+    computed = tables.DateTimeColumn(verbose_name='Computed')
+
+    class Meta(BaseTable.Meta):
+        model = GroupSimilarity
+        fields = ('id', 'group_a', 'group_b', 'percent', 'shared_members', 'total_members', 'computed')
+        default_columns = ('group_a', 'group_b', 'percent', 'shared_members', 'total_members')
+        exclude = ('pk',)
+
+
+class RoleCandidateTable(BaseTable):
+    name = tables.Column(verbose_name='Role')
+    member_count = tables.Column(verbose_name='Contacts')
+    permission_count = tables.Column(verbose_name='Permissions')
+    cohesion = tables.TemplateColumn(template_code='{{ value|floatformat:2 }}', verbose_name='Cohesion')
+    closest_group = tables.Column(verbose_name='Closest Group', linkify=True)
+    closest_group_jaccard = tables.TemplateColumn(
+        template_code='{{ value|floatformat:2 }}', verbose_name='Group Match'
+    )
+    computed = tables.DateTimeColumn(verbose_name='Computed')
+
+    class Meta(BaseTable.Meta):
+        model = RoleCandidate
+        fields = (
+            'id', 'name', 'member_count', 'permission_count', 'cohesion', 'closest_group',
+            'closest_group_jaccard', 'computed'
+        )
+        default_columns = (
+            'name', 'member_count', 'permission_count', 'cohesion', 'closest_group', 'closest_group_jaccard'
+        )
+        exclude = ('pk',)
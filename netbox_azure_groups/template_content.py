@@ -1,5 +1,6 @@
 import logging
 from netbox.plugins import PluginTemplateExtension
+from .metrics import instrumented
 # Temporarily disabled during refactoring
 # from .models import ContactGroupMembership, ContactGroupOwnership, DeviceGroupMembership
 
@@ -9,6 +10,7 @@ logger = logging.getLogger(__name__)
 class ContactAzureGroupsExtension(PluginTemplateExtension):
     model = 'tenancy.contact'
 
+    @instrumented('template', 'contact_groups')
     def full_width_page(self):
         contact = self.context['object']
         
@@ -38,6 +40,7 @@ class ContactAzureGroupsExtension(PluginTemplateExtension):
 class DeviceAzureGroupsExtension(PluginTemplateExtension):
     model = 'dcim.device'
 
+    @instrumented('template', 'device_groups')
     def full_width_page(self):
         device = self.context['object']
         
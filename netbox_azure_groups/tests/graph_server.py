@@ -0,0 +1,93 @@
+"""Stand-in Microsoft Graph for the Graph sync tests."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class MockGraphServer:
+    """
+    Stand-in for Microsoft Graph and its token endpoint on localhost.
+
+    Serves recorded pages keyed by path plus any ``$skiptoken`` or
+    ``$deltatoken`` (e.g. ``/v1.0/groups/delta?$deltatoken=abc``); ``{base}``
+    in a page is replaced by the server's URL, so recorded next and delta links
+    lead back to it; an unrecorded delta token answers 410 like an expired
+    one. ``fail(n, status, retry_after)`` makes the next ``n``
+    Graph requests fail, and ``requests`` logs the keys requested.
+
+        with MockGraphServer.from_file('fixtures/graph_delta.json') as graph:
+            sync_tenant(tenant, api_url=graph.api_url, login_url=graph.url)
+    """
+
+    def __init__(self, pages, host='127.0.0.1', port=0):
+        self.requests = []
+        self._failures = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                key = url.path
+                for name in ('$skiptoken', '$deltatoken'):
+                    if name in query:
+                        key = f'{url.path}?{name}={query[name][0]}'
+                with server._lock:
+                    server.requests.append(key)
+                    failure = server._failures.pop(0) if server._failures else None
+                if failure:
+                    status, retry_after = failure
+                    headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+                    return self.respond(status, {'error': {'code': 'TooManyRequests'}}, headers)
+                if key not in server.pages and '$deltatoken' in query:
+                    # Graph's answer to a delta token it no longer knows
+                    return self.respond(410, {'error': {'code': 'SyncStateNotFound', 'message': key}})
+                if key not in server.pages:
+                    return self.respond(404, {'error': {'code': 'Request_ResourceNotFound', 'message': key}})
+                self.respond(200, server.pages[key])
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self.respond(200, {'token_type': 'Bearer', 'expires_in': 3600, 'access_token': 'mock-token'})
+
+            def respond(self, status, data, headers=None):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://{host}:{self.server.server_address[1]}'
+        self.api_url = f'{self.url}/v1.0'
+        self.pages = json.loads(json.dumps(pages).replace('{base}', self.url))
+        self._thread = None
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path) as f:
+            return cls(json.load(f), **kwargs)
+
+    def fail(self, count=1, status=429, retry_after=None):
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,64 @@
+"""Stand-in outbox consumer for the dispatch tests."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LocalReceiver:
+    """
+    Stand-in HTTP consumer on localhost.
+
+    Collects the JSON batches it receives in ``batches`` (raw request bodies
+    and headers in ``bodies`` and ``headers``). ``fail(n)`` makes the next
+    ``n`` requests answer 503.
+
+        with LocalReceiver() as receiver:
+            dispatch(endpoints=[{'url': receiver.url}])
+            receiver.batches
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.batches = []
+        self.bodies = []
+        self.headers = []
+        self._failures = 0
+        self._lock = threading.Lock()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with receiver._lock:
+                    failing = receiver._failures > 0
+                    if failing:
+                        receiver._failures -= 1
+                    else:
+                        receiver.batches.append(json.loads(body))
+                        receiver.bodies.append(body)
+                        receiver.headers.append(dict(self.headers))
+                self.send_response(503 if failing else 204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f'http://{host}:{self.server.server_address[1]}/'
+        self._thread = None
+
+    def fail(self, count=1):
+        with self._lock:
+            self._failures += count
+
+    @property
+    def changes(self):
+        return [change for batch in self.batches for change in batch['changes']]
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,107 @@
+from unittest import skipIf
+
+from django.test import TestCase
+from tenancy.models import Contact
+
+from .. import role_mining, similarity
+from ..models import (
+    AccessControlMethod,
+    AccessGrant,
+    AzureGroup,
+    GroupMembership,
+    GroupSimilarity,
+    ProtectedResource,
+    RoleCandidate,
+)
+
+
+@skipIf(similarity.np is None, 'NumPy is not installed')
+class GroupSimilarityTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        contacts = [Contact.objects.create(name=f'Contact {i}') for i in range(40)]
+        cls.groups = [
+            AzureGroup.objects.create(name=f'Group {i}', object_id=f'{i}2345678-1234-1234-1234-123456789012')
+            for i in range(3)
+        ]
+        a, b, c = cls.groups
+        for contact in contacts[:20]:
+            GroupMembership.objects.create(group=a, contact=contact)
+        # b shares 19 of its 20 members with a (jaccard 19/21)
+        for contact in contacts[1:21]:
+            GroupMembership.objects.create(group=b, contact=contact)
+        for contact in contacts[20:]:
+            GroupMembership.objects.create(group=c, contact=contact)
+
+    def test_refresh_stores_similar_pairs(self):
+        """Test that only pairs at or above the threshold are stored, with their exact Jaccard"""
+        result = similarity.refresh_group_similarity(threshold=0.85)
+
+        self.assertEqual(result.groups, 3)
+        pair = GroupSimilarity.objects.get()
+        self.assertEqual((pair.group_a, pair.group_b), (self.groups[0], self.groups[1]))
+        self.assertAlmostEqual(pair.jaccard, 19 / 21)
+        self.assertEqual((pair.shared_members, pair.total_members), (19, 21))
+
+    def test_refresh_replaces_previous_results(self):
+        """Test that a stricter rerun drops pairs below the new threshold"""
+        similarity.refresh_group_similarity(threshold=0.85)
+        similarity.refresh_group_similarity(threshold=0.95)
+        self.assertFalse(GroupSimilarity.objects.exists())
+
+    def test_choose_bands_keeps_threshold_above_knee(self):
+        """Test that the LSH banding splits the signature exactly and sits below the threshold"""
+        bands, rows = similarity.choose_bands(128, 0.9)
+        self.assertEqual(bands * rows, 128)
+        self.assertLess((1 / bands) ** (1 / rows), 0.9)
+
+
+@skipIf(role_mining.sparse is None, 'SciPy is not installed')
+class RoleMiningTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.engineers = AzureGroup.objects.create(name='Engineers', object_id='a2345678-1234-1234-1234-123456789012')
+        cls.finance = AzureGroup.objects.create(name='Finance', object_id='b2345678-1234-1234-1234-123456789012')
+        resources = [
+            ProtectedResource.objects.create(name=f'Resource {i}', resource_type='web_application') for i in range(4)
+        ]
+        methods = {
+            (resource.pk, group.pk): AccessControlMethod.objects.create(
+                resource=resource, azure_group=group, control_type='application_rbac', name=f'{resource} {group} RBAC'
+            )
+            for resource in resources for group in (cls.engineers, cls.finance)
+        }
+        contacts = [Contact.objects.create(name=f'Contact {i}') for i in range(12)]
+        cls.engineer_contacts, cls.finance_contacts = contacts[:6], contacts[6:]
+
+        def grant(contact, group, resource, level):
+            GroupMembership.objects.get_or_create(group=group, contact=contact)
+            AccessGrant.objects.create(
+                resource=resource, contact=contact, azure_group=group,
+                control_method=methods[(resource.pk, group.pk)], access_level=level
+            )
+
+        for contact in cls.engineer_contacts:
+            grant(contact, cls.engineers, resources[0], 'write')
+            grant(contact, cls.engineers, resources[1], 'read')
+        for contact in cls.finance_contacts:
+            grant(contact, cls.finance, resources[2], 'read')
+            grant(contact, cls.finance, resources[3], 'admin')
+
+    def test_refresh_proposes_roles(self):
+        """Test that contacts with shared access become roles matched to the group granting it"""
+        result = role_mining.refresh_role_candidates(threshold=0.7, min_members=5, min_coverage=0.8)
+
+        self.assertEqual(result.contacts, 12)
+        self.assertEqual(result.roles, 2)
+        for candidate in RoleCandidate.objects.all():
+            self.assertEqual(candidate.member_count, 6)
+            self.assertEqual(candidate.permission_count, 2)
+            self.assertAlmostEqual(candidate.cohesion, 1.0)
+            self.assertIn(candidate.closest_group, (self.engineers, self.finance))
+            self.assertEqual(candidate.closest_group_jaccard, 1.0)
+            members = set(candidate.contacts.all())
+            expected = self.engineer_contacts if candidate.closest_group == self.engineers else self.finance_contacts
+            self.assertEqual(members, set(expected))
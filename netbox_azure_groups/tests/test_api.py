@@ -4,8 +4,12 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from dcim.models import Device, DeviceType, Manufacturer, Site
 from tenancy.models import Contact
-from users.models import User
-from ..models import AzureGroup, GroupMembership
+from core.models import ObjectChange, ObjectType
+from users.models import ObjectPermission, User
+from ..changelog import run_changes
+from ..models import (
+    AccessControlMethod, AccessGrant, AzureGroup, FortiGatePolicy, GroupMembership, ProtectedResource, SyncRun
+)
 
 
 class AzureGroupAPITestCase(APITestCase):
@@ -44,6 +48,28 @@ class AzureGroupAPITestCase(APITestCase):
         self.assertEqual(response.data['name'], 'Test Group')
         self.assertEqual(response.data['object_id'], '12345678-1234-1234-1234-123456789012')
 
+    def test_conditional_get(self):
+        """Test that an unchanged list or detail answers If-None-Match with 304"""
+        group = AzureGroup.objects.create(**self.group_data)
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-list')
+        etag = self.client.get(url)['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertNotEqual(self.client.get(url, {'name': 'Other'})['ETag'], etag)
+
+        detail_url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-detail', kwargs={'pk': group.pk})
+        detail_etag = self.client.get(detail_url)['ETag']
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            group.description = 'Changed'
+            group.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
     def test_create_azure_group(self):
         """Test creating an Azure group via API"""
         url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-list')
@@ -159,4 +185,336 @@ class GroupMembershipAPITestCase(APITestCase):
         response = self.client.delete(url)
         
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertFalse(GroupMembership.objects.filter(pk=membership.pk).exists())
\ No newline at end of file
+        self.assertFalse(GroupMembership.objects.filter(pk=membership.pk).exists())
+
+
+class SyncAPITestCase(APITestCase):
+
+    def setUp(self):
+        # Bulk syncs also need change and delete permissions
+        self.user = User.objects.create_user(username='testuser', is_superuser=True)
+        self.client.force_authenticate(user=self.user)
+        self.contact = Contact.objects.create(name='Test Contact', email='contact@example.com')
+
+    def test_group_bulk_sync_records_run(self):
+        """Test that group bulk sync upserts by object_id and writes a SyncRun"""
+        AzureGroup.objects.create(name='Existing', object_id='12345678-1234-1234-1234-123456789012')
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-bulk-sync')
+        response = self.client.post(url, {
+            'source': 'graph',
+            'source_host': 'tenant-1',
+            'groups': [
+                {'object_id': '12345678-1234-1234-1234-123456789012', 'name': 'Renamed'},
+                {'object_id': '22345678-1234-1234-1234-123456789012', 'name': 'New Group'},
+                {'object_id': 'not-a-guid', 'name': 'Broken'},
+            ],
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rows_created'], 1)
+        self.assertEqual(response.data['rows_updated'], 1)
+        self.assertEqual(response.data['error_count'], 1)
+        self.assertEqual(AzureGroup.objects.get(object_id='12345678-1234-1234-1234-123456789012').name, 'Renamed')
+        run = SyncRun.objects.get(pk=response.data['id'])
+        self.assertEqual(run.status, 'completed')
+        self.assertIsNotNone(run.duration)
+
+    def test_complete_group_sync_soft_deletes_missing(self):
+        """Test that a complete sync soft-deletes groups missing from the payload"""
+        AzureGroup.objects.create(name='Gone', object_id='32345678-1234-1234-1234-123456789012')
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-bulk-sync')
+        response = self.client.post(url, {
+            'source': 'graph',
+            'complete': True,
+            'groups': [{'object_id': '42345678-1234-1234-1234-123456789012', 'name': 'Kept'}],
+        }, format='json')
+
+        self.assertEqual(response.data['rows_deleted'], 1)
+        self.assertTrue(AzureGroup.all_objects.get(object_id='32345678-1234-1234-1234-123456789012').is_deleted)
+
+    def test_group_bulk_sync_rejects_repeated_object_id(self):
+        """Test that a repeated object_id is reported as an error instead of failing the run"""
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-bulk-sync')
+        response = self.client.post(url, {
+            'source': 'graph',
+            'groups': [
+                {'object_id': '52345678-1234-1234-1234-123456789012', 'name': 'First'},
+                {'object_id': '52345678-1234-1234-1234-123456789012', 'name': 'Second'},
+            ],
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual((response.data['rows_created'], response.data['error_count']), (1, 1))
+        self.assertEqual(AzureGroup.objects.get(object_id='52345678-1234-1234-1234-123456789012').name, 'First')
+
+    def test_group_bulk_sync_requires_change_permission(self):
+        """Test that bulk-sync needs change (and for a complete sync, delete) permission besides add"""
+        user = User.objects.create_user(username='adder')
+        permission = ObjectPermission.objects.create(name='Add groups', actions=['add'])
+        permission.object_types.add(ObjectType.objects.get_for_model(AzureGroup))
+        permission.users.add(user)
+        self.client.force_authenticate(user=user)
+
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-bulk-sync')
+        response = self.client.post(url, {'source': 'graph', 'groups': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(SyncRun.objects.exists())
+
+    def test_group_resync_skips_unchanged(self):
+        """Test that re-sending identical groups only bumps last_sync"""
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-bulk-sync')
+        payload = {
+            'source': 'graph',
+            'groups': [{'object_id': '62345678-1234-1234-1234-123456789012', 'name': 'Stable'}],
+        }
+        self.client.post(url, payload, format='json')
+        response = self.client.post(url, payload, format='json')
+
+        self.assertEqual(response.data['rows_unchanged'], 1)
+        self.assertEqual(response.data['rows_updated'], 0)
+        group = AzureGroup.objects.get(object_id='62345678-1234-1234-1234-123456789012')
+        self.assertEqual(group.content_hash, group.compute_content_hash())
+
+    def test_group_bulk_sync_coalesces_changelog(self):
+        """Test that a bulk sync writes one changelog summary per model instead of one entry per row"""
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-bulk-sync')
+        response = self.client.post(url, {
+            'source': 'graph',
+            'groups': [
+                {'object_id': f'8234567{i}-1234-1234-1234-123456789012', 'name': f'Group {i}'} for i in range(3)
+            ],
+        }, format='json')
+
+        group_type = ContentType.objects.get_for_model(AzureGroup)
+        self.assertFalse(ObjectChange.objects.filter(changed_object_type=group_type).exists())
+        summaries = list(run_changes(SyncRun.objects.get(pk=response.data['id'])))
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries[0].postchange_data['model'], 'netbox_azure_groups.azuregroup')
+        self.assertEqual(summaries[0].postchange_data['counts']['created'], 3)
+        self.assertEqual(len(summaries[0].postchange_data['created']), 3)
+
+    def test_membership_bulk_sync_reconciles(self):
+        """Test that membership sync adds and removes members to match the payload"""
+        group = AzureGroup.objects.create(name='Group', object_id='52345678-1234-1234-1234-123456789012')
+        other = Contact.objects.create(name='Other Contact', email='other@example.com')
+        GroupMembership.objects.create(group=group, contact=other)
+        url = reverse('plugins-api:netbox_azure_groups-api:groupmembership-bulk-sync')
+        response = self.client.post(url, {
+            'source': 'graph',
+            'groups': [{'object_id': group.object_id, 'members': [{'contact': self.contact.pk}]}],
+        }, format='json')
+
+        self.assertEqual(response.data['rows_created'], 1)
+        self.assertEqual(response.data['rows_deleted'], 1)
+        self.assertEqual(
+            list(GroupMembership.objects.filter(group=group).values_list('contact_id', flat=True)),
+            [self.contact.pk]
+        )
+
+    def test_membership_resync_skips_unchanged_groups(self):
+        """Test that an unchanged member set is skipped until memberships are edited outside a sync"""
+        group = AzureGroup.objects.create(name='Group', object_id='72345678-1234-1234-1234-123456789012')
+        url = reverse('plugins-api:netbox_azure_groups-api:groupmembership-bulk-sync')
+        payload = {
+            'source': 'graph',
+            'groups': [{'object_id': group.object_id, 'members': [{'contact': self.contact.pk}]}],
+        }
+        self.client.post(url, payload, format='json')
+        group.refresh_from_db()
+        self.assertNotEqual(group.membership_hash, '')
+
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.data['rows_created'], 0)
+        self.assertEqual(response.data['rows_unchanged'], 1)
+
+        GroupMembership.objects.filter(group=group).delete()
+        group.refresh_from_db()
+        self.assertEqual(group.membership_hash, '')
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.data['rows_created'], 1)
+
+    def test_policy_reimport_saves_unhashed_fields(self):
+        """Test that an identical policy is skipped but a change outside the hashed fields is saved"""
+        url = reverse('plugins-api:netbox_azure_groups-api:fortigatepolicy-bulk-import')
+        policy = {'policy_id': 7, 'name': 'vpn', 'fortigate_host': 'fw1'}
+        self.client.post(url, [policy], format='json')
+
+        response = self.client.post(url, [policy], format='json')
+        self.assertEqual(response.data['updated'], 0)
+
+        response = self.client.post(url, [{**policy, 'ai_description': 'Remote access'}], format='json')
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(FortiGatePolicy.objects.get(policy_id=7).ai_description, 'Remote access')
+
+    def test_policy_import_normalises_keys(self):
+        """Test that a string policy_id matches the stored policy and a repeated key updates it"""
+        url = reverse('plugins-api:netbox_azure_groups-api:fortigatepolicy-bulk-import')
+        self.client.post(url, [{'policy_id': 8, 'name': 'vpn', 'fortigate_host': 'fw1'}], format='json')
+
+        response = self.client.post(url, [
+            {'policy_id': '8', 'name': 'vpn-renamed', 'fortigate_host': 'fw1'},
+            {'policy_id': 9, 'name': 'lab', 'fortigate_host': 'fw1'},
+            {'policy_id': '9', 'name': 'lab-renamed', 'fortigate_host': 'fw1'},
+        ], format='json')
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 2))
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(FortiGatePolicy.objects.get(policy_id=8).name, 'vpn-renamed')
+        self.assertEqual(FortiGatePolicy.objects.get(policy_id=9).name, 'lab-renamed')
+
+    def test_rule_preview_reports_delta(self):
+        """Test that rule-preview counts matches and the add/remove delta without writing"""
+        group = AzureGroup.objects.create(name='Sales', object_id='92345678-1234-1234-1234-123456789012')
+        seller = Contact.objects.create(name='Seller', title='Sales', email='seller@example.com')
+        GroupMembership.objects.create(group=group, contact=self.contact)
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-rule-preview', kwargs={'pk': group.pk})
+        response = self.client.post(url, {'membership_rule': 'user.jobTitle -eq "sales"'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['match_count'], 1)
+        self.assertEqual(response.data['add_count'], 1)
+        self.assertEqual(response.data['remove_count'], 1)
+        self.assertEqual(response.data['add_sample'][0]['id'], seller.pk)
+        self.assertEqual(GroupMembership.objects.filter(group=group).count(), 1)
+
+        response = self.client.post(url, {'membership_rule': 'user.jobTitle -eq'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rule_preview_counts_visible_contacts(self):
+        """Test that rule-preview only counts the contacts the user may view"""
+        group = AzureGroup.objects.create(name='Sales', object_id='93345678-1234-1234-1234-123456789012')
+        seller = Contact.objects.create(name='Seller', title='Sales', email='seller@example.com')
+        Contact.objects.create(name='Hidden Seller', title='Sales', email='hidden@example.com')
+        GroupMembership.objects.create(group=group, contact=self.contact)
+
+        user = User.objects.create_user(username='viewer')
+        groups = ObjectPermission.objects.create(name='Groups', actions=['view', 'add'])
+        groups.object_types.add(ObjectType.objects.get_for_model(AzureGroup))
+        groups.users.add(user)
+        contacts = ObjectPermission.objects.create(name='Sellers', actions=['view'], constraints={'name': 'Seller'})
+        contacts.object_types.add(ObjectType.objects.get_for_model(Contact))
+        contacts.users.add(user)
+        self.client.force_authenticate(user=user)
+
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-rule-preview', kwargs={'pk': group.pk})
+        response = self.client.post(url, {'membership_rule': 'user.jobTitle -eq "sales"'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (response.data['match_count'], response.data['current_count'], response.data['remove_count']), (1, 0, 0)
+        )
+        self.assertEqual([c['id'] for c in response.data['sample']], [seller.pk])
+
+    def test_access_paths_follow_nested_groups(self):
+        """Test that access-paths explains direct and nested routes to a resource"""
+        with self.captureOnCommitCallbacks(execute=True):
+            parent = AzureGroup.objects.create(name='VPN Users', object_id='a2345678-1234-1234-1234-123456789012')
+            child = AzureGroup.objects.create(name='Engineering', object_id='b2345678-1234-1234-1234-123456789012')
+            resource = ProtectedResource.objects.create(name='Lab VPN', resource_type='network_device')
+            method = AccessControlMethod.objects.create(
+                resource=resource, control_type='fortigate_policy', name='Lab access',
+                azure_group=parent, access_level='read',
+            )
+            FortiGatePolicy.objects.create(
+                policy_id=42, name='lab-vpn', fortigate_host='fw1', access_control_method=method,
+            )
+            GroupMembership.objects.create(group=child, contact=self.contact)
+            GroupMembership.objects.create(
+                group=parent, contact=self.contact, membership_type='nested', nested_via=[str(child.object_id)],
+            )
+        url = reverse('plugins-api:netbox_azure_groups-api:protectedresource-access-paths', kwargs={'pk': resource.pk})
+        response = self.client.get(url, {'contact_id': self.contact.pk})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['has_access'])
+        names = sorted([group['name'] for group in path['groups']] for path in response.data['paths'])
+        self.assertEqual(names, [['Engineering', 'VPN Users']])
+        self.assertEqual(response.data['paths'][0]['firewall_policies'][0]['policy_id'], 42)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            method.is_active = False
+            method.save()
+        response = self.client.get(url, {'contact_id': self.contact.pk})
+        self.assertFalse(response.data['has_access'])
+
+    def test_blast_radius_includes_nested_groups(self):
+        """Test that blast-radius counts members of nested groups and their existing resources"""
+        other = Contact.objects.create(name='Other', email='other@example.com', custom_field_data={'department': 'IT'})
+        with self.captureOnCommitCallbacks(execute=True):
+            parent = AzureGroup.objects.create(name='All Staff', object_id='c2345678-1234-1234-1234-123456789012')
+            child = AzureGroup.objects.create(name='IT Staff', object_id='d2345678-1234-1234-1234-123456789012')
+            GroupMembership.objects.create(group=child, contact=self.contact)
+            GroupMembership.objects.create(group=child, contact=other)
+            GroupMembership.objects.create(
+                group=parent, contact=self.contact, membership_type='nested', nested_via=[str(child.object_id)],
+            )
+        resource = ProtectedResource.objects.create(name='Wiki', resource_type='web_application')
+        method = AccessControlMethod.objects.create(
+            resource=resource, control_type='application_rbac', name='Wiki editors', azure_group=child,
+            access_level='write',
+        )
+        AccessGrant.objects.create(
+            resource=resource, contact=other, azure_group=child, control_method=method, access_level='write',
+            granted_via='direct_membership',
+        )
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-blast-radius', kwargs={'pk': parent.pk})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['nested_groups'], 1)
+        self.assertEqual(response.data['effective_contacts'], 2)
+        self.assertIn({'business_unit': 'IT', 'contacts': 1}, response.data['by_business_unit'])
+        self.assertEqual(response.data['resources'][0]['name'], 'Wiki')
+
+        response = self.client.get(url, {'detail': 'contacts'})
+        self.assertEqual(response.data['count'], 2)
+
+    def test_who_has_access_is_cached_until_grants_change(self):
+        """Test that who-has-access is served from cache and refreshed by grant and rename writes"""
+        group = AzureGroup.objects.create(name='Wiki Readers', object_id='e2345678-1234-1234-1234-123456789012')
+        resource = ProtectedResource.objects.create(name='Wiki', resource_type='web_application')
+        method = AccessControlMethod.objects.create(
+            resource=resource, control_type='application_rbac', name='Wiki readers', azure_group=group,
+            access_level='read',
+        )
+        url = reverse(
+            'plugins-api:netbox_azure_groups-api:protectedresource-who-has-access', kwargs={'pk': resource.pk}
+        )
+        self.assertEqual(self.client.get(url).data['access_grants'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            grant = AccessGrant.objects.create(
+                resource=resource, contact=self.contact, azure_group=group, control_method=method,
+                access_level='read', granted_via='direct_membership',
+            )
+        self.assertEqual(len(self.client.get(url).data['access_grants']), 1)
+
+        # Queryset updates bypass the signals, so the cached entry is still served
+        AccessGrant.objects.filter(pk=grant.pk).update(access_level='write')
+        self.assertEqual(self.client.get(url).data['access_grants'][0]['access_level'], 'Read Only')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            group.name = 'Wiki Editors'
+            group.save()
+        grants = self.client.get(url).data['access_grants']
+        self.assertEqual((grants[0]['via_group'], grants[0]['access_level']), ('Wiki Editors', 'Read/Write'))
+
+    def test_sync_status_reads_latest_run(self):
+        """Test that sync-status reports health from the latest SyncRun"""
+        url = reverse('plugins-api:netbox_azure_groups-api:azuregroup-sync-status')
+        self.assertEqual(self.client.get(url).data['health'], 'unknown')
+
+        run = SyncRun.objects.create(source='graph', operation='groups')
+        run.finish()
+        self.assertEqual(self.client.get(url).data['health'], 'healthy')
+
+        # Runs of other sync paths don't speak for group health
+        SyncRun.objects.create(source='graph', operation='memberships').finish('failed')
+        SyncRun.objects.create(source='fortigate', operation='policies').finish()
+        self.assertEqual(self.client.get(url).data['health'], 'failed')
+
+    def test_sync_trend_validates_days(self):
+        """Test that sync-runs/trend rejects a non-numeric window and clamps the rest"""
+        url = reverse('plugins-api:netbox_azure_groups-api:syncrun-trend')
+        self.assertEqual(self.client.get(url, {'days': 'week'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'days': -5}).data['days'], 1)
+        self.assertEqual(self.client.get(url, {'days': 9999}).data['days'], 365)
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from core.models import ObjectType
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from tenancy.models import Contact
+from users.models import ObjectPermission, User
+
+from ..change_feed import CursorError, CursorExpiredError, decode_cursor, encode_cursor, read_changes
+from ..models import AzureGroup, GroupMembership
+
+
+class CursorTestCase(TestCase):
+
+    def test_cursor_round_trip(self):
+        """Test that cursors decode to the position they encode and reject garbage"""
+        issued = timezone.now().replace(microsecond=0)
+        self.assertEqual(decode_cursor(encode_cursor(123456, 42, issued)), (123456, 42, issued))
+        with self.assertRaises(CursorError):
+            decode_cursor('not-a-cursor')
+
+    def test_expired_cursor(self):
+        """Test that a cursor older than the retention window is rejected"""
+        with self.assertRaises(CursorExpiredError):
+            read_changes(encode_cursor(1, 1, timezone.now() - timedelta(days=365)))
+
+
+class ChangeFeedTestCase(TransactionTestCase):
+    # Entries only become readable once their transaction has committed
+
+    def test_changes_after_cursor(self):
+        """Test that the feed returns creates, updates and deletes once, in order"""
+        contact = Contact.objects.create(name='Feed Contact')
+        group = AzureGroup.objects.create(name='Feed Group', object_id='a9345678-1234-1234-1234-123456789012')
+        group.description = 'Changed'
+        group.save()
+        membership = GroupMembership.objects.create(group=group, contact=contact)
+        membership.delete()
+
+        entries, cursor, has_more = read_changes(limit=2)
+        self.assertTrue(has_more)
+        rest, cursor, has_more = read_changes(cursor)
+        self.assertFalse(has_more)
+        changes = [(entry.model.split('.')[1], entry.action) for entry in entries + rest]
+        self.assertEqual(changes, [
+            ('azuregroup', 'created'), ('azuregroup', 'updated'),
+            ('groupmembership', 'created'), ('groupmembership', 'deleted'),
+        ])
+        self.assertEqual(rest[-1].data['contact_id'], contact.pk)
+
+        self.assertEqual(read_changes(cursor)[0], [])
+        group_id = group.pk
+        group.delete()
+        entries, _, _ = read_changes(cursor, models=['netbox_azure_groups.azuregroup'])
+        self.assertEqual([(entry.object_id, entry.action) for entry in entries], [(group_id, 'deleted')])
+
+    def test_changes_honour_object_permissions(self):
+        """Test that a user with constrained view permission only sees the objects it allows"""
+        user = User.objects.create_user(username='feed-reader')
+        permission = ObjectPermission.objects.create(name='Visible groups', actions=['view'], constraints={
+            'name': 'Visible',
+        })
+        permission.object_types.add(ObjectType.objects.get_for_model(AzureGroup))
+        permission.users.add(user)
+        visible = AzureGroup.objects.create(name='Visible', object_id='b9345678-1234-1234-1234-123456789012')
+        AzureGroup.objects.create(name='Hidden', object_id='c9345678-1234-1234-1234-123456789012')
+
+        entries, _, _ = read_changes(models=['netbox_azure_groups.azuregroup'], user=user)
+        self.assertEqual([entry.object_id for entry in entries], [visible.pk])
@@ -0,0 +1,82 @@
+from unittest import IsolatedAsyncioTestCase, skipIf
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+else:
+    from netbox_azure_groups_client import ApiError, AzureGroupsClient
+    from netbox_azure_groups_client.client import chunk_groups
+    from netbox_azure_groups_client.testing import StandInServer
+
+
+@skipIf(httpx is None, 'httpx is not installed')
+class AzureGroupsClientTestCase(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = StandInServer(delay=0.01)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+
+    def client(self, **kwargs):
+        kwargs.setdefault('backoff', 0.01)
+        return AzureGroupsClient(self.server.url, 'token', **kwargs)
+
+    async def test_paginate(self):
+        """Test that pages are fetched ahead within the concurrency limit and yielded in order"""
+        self.server.objects['azure-groups'] = [{'id': pk} for pk in range(1, 1001)]
+        async with self.client(concurrency=3) as client:
+            ids = [group['id'] async for group in client.paginate('azure-groups/', page_size=50)]
+        self.assertEqual(ids, list(range(1, 1001)))
+        self.assertEqual(len(self.server.requests), 20)
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 3)
+
+    async def test_retry(self):
+        """Test that throttled and failed requests are retried, honouring Retry-After"""
+        self.server.objects['azure-groups'] = [{'id': 1}]
+        self.server.fail(1, status=429, retry_after=0)
+        self.server.fail(1, status=502)
+        async with self.client() as client:
+            page = await client.get('azure-groups/')
+        self.assertEqual(page['count'], 1)
+        self.assertEqual(len(self.server.requests), 3)
+
+        # A plain POST failing with 500 may have been processed and is not repeated
+        self.server.fail(1, status=500)
+        async with self.client() as client:
+            with self.assertRaises(ApiError) as raised:
+                await client.post('azure-groups/', {'name': 'Staff'})
+        self.assertEqual(raised.exception.status, 500)
+        self.assertEqual(len(self.server.requests), 4)
+
+    async def test_sync_memberships_chunked(self):
+        """Test that membership syncs are split by member count without splitting a group"""
+        groups = [
+            {'object_id': f'00000000-0000-0000-0000-{pk:012d}', 'members': [{'contact': n} for n in range(pk)]}
+            for pk in range(1, 11)
+        ]
+        self.server.fail(1, status=503)
+        async with self.client(chunk_size=10, concurrency=4) as client:
+            runs = await client.sync_memberships(groups, source='graph')
+
+        received = self.server.received['group-memberships/bulk-sync/']
+        self.assertEqual(len(runs), len(chunk_groups(groups, 10)))
+        self.assertEqual(len(received), len(runs))
+        sent = sorted((g for body in received for g in body['groups']), key=lambda g: g['object_id'])
+        self.assertEqual(sent, groups)
+        for body in received:
+            self.assertTrue(len(body['groups']) == 1 or sum(len(g['members']) for g in body['groups']) <= 10)
+
+    async def test_changes(self):
+        """Test that the change feed is followed to the end, filtered by model, with a cursor per page"""
+        self.server.changes = [
+            {'id': pk, 'model': f"netbox_azure_groups.{'azuregroup' if pk % 2 else 'groupmembership'}"}
+            for pk in range(1, 8)
+        ]
+        async with self.client() as client:
+            changes = [
+                (change['id'], cursor) async for change, cursor in
+                client.changes(models=['azuregroup'], limit=2)
+            ]
+        self.assertEqual(changes, [(1, None), (3, '3'), (5, None), (7, '7')])
@@ -0,0 +1,44 @@
+from django.test import TestCase
+from tenancy.filtersets import ContactFilterSet
+from tenancy.models import Contact
+
+from ..models import AzureGroup, GroupMembership
+
+
+class ContactAzureGroupFilterTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.groups = [
+            AzureGroup.objects.create(name=f'Group {i}', object_id=f'{i}2345678-1234-1234-1234-123456789012')
+            for i in range(3)
+        ]
+        cls.contacts = [Contact.objects.create(name=f'Contact {i}') for i in range(3)]
+        a, b, c = cls.groups
+        # Contact 2's nested membership makes C a group nested inside B
+        with cls.captureOnCommitCallbacks(execute=True):
+            GroupMembership.objects.create(group=a, contact=cls.contacts[0])
+            GroupMembership.objects.create(group=b, contact=cls.contacts[0])
+            GroupMembership.objects.create(group=a, contact=cls.contacts[1])
+            GroupMembership.objects.create(group=c, contact=cls.contacts[1])
+            GroupMembership.objects.create(
+                group=b, contact=cls.contacts[2], membership_type='nested', nested_via=[c.pk]
+            )
+
+    def filter(self, **params):
+        return set(ContactFilterSet(params, Contact.objects.all()).qs.values_list('name', flat=True))
+
+    def test_all_any_none(self):
+        """Test that all/any/none combine into A AND B, A OR B and NOT C"""
+        a, b, c = (str(group.pk) for group in self.groups)
+        self.assertEqual(self.filter(azure_group_all=[a, b]), {'Contact 0'})
+        self.assertEqual(self.filter(azure_group_any=[b, c]), {'Contact 0', 'Contact 1'})
+        self.assertEqual(self.filter(azure_group_any=[a], azure_group_none=[c]), {'Contact 0'})
+
+    def test_effective_includes_nested(self):
+        """Test that the effective variants also match members of nested groups"""
+        a, b, c = (str(group.pk) for group in self.groups)
+        self.assertEqual(self.filter(azure_group_all=[b]), {'Contact 0'})
+        self.assertEqual(self.filter(azure_group_all_effective=[b]), {'Contact 0', 'Contact 1', 'Contact 2'})
+        self.assertEqual(self.filter(azure_group_all_effective=[a, b]), {'Contact 0', 'Contact 1'})
+        self.assertEqual(self.filter(azure_group_none_effective=[c]), {'Contact 0', 'Contact 2'})
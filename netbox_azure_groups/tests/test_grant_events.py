@@ -0,0 +1,57 @@
+from django.test import TestCase
+from django.utils import timezone
+from tenancy.models import Contact
+
+from ..grant_events import ensure_partition, existing_partitions, maintain_partitions, month_of, partition_name
+from ..models import AccessControlMethod, AccessGrant, AzureGroup, GrantEvent, ProtectedResource
+
+
+class GrantEventTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = AzureGroup.objects.create(name='Payroll', object_id='f2345678-1234-1234-1234-123456789012')
+        cls.resource = ProtectedResource.objects.create(name='Payroll App', resource_type='web_application')
+        cls.method = AccessControlMethod.objects.create(
+            resource=cls.resource, control_type='application_rbac', name='Payroll users', azure_group=cls.group,
+            access_level='read',
+        )
+        cls.contact = Contact.objects.create(name='Clerk')
+
+    def test_grant_changes_are_recorded(self):
+        """Test that grant state changes append events and unrelated saves do not"""
+        grant = AccessGrant.objects.create(
+            resource=self.resource, contact=self.contact, azure_group=self.group, control_method=self.method,
+            access_level='read', granted_via='direct_membership',
+        )
+        grant.save()
+        grant = AccessGrant.objects.get(pk=grant.pk)
+        grant.access_level = 'write'
+        grant.save()
+        grant.is_active = False
+        grant.save()
+        grant.is_active = True
+        grant.access_level = 'admin'
+        grant.save()
+        grant_id = grant.pk
+        grant.delete()
+
+        events = GrantEvent.objects.filter(grant_id=grant_id).order_by('id')
+        self.assertEqual(
+            [event.event for event in events],
+            ['granted', 'level_changed', 'revoked', 'level_changed', 'reactivated', 'deleted']
+        )
+        self.assertEqual(events[1].previous_access_level, 'read')
+        self.assertEqual(events[3].previous_access_level, 'write')
+        self.assertIn(month_of(timezone.now()), existing_partitions())
+
+    def test_expired_partitions_are_dropped(self):
+        """Test that maintenance creates upcoming months and drops whole expired months"""
+        ensure_partition((2000, 1))
+        result = maintain_partitions(ahead=2, retention_months=12)
+
+        self.assertIn(partition_name((2000, 1)), result.dropped)
+        partitions = existing_partitions()
+        self.assertNotIn((2000, 1), partitions)
+        self.assertIn(month_of(timezone.now()), partitions)
+        self.assertEqual(len([month for month in partitions if month >= month_of(timezone.now())]), 3)
@@ -0,0 +1,95 @@
+import os
+from unittest import skipIf
+
+from dcim.models import Device, DeviceType, Manufacturer, Site
+from django.test import TestCase
+from tenancy.models import Contact
+
+from ..graph_sync import httpx, sync_tenant
+from ..models import AzureGroup, GraphDeltaToken, GroupMembership
+from .graph_server import MockGraphServer
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'graph_delta.json')
+
+TENANT = {'tenant_id': 'c0ffee00-0000-4000-8000-000000000000', 'client_id': 'client', 'client_secret': 'secret'}
+
+ENGINEERING = '0a1b2c3d-0000-4000-8000-000000000001'
+FINANCE = '0a1b2c3d-0000-4000-8000-000000000002'
+STAFF = '0a1b2c3d-0000-4000-8000-000000000003'
+
+
+@skipIf(httpx is None, 'httpx is not installed')
+class GraphSyncTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.contacts = {
+            name: Contact.objects.create(name=name.title(), email=f'{name}@example.com')
+            for name in ('alice', 'bob', 'carol', 'dave')
+        }
+        manufacturer = Manufacturer.objects.create(name='Manufacturer', slug='manufacturer')
+        device_type = DeviceType.objects.create(manufacturer=manufacturer, model='Server', slug='server')
+        site = Site.objects.create(name='Site', slug='site')
+        cls.device = Device.objects.create(name='build-01', device_type=device_type, site=site)
+
+    def setUp(self):
+        self.graph = MockGraphServer.from_file(FIXTURE)
+        self.graph.__enter__()
+        self.addCleanup(self.graph.__exit__)
+
+    def sync(self, **kwargs):
+        return sync_tenant(TENANT, api_url=self.graph.api_url, login_url=self.graph.url, concurrency=2, **kwargs)
+
+    def members(self, object_id):
+        memberships = GroupMembership.objects.filter(group__object_id=object_id)
+        return {membership.contact or membership.device for membership in memberships}
+
+    def test_initial_then_incremental(self):
+        """Test that the first sync reads everything and the next applies only the recorded changes"""
+        run = self.sync()
+        self.assertEqual(run.status, 'completed')
+        self.assertEqual(AzureGroup.objects.count(), 3)
+        c = self.contacts
+        self.assertEqual(self.members(ENGINEERING), {c['alice'], c['bob'], self.device})
+        self.assertEqual(self.members(FINANCE), {c['carol']})
+        self.assertEqual(self.members(STAFF), {c['alice'], c['carol']})
+        staff = AzureGroup.objects.get(object_id=STAFF)
+        self.assertEqual((staff.group_type, staff.membership_type), ('dynamic_m365', 'dynamic'))
+        self.assertEqual(set(staff.memberships.values_list('membership_type', flat=True)), {'dynamic'})
+        token = GraphDeltaToken.objects.get(tenant_id=TENANT['tenant_id'], scope=GraphDeltaToken.GROUPS)
+        self.assertTrue(token.delta_link.endswith('$deltatoken=groups-round-1'))
+
+        self.graph.requests.clear()
+        run = self.sync()
+        self.assertEqual(run.status, 'completed')
+        self.assertEqual(sorted(self.graph.requests), sorted([
+            '/v1.0/groups/delta?$deltatoken=groups-round-1',
+            f'/v1.0/groups/{ENGINEERING}/members/delta?$deltatoken=engineering-round-1',
+            f'/v1.0/groups/{FINANCE}/members/delta?$deltatoken=finance-round-1',
+        ]))
+        self.assertEqual(self.members(ENGINEERING), {c['alice'], c['dave'], self.device})
+        self.assertEqual(self.members(FINANCE), {c['carol']})
+        self.assertEqual(AzureGroup.objects.get(object_id=FINANCE).name, 'Finance & Accounting')
+        self.assertTrue(AzureGroup.all_objects.get(object_id=STAFF).is_deleted)
+        self.assertFalse(GraphDeltaToken.objects.filter(scope=STAFF).exists())
+
+    def test_throttling(self):
+        """Test that throttled requests are retried after Retry-After"""
+        self.graph.fail(3, status=429, retry_after=0)
+        run = self.sync()
+        self.assertEqual(run.status, 'completed')
+        self.assertEqual(AzureGroup.objects.count(), 3)
+        self.assertEqual(len(self.graph.requests), 9)
+
+    def test_expired_delta_link(self):
+        """Test that a delta link Graph no longer accepts falls back to a full sync"""
+        self.sync()
+        GraphDeltaToken.objects.filter(scope=GraphDeltaToken.GROUPS).update(
+            delta_link=f'{self.graph.api_url}/groups/delta?$deltatoken=expired'
+        )
+        run = self.sync()
+        self.assertEqual(run.status, 'completed')
+        self.assertEqual(self.graph.requests.count('/v1.0/groups/delta'), 2)
+        self.assertFalse(AzureGroup.all_objects.get(object_id=STAFF).is_deleted)
+        token = GraphDeltaToken.objects.get(scope=GraphDeltaToken.GROUPS)
+        self.assertTrue(token.delta_link.endswith('$deltatoken=groups-round-1'))
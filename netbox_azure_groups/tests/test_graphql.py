@@ -0,0 +1,57 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from tenancy.models import Contact
+from users.models import User
+
+from ..models import AzureGroup, GroupMembership
+
+QUERY = '''
+{
+  azure_group_list {
+    name
+    memberships {
+      membership_type
+      contact { name }
+      group { name access_control_methods { name } }
+    }
+  }
+}
+'''
+
+
+class GraphQLTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', is_superuser=True)
+        # The GraphQL view is a plain Django view, so DRF's force_authenticate() does not reach it
+        self.client.force_login(self.user)
+
+    def add_groups(self, start, count):
+        for index in range(start, start + count):
+            group = AzureGroup.objects.create(
+                name=f'Group {index}', object_id=f'{index:08d}-1234-1234-1234-123456789012'
+            )
+            for member in range(3):
+                contact = Contact.objects.create(name=f'Contact {index}.{member}')
+                GroupMembership.objects.create(group=group, contact=contact)
+
+    def run_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('graphql'), {'query': QUERY}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('errors', response.json())
+        return response.json()['data'], len(queries)
+
+    def test_nested_query_count_is_constant(self):
+        """Test that nested relations are batch loaded instead of queried per object"""
+        self.add_groups(0, 2)
+        data, small = self.run_query()
+        self.assertEqual(len(data['azure_group_list']), 2)
+        self.assertEqual(data['azure_group_list'][0]['memberships'][0]['contact']['name'], 'Contact 0.0')
+
+        self.add_groups(2, 8)
+        data, large = self.run_query()
+        self.assertEqual(len(data['azure_group_list']), 10)
+        self.assertEqual(large, small)
@@ -0,0 +1,49 @@
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from users.models import User
+
+from ..metrics import count_rows, observe
+from ..models import AzureGroup
+
+
+def sample(name, endpoint, component='api'):
+    return REGISTRY.get_sample_value(name, {'component': component, 'endpoint': endpoint}) or 0
+
+
+class CountRowsTestCase(SimpleTestCase):
+
+    def test_count_rows(self):
+        """Test that list, paginated and detail payloads are counted as rows"""
+        self.assertEqual(count_rows([{'id': 1}, {'id': 2}]), 2)
+        self.assertEqual(count_rows({'count': 10, 'next': None, 'results': [{'id': 1}]}), 1)
+        self.assertEqual(count_rows({'id': 1, 'name': 'Staff'}), 1)
+        self.assertEqual(count_rows(None), 0)
+
+
+class ObserveTestCase(TestCase):
+
+    def test_observe_records_queries(self):
+        """Test that observe() records the block's query count and DB time"""
+        queries = sample('netbox_azure_groups_db_queries_sum', 'test.observe', 'test')
+        calls = sample('netbox_azure_groups_db_seconds_count', 'test.observe', 'test')
+        with observe('test', 'test.observe'):
+            list(AzureGroup.objects.all())
+            AzureGroup.objects.count()
+
+        self.assertEqual(sample('netbox_azure_groups_db_queries_sum', 'test.observe', 'test') - queries, 2)
+        self.assertEqual(sample('netbox_azure_groups_db_seconds_count', 'test.observe', 'test') - calls, 1)
+        self.assertGreater(sample('netbox_azure_groups_db_seconds_sum', 'test.observe', 'test'), 0)
+
+    def test_viewset_actions_are_labelled(self):
+        """Test that API actions are recorded as <basename>.<action> with the rows returned"""
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='testuser'))
+        AzureGroup.objects.create(name='Staff', object_id='e9345678-1234-1234-1234-123456789012')
+        calls = sample('netbox_azure_groups_request_seconds_count', 'azuregroup.list')
+        rows = sample('netbox_azure_groups_rows_serialized_sum', 'azuregroup.list')
+
+        client.get(reverse('plugins-api:netbox_azure_groups-api:azuregroup-list'))
+        self.assertEqual(sample('netbox_azure_groups_request_seconds_count', 'azuregroup.list') - calls, 1)
+        self.assertEqual(sample('netbox_azure_groups_rows_serialized_sum', 'azuregroup.list') - rows, 1)
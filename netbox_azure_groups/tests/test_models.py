@@ -1,9 +1,12 @@
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
 from dcim.models import Device, DeviceType, Manufacturer, Site
 from tenancy.models import Contact
 from ..models import AzureGroup, GroupMembership
+from ..retention import purge_deleted_groups
 
 
 class AzureGroupTestCase(TestCase):
@@ -38,6 +41,34 @@ class AzureGroupTestCase(TestCase):
             group = AzureGroup(**duplicate_data)
             group.full_clean()
 
+    def test_on_premises_clean_uses_snapshot(self):
+        """Test that the read-only check compares against the loaded snapshot without a query"""
+        AzureGroup.objects.create(source='on_premises', **self.group_data)
+        group = AzureGroup.objects.get(object_id=self.group_data['object_id'])
+
+        group.name = 'Renamed'
+        with self.assertNumQueries(0):
+            with self.assertRaises(ValidationError):
+                group.clean()
+
+        group.name = self.group_data['name']
+        with self.assertNumQueries(0):
+            group.clean()
+
+    def test_check_source_restrictions_batch(self):
+        """Test the set-based read-only check over a batch of unloaded instances"""
+        on_prem = AzureGroup.objects.create(source='on_premises', **self.group_data)
+        cloud = AzureGroup.objects.create(name='Cloud', object_id='22345678-1234-1234-1234-123456789012')
+
+        pending = [
+            AzureGroup(pk=on_prem.pk, **{**self.group_data, 'source': 'on_premises', 'name': 'Changed'}),
+            AzureGroup(pk=cloud.pk, name='Changed', object_id=cloud.object_id),
+        ]
+        with self.assertNumQueries(1):
+            errors = AzureGroup.check_source_restrictions(pending)
+
+        self.assertEqual(list(errors), [on_prem.pk])
+
     def test_azure_group_get_absolute_url(self):
         """Test the get_absolute_url method"""
         group = AzureGroup.objects.create(**self.group_data)
@@ -132,4 +163,48 @@ class GroupMembershipTestCase(TestCase):
             object_id=self.contact.pk
         )
         expected_url = f'/plugins/azure-groups/group-memberships/{membership.pk}/'
-        self.assertEqual(membership.get_absolute_url(), expected_url)
\ No newline at end of file
+        self.assertEqual(membership.get_absolute_url(), expected_url)
+
+
+class RetentionPurgeTestCase(TestCase):
+
+    def setUp(self):
+        self.contact = Contact.objects.create(name='Test Contact', email='contact@example.com')
+
+    def _deleted_group(self, object_id, days_ago):
+        group = AzureGroup.objects.create(name=f'Group {object_id[:4]}', object_id=object_id, is_deleted=True)
+        AzureGroup.all_objects.filter(pk=group.pk).update(deleted_at=timezone.now() - timedelta(days=days_ago))
+        GroupMembership.objects.create(group=group, contact=self.contact)
+        return group
+
+    def test_purge_removes_only_expired_groups(self):
+        """Test that the purge deletes expired soft-deleted groups and their dependents"""
+        expired = self._deleted_group('12345678-1234-1234-1234-123456789012', days_ago=60)
+        recent = self._deleted_group('22345678-1234-1234-1234-123456789012', days_ago=1)
+
+        result = purge_deleted_groups(retention_days=30, batch_size=1)
+
+        self.assertEqual(result.groups_purged, 1)
+        self.assertFalse(AzureGroup.all_objects.filter(pk=expired.pk).exists())
+        self.assertFalse(GroupMembership.objects.filter(group_id=expired.pk).exists())
+        self.assertTrue(AzureGroup.all_objects.filter(pk=recent.pk).exists())
+
+    def test_save_tracks_deleted_at(self):
+        """Test that deleted_at follows the is_deleted flag"""
+        group = AzureGroup.objects.create(name='Group', object_id='32345678-1234-1234-1234-123456789012')
+        self.assertIsNone(group.deleted_at)
+        group.is_deleted = True
+        group.save()
+        self.assertIsNotNone(group.deleted_at)
+        group.is_deleted = False
+        group.save()
+        self.assertIsNone(group.deleted_at)
+
+    def test_live_manager_excludes_deleted(self):
+        """Test that the default manager hides soft-deleted groups"""
+        live = AzureGroup.objects.create(name='Live', object_id='42345678-1234-1234-1234-123456789012')
+        deleted = self._deleted_group('52345678-1234-1234-1234-123456789012', days_ago=1)
+
+        self.assertEqual(list(AzureGroup.objects.values_list('pk', flat=True)), [live.pk])
+        self.assertEqual(AzureGroup.all_objects.count(), 2)
+        self.assertEqual(GroupMembership.objects.get(group_id=deleted.pk).group, deleted)
@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from ..models import OutboxEvent, OutboxStatusChoices
+from ..outbox import CREATED, DELETED, UPDATED, coalesce, dispatch, outbox_event, sign, write_events
+from .outbox_receiver import LocalReceiver
+
+
+def outbox_settings(**config):
+    plugins = dict(settings.PLUGINS_CONFIG)
+    plugins['netbox_azure_groups'] = {**plugins.get('netbox_azure_groups', {}), **config}
+    return override_settings(PLUGINS_CONFIG=plugins)
+
+
+class CoalesceTestCase(SimpleTestCase):
+
+    def events(self, *actions):
+        events = []
+        for pk, (object_id, action) in enumerate(actions, start=1):
+            event = outbox_event('group_membership', object_id, action, {'step': pk})
+            event.pk = pk
+            events.append(event)
+        return events
+
+    def test_coalesce(self):
+        """Test that events per entity merge into one net change"""
+        changes = coalesce(self.events(
+            (1, CREATED), (1, UPDATED), (2, CREATED), (2, DELETED), (3, UPDATED), (3, UPDATED), (4, UPDATED),
+            (4, DELETED),
+        ))
+        self.assertEqual([(c['object_id'], c['action']) for c in changes], [
+            (1, CREATED), (2, None), (3, UPDATED), (4, DELETED),
+        ])
+        self.assertEqual(changes[0]['event_ids'], [1, 2])
+        self.assertEqual(changes[0]['data'], {'step': 2})
+
+
+class DispatchTestCase(TestCase):
+
+    def setUp(self):
+        self.receiver = LocalReceiver().__enter__()
+        self.addCleanup(self.receiver.__exit__)
+        self.endpoint = {'url': self.receiver.url, 'secret': 's3cret'}
+        override = outbox_settings(outbox_endpoints=[self.endpoint], outbox_coalesce_seconds=0)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_dispatch_delivers_coalesced_batches(self):
+        """Test that pending events are delivered once, coalesced and signed"""
+        write_events([
+            outbox_event('group_membership', 1, CREATED, {}),
+            outbox_event('group_membership', 1, UPDATED, {'membership_type': 'nested'}),
+            outbox_event('group_membership', 2, CREATED, {}),
+            outbox_event('group_membership', 2, DELETED, {}),
+            outbox_event('access_grant', 1, DELETED, {}),
+        ])
+        result = dispatch(batch_size=1)
+
+        self.assertEqual((result.events, result.changes, result.batches), (5, 3, 2))
+        self.assertEqual(
+            [(c['topic'], c['object_id'], c['action']) for c in self.receiver.changes],
+            [('group_membership', 1, 'created'), ('access_grant', 1, 'deleted')],
+        )
+        self.assertEqual(self.receiver.changes[0]['data'], {'membership_type': 'nested'})
+        self.assertEqual(self.receiver.headers[0]['X-Hook-Signature'], sign(self.receiver.bodies[0], 's3cret'))
+        self.assertFalse(OutboxEvent.objects.exclude(status=OutboxStatusChoices.DELIVERED).exists())
+        self.assertEqual(dispatch().events, 0)
+
+    def test_failed_delivery_is_retried(self):
+        """Test that a failed batch stays pending with backoff and is delivered on a later pass"""
+        write_events([outbox_event('access_grant', 7, CREATED, {})])
+        self.receiver.fail(1)
+
+        result = dispatch()
+        self.assertEqual(result.failed_batches, 1)
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), (OutboxStatusChoices.PENDING, 1))
+        self.assertGreater(event.next_attempt, timezone.now())
+        self.assertEqual(dispatch().events, 0)
+
+        OutboxEvent.objects.update(next_attempt=timezone.now())
+        self.assertEqual(dispatch().failed_batches, 0)
+        self.assertEqual(OutboxEvent.objects.get().status, OutboxStatusChoices.DELIVERED)
+        self.assertEqual(len(self.receiver.changes), 1)
+
+    def test_newer_event_waits_for_retried_event(self):
+        """Test that a newer change to an entity is held back until an older retried one is due, then merged"""
+        write_events([outbox_event('access_grant', 7, CREATED, {})])
+        self.receiver.fail(1)
+        dispatch()
+
+        write_events([
+            outbox_event('access_grant', 7, UPDATED, {'access_level': 'admin'}),
+            outbox_event('access_grant', 8, CREATED, {}),
+        ])
+        self.assertEqual(dispatch().events, 1)
+        self.assertEqual([c['object_id'] for c in self.receiver.changes], [8])
+
+        OutboxEvent.objects.update(next_attempt=timezone.now())
+        self.assertEqual((dispatch().events, dispatch().events), (2, 0))
+        self.assertEqual(self.receiver.changes[1]['action'], 'created')
+        self.assertEqual(self.receiver.changes[1]['data'], {'access_level': 'admin'})
+
+    def test_failed_event_merges_with_newer_event(self):
+        """Test that an event out of attempts is sent again together with a newer change to its entity"""
+        write_events([outbox_event('access_grant', 7, CREATED, {})])
+        self.receiver.fail(1)
+        dispatch(max_attempts=1)
+        self.assertEqual(OutboxEvent.objects.get().status, OutboxStatusChoices.FAILED)
+
+        write_events([outbox_event('access_grant', 7, UPDATED, {})])
+        self.assertEqual(dispatch().events, 2)
+        self.assertEqual([c['action'] for c in self.receiver.changes], ['created'])
+        self.assertFalse(OutboxEvent.objects.exclude(status=OutboxStatusChoices.DELIVERED).exists())
+
+    def test_failed_endpoint_is_retried_alone(self):
+        """Test that a retry only goes to the endpoints that have not accepted the batch"""
+        with LocalReceiver() as other:
+            endpoints = [self.endpoint, {'url': other.url}]
+            write_events([outbox_event('access_grant', 7, CREATED, {})])
+            other.fail(1)
+
+            self.assertEqual(dispatch(endpoints=endpoints).failed_batches, 1)
+            event = OutboxEvent.objects.get()
+            self.assertEqual((event.status, event.delivered_to), (OutboxStatusChoices.PENDING, [self.receiver.url]))
+
+            OutboxEvent.objects.update(next_attempt=timezone.now())
+            self.assertEqual(dispatch(endpoints=endpoints).batches, 1)
+            self.assertEqual((len(self.receiver.batches), len(other.batches)), (1, 1))
+            self.assertEqual(OutboxEvent.objects.get().status, OutboxStatusChoices.DELIVERED)
+
+    def test_nothing_written_without_endpoints(self):
+        """Test that the outbox stays empty when no endpoint is configured"""
+        with outbox_settings(outbox_endpoints=[]):
+            write_events([outbox_event('access_grant', 1, CREATED, {})])
+        self.assertFalse(OutboxEvent.objects.exists())
@@ -0,0 +1,64 @@
+from django.test import SimpleTestCase, TestCase
+from tenancy.models import Contact
+
+from ..models import AzureGroup, GroupMembership
+from ..rules import RuleError, compile_rule, parse_rule, rule_members
+
+
+class RuleParserTestCase(SimpleTestCase):
+
+    def test_parse_precedence(self):
+        """Test that -and binds tighter than -or and operators are case-insensitive"""
+        tree, target = parse_rule('user.jobTitle -EQ "a" -or user.mail -startsWith "b" and user.phone -ne null')
+        self.assertEqual(target, 'user')
+        self.assertEqual(type(tree).__name__, 'Or')
+        self.assertEqual(type(tree.children[1]).__name__, 'And')
+
+    def test_parse_errors(self):
+        """Test that malformed rules raise RuleError"""
+        for rule in ('', 'user.mail -eq', 'user.mail -like "a"', '(user.mail -eq "a"',
+                     'user.mail -eq "a" -and device.displayName -eq "b"', 'user.mail -in "a"'):
+            with self.subTest(rule=rule):
+                with self.assertRaises(RuleError):
+                    parse_rule(rule)
+
+    def test_unsupported_conditions_are_residual(self):
+        """Test that -any over a multi-valued property falls back to in-memory evaluation"""
+        rule = compile_rule('(user.jobTitle -eq "Engineer") -and (user.otherMails -any (_ -contains "lab"))')
+        self.assertEqual(len(rule.residual), 1)
+        self.assertFalse(rule.in_database)
+
+    def test_compiled_rules_are_cached(self):
+        """Test that compiling the same rule text twice returns the cached result"""
+        self.assertIs(compile_rule('user.mail -eq "a@example.com"'), compile_rule('user.mail -eq "a@example.com"'))
+
+
+class RuleEvaluationTestCase(TestCase):
+
+    def setUp(self):
+        self.engineer = Contact.objects.create(
+            name='Engineer', title='Engineer', email='eng@example.com',
+            custom_field_data={'other_mails': ['eng@lab.example.com']}
+        )
+        self.manager = Contact.objects.create(name='Manager', title='manager', email='mgr@example.com')
+        self.group = AzureGroup.objects.create(name='Lab', object_id='12345678-1234-1234-1234-123456789012')
+
+    def test_rule_runs_as_one_query(self):
+        """Test that a fully compiled rule matches case-insensitively in a single query"""
+        rule = compile_rule('(user.jobTitle -in ["ENGINEER", "Manager"]) -and -not (user.mail -contains "mgr")')
+        self.assertTrue(rule.in_database)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(rule.filter().values_list('pk', flat=True)), [self.engineer.pk])
+
+    def test_member_of_compiles_to_subquery(self):
+        """Test that user.memberOf -any compiles to an EXISTS over memberships"""
+        GroupMembership.objects.create(group=self.group, contact=self.manager)
+        rule = compile_rule(f'user.memberOf -any (group.objectId -in ["{self.group.object_id}"])')
+        self.assertTrue(rule.in_database)
+        self.assertEqual(list(rule.filter()), [self.manager])
+
+    def test_residual_matches_in_memory(self):
+        """Test that residual conditions filter the database matches in Python"""
+        self.group.membership_rule = 'user.otherMails -any (_ -contains "@LAB.")'
+        self.assertEqual(list(rule_members(self.group)), [self.engineer])
+        self.assertTrue(compile_rule(self.group.membership_rule).matches(self.engineer))
@@ -0,0 +1,124 @@
+from datetime import date
+
+from django.test import SimpleTestCase, TestCase
+from tenancy.models import Contact
+
+from ..models import AccessControlMethod, AccessGrant, AccessSnapshot, AzureGroup, ProtectedResource
+from ..snapshots import (
+    SnapshotError,
+    access_diff,
+    decode_keys,
+    encode_keys,
+    grant_key,
+    grants_on,
+    net_changes,
+    split_key,
+    take_snapshot,
+)
+
+
+class GrantKeyCodecTestCase(SimpleTestCase):
+
+    def test_round_trip(self):
+        """Test that sorted keys survive compression, including large gaps"""
+        keys = [0, 1, 2, 10, 1000, 2 ** 40]
+        self.assertEqual(decode_keys(encode_keys(keys)), keys)
+        self.assertEqual(decode_keys(encode_keys([])), [])
+
+    def test_grant_key(self):
+        """Test that grant keys carry the contact and access level"""
+        self.assertEqual(split_key(grant_key(42, 'admin')), (42, 'admin'))
+        self.assertLess(grant_key(1, 'physical'), grant_key(2, 'read'))
+
+    def test_net_changes_merges_deltas(self):
+        """Test that only keys whose presence differs across the merged deltas are reported"""
+        segments = [
+            ('d1', encode_keys([1, 2, 3]), encode_keys([])),
+            ('d2', encode_keys([4]), encode_keys([1, 2])),
+            ('d3', encode_keys([1]), encode_keys([4, 5])),
+        ]
+        self.assertEqual(list(net_changes(segments)), [(1, True, 'd3'), (3, True, 'd1'), (5, False, 'd3')])
+
+
+class AccessSnapshotTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = AzureGroup.objects.create(name='Finance', object_id='e2345678-1234-1234-1234-123456789012')
+        cls.resource = ProtectedResource.objects.create(name='Finance Portal', resource_type='web_application')
+        cls.method = AccessControlMethod.objects.create(
+            resource=cls.resource, control_type='application_rbac', name='Portal users', azure_group=cls.group,
+            access_level='read',
+        )
+        cls.contacts = [Contact.objects.create(name=f'Contact {i}') for i in range(3)]
+
+    def grant(self, contact, level='read'):
+        return AccessGrant.objects.create(
+            resource=self.resource, contact=contact, azure_group=self.group, control_method=self.method,
+            access_level=level, granted_via='direct_membership',
+        )
+
+    def holders(self, day):
+        _, grants = grants_on(day, [self.resource.pk])
+        return sorted(split_key(key) for key in grants.get(self.resource.pk, ()))
+
+    def test_reconstructs_each_day_from_baseline_and_deltas(self):
+        """Test that any date resolves to the grant set of the latest snapshot at or before it"""
+        a, b, c = self.contacts
+        grant_a = self.grant(a)
+        self.grant(b, 'write')
+        take_snapshot(date(2025, 3, 1))
+
+        grant_a.is_active = False
+        grant_a.save()
+        self.grant(c)
+        take_snapshot(date(2025, 3, 2))
+        take_snapshot(date(2025, 3, 4))
+
+        self.assertTrue(AccessSnapshot.objects.get(date=date(2025, 3, 1)).is_baseline)
+        delta = AccessSnapshot.objects.get(date=date(2025, 3, 2))
+        self.assertFalse(delta.is_baseline)
+        self.assertEqual((delta.added_count, delta.removed_count, delta.grant_count), (1, 1, 2))
+        self.assertEqual(AccessSnapshot.objects.get(date=date(2025, 3, 4)).segments.count(), 0)
+
+        self.assertEqual(self.holders(date(2025, 3, 1)), [(a.pk, 'read'), (b.pk, 'write')])
+        self.assertEqual(self.holders(date(2025, 3, 3)), [(b.pk, 'write'), (c.pk, 'read')])
+        self.assertEqual(grants_on(date(2025, 2, 28)), (None, {}))
+
+    def test_diff_between_dates(self):
+        """Test that diffs report grants, revocations and level changes between two snapshots"""
+        a, b, c = self.contacts
+        grant_a = self.grant(a)
+        grant_b = self.grant(b)
+        take_snapshot(date(2025, 3, 1))
+        grant_a.is_active = False
+        grant_a.save()
+        grant_b.access_level = 'admin'
+        grant_b.save()
+        take_snapshot(date(2025, 3, 2), baseline=True)
+        self.grant(c)
+        take_snapshot(date(2025, 3, 3))
+
+        before, after, changes = access_diff(date(2025, 3, 1), date(2025, 3, 5))
+        self.assertEqual((before.date, after.date), (date(2025, 3, 1), date(2025, 3, 3)))
+        changes = {change['contact']: change for change in changes}
+        self.assertEqual(changes[a.pk]['change'], 'revoked')
+        self.assertEqual(
+            (changes[b.pk]['change'], changes[b.pk]['old_levels'], changes[b.pk]['new_levels']),
+            ('level_changed', ['read'], ['admin'])
+        )
+        self.assertEqual((changes[c.pk]['change'], changes[c.pk]['date']), ('granted', date(2025, 3, 3)))
+
+        _, _, changes = access_diff(date(2025, 3, 2), date(2025, 3, 3), contact_ids=[a.pk, b.pk])
+        self.assertEqual(list(changes), [])
+
+    def test_snapshots_are_taken_in_order(self):
+        """Test that re-running a day replaces it and earlier days are rejected"""
+        self.grant(self.contacts[0])
+        take_snapshot(date(2025, 3, 2))
+        self.grant(self.contacts[1])
+        take_snapshot(date(2025, 3, 2))
+
+        self.assertEqual(AccessSnapshot.objects.get().grant_count, 2)
+        with self.assertRaises(SnapshotError):
+            take_snapshot(date(2025, 3, 1))
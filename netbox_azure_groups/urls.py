@@ -9,6 +9,8 @@ urlpatterns = [
     path('azure-groups/<int:pk>/', views.AzureGroupView.as_view(), name='azuregroup'),
     path('azure-groups/<int:pk>/delete/', views.AzureGroupDeleteView.as_view(), name='azuregroup_delete'),
     path('azure-groups/<int:pk>/changelog/', views.AzureGroupChangeLogView.as_view(), name='azuregroup_changelog'),
+    path('group-similarities/', views.GroupSimilarityListView.as_view(), name='groupsimilarity_list'),
+    path('role-candidates/', views.RoleCandidateListView.as_view(), name='rolecandidate_list'),
     
     # Protected Resources - Full CRUD
     path('protected-resources/', views.ProtectedResourceListView.as_view(), name='protectedresource_list'),
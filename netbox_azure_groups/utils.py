@@ -0,0 +1,24 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+
+
+def _normalize(value):
+    if isinstance(value, datetime):
+        # Same instant must hash the same regardless of the tzinfo it was parsed with
+        return value.astimezone(timezone.utc).isoformat() if value.tzinfo else value.isoformat()
+    return value
+
+
+def fields_digest(values, fields):
+    """Stable 128-bit hex digest of ``values`` restricted to ``fields``."""
+    canonical = json.dumps(
+        [_normalize(values.get(name)) for name in fields],
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def jsonable(value):
+    """``value`` reduced to JSON-native types, as hashed by fields_digest()."""
+    return json.loads(json.dumps(_normalize(value), default=str))
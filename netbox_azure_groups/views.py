@@ -3,9 +3,10 @@ from django.db.models import Count
 from netbox.views import generic
 from utilities.views import ViewTab, register_model_view
 from . import filtersets, forms, models, tables
+from .metrics import InstrumentedViewMixin
 
 
-class AzureGroupView(generic.ObjectView):
+class AzureGroupView(InstrumentedViewMixin, generic.ObjectView):
     queryset = models.AzureGroup.objects.prefetch_related('tags')
 
     def get_extra_context(self, request, instance):
@@ -26,26 +27,36 @@ class AzureGroupView(generic.ObjectView):
         }
 
 
-class AzureGroupListView(generic.ObjectListView):
-    queryset = models.AzureGroup.objects.annotate(
-        total_members=Count('member_count')
-    )
+class AzureGroupListView(InstrumentedViewMixin, generic.ObjectListView):
+    queryset = models.AzureGroup.objects.all()
     table = tables.AzureGroupTable
     filterset = filtersets.AzureGroupFilterSet
     filterset_form = forms.AzureGroupFilterForm
 
 
-class AzureGroupDeleteView(generic.ObjectDeleteView):
-    queryset = models.AzureGroup.objects.all()
+class AzureGroupDeleteView(InstrumentedViewMixin, generic.ObjectDeleteView):
+    # Soft-deleted groups can still be removed by hand ahead of the retention purge
+    queryset = models.AzureGroup.all_objects.all()
 
 
-class AzureGroupChangeLogView(generic.ObjectChangeLogView):
-    queryset = models.AzureGroup.objects.all()
+class AzureGroupChangeLogView(InstrumentedViewMixin, generic.ObjectChangeLogView):
+    queryset = models.AzureGroup.all_objects.all()
+
+
+class GroupSimilarityListView(InstrumentedViewMixin, generic.ObjectListView):
+    queryset = models.GroupSimilarity.objects.select_related('group_a', 'group_b')
+    table = tables.GroupSimilarityTable
+    filterset = filtersets.GroupSimilarityFilterSet
+
+
+class RoleCandidateListView(InstrumentedViewMixin, generic.ObjectListView):
+    queryset = models.RoleCandidate.objects.select_related('closest_group')
+    table = tables.RoleCandidateTable
 
 
 # ProtectedResource Views
 
-class ProtectedResourceView(generic.ObjectView):
+class ProtectedResourceView(InstrumentedViewMixin, generic.ObjectView):
     queryset = models.ProtectedResource.objects.prefetch_related('tags')
     
     def get_extra_context(self, request, instance):
@@ -68,7 +79,7 @@ class ProtectedResourceView(generic.ObjectView):
         }
 
 
-class ProtectedResourceListView(generic.ObjectListView):
+class ProtectedResourceListView(InstrumentedViewMixin, generic.ObjectListView):
     queryset = models.ProtectedResource.objects.annotate(
         access_method_count=Count('access_control_methods'),
         grant_count=Count('access_grants')
@@ -78,14 +89,14 @@ class ProtectedResourceListView(generic.ObjectListView):
     filterset_form = forms.ProtectedResourceFilterForm
 
 
-class ProtectedResourceEditView(generic.ObjectEditView):
+class ProtectedResourceEditView(InstrumentedViewMixin, generic.ObjectEditView):
     queryset = models.ProtectedResource.objects.all()
     form = forms.ProtectedResourceForm
 
 
-class ProtectedResourceDeleteView(generic.ObjectDeleteView):
+class ProtectedResourceDeleteView(InstrumentedViewMixin, generic.ObjectDeleteView):
     queryset = models.ProtectedResource.objects.all()
 
 
-class ProtectedResourceChangeLogView(generic.ObjectChangeLogView):
+class ProtectedResourceChangeLogView(InstrumentedViewMixin, generic.ObjectChangeLogView):
     queryset = models.ProtectedResource.objects.all()
\ No newline at end of file
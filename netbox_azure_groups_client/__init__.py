@@ -0,0 +1,7 @@
+"""Asyncio client for the NetBox Azure Groups plugin API; usable without NetBox installed."""
+from .client import ApiError, AzureGroupsClient
+
+__all__ = (
+    'ApiError',
+    'AzureGroupsClient',
+)
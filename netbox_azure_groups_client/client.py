@@ -0,0 +1,322 @@
+"""
+Asyncio client for the plugin's REST API, for sync tools and scripts.
+
+One AzureGroupsClient holds a pooled httpx connection pool and a semaphore
+capping requests in flight, shared by everything sent through it:
+
+    async with AzureGroupsClient('https://netbox.example.com', token, concurrency=8) as client:
+        async for group in client.paginate('azure-groups/', group_type='security'):
+            ...
+        runs = await client.sync_memberships(groups, source='graph')
+
+Throttled (429) and failed (5xx) requests, and connection errors, are retried
+with exponential backoff and jitter, honouring ``Retry-After``. POSTs are only
+retried where repeating them is harmless: the bulk sync endpoints, or any
+request the server did not process (429, 503, connection refused).
+
+Bulk payloads are split into chunks of ``chunk_size`` records and sent
+concurrently. List endpoints are read as async iterators: ``paginate()``
+fetches offset pages ahead within the concurrency limit, ``changes()``
+follows the change feed cursor.
+
+Only httpx is required (``pip install netbox-azure-groups[client]``).
+"""
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger('netbox_azure_groups_client')
+
+API_ROOT = '/api/plugins/azure-groups/'
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses meaning the server did not act on the request, so even a POST may be repeated
+UNPROCESSED_STATUSES = {429, 503}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+class ApiError(Exception):
+    """A request failed with a non-success status after any retries."""
+
+    def __init__(self, status: int, body: Any, method: str = '', url: str = ''):
+        super().__init__(f'{method} {url} returned {status}: {body}')
+        self.status = status
+        self.body = body
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds requested by a Retry-After header (delta or HTTP date), if any."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(moment.timestamp() - time.time(), 0.0)
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def chunk_groups(groups: List[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+    """Split membership sync entries into chunks of about ``size`` members, never splitting a group."""
+    chunks, current, members = [], [], 0
+    for group in groups:
+        count = max(len(group.get('members', [])), 1)
+        if current and members + count > size:
+            chunks.append(current)
+            current, members = [], 0
+        current.append(group)
+        members += count
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class AzureGroupsClient:
+    """
+    Pooled, concurrency-limited client for ``/api/plugins/azure-groups/``.
+
+    ``transport`` replaces the network transport, e.g. with an
+    ``httpx.MockTransport`` in tests.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        *,
+        concurrency: int = 8,
+        chunk_size: int = 500,
+        timeout: float = 30.0,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 60.0,
+        verify: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=url.rstrip('/') + API_ROOT,
+            headers={'Authorization': f'Token {token}', 'Accept': 'application/json'},
+            timeout=timeout,
+            verify=verify,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> 'AzureGroupsClient':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    # Requests
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        requested = retry_after(response) if response is not None else None
+        if requested is not None:
+            return min(requested, self.max_backoff)
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(self.backoff * 2 ** attempt, self.max_backoff))
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        idempotent: Optional[bool] = None,
+    ) -> Any:
+        """
+        Send one request and return its decoded JSON body (None when empty).
+
+        ``path`` is relative to the plugin API root, or an absolute URL such as
+        a ``next`` link. ``idempotent`` overrides whether a failed request may
+        be repeated; by default only non-POST/PATCH requests are.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with self._semaphore:
+                    response = await self._client.request(method, path, params=params, json=json)
+            except httpx.TransportError as e:
+                # Nothing reached the server if the connection could not be opened
+                retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                logger.debug(f'{method} {path} failed ({e!r}); retrying')
+            else:
+                if response.status_code < 400:
+                    return response.json() if response.content else None
+                retryable = response.status_code in RETRY_STATUSES and (
+                    idempotent or response.status_code in UNPROCESSED_STATUSES
+                )
+                if not retryable or attempt >= self.max_retries:
+                    try:
+                        body = response.json()
+                    except ValueError:
+                        body = response.text
+                    raise ApiError(response.status_code, body, method, str(response.request.url))
+                logger.debug(f'{method} {path} returned {response.status_code}; retrying')
+            await asyncio.sleep(self._delay(attempt, response))
+            attempt += 1
+
+    async def get(self, path: str, **params) -> Any:
+        return await self.request('GET', path, params=params or None)
+
+    async def post(self, path: str, body: Any, idempotent: Optional[bool] = None) -> Any:
+        return await self.request('POST', path, json=body, idempotent=idempotent)
+
+    async def patch(self, path: str, body: Any) -> Any:
+        return await self.request('PATCH', path, json=body)
+
+    async def delete(self, path: str) -> Any:
+        return await self.request('DELETE', path)
+
+    # Paging
+
+    async def paginate(self, path: str, page_size: int = 250, **params) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield every object of a list endpoint, in order.
+
+        The first page reveals the total count; the remaining offsets are then
+        fetched up to ``concurrency`` pages ahead of the consumer.
+        """
+        first = await self.get(path, limit=page_size, offset=0, **params)
+        for item in first['results']:
+            yield item
+        offsets = list(range(page_size, first.get('count') or 0, page_size))
+        if not offsets:
+            return
+
+        pending = []
+        try:
+            for offset in offsets:
+                pending.append(asyncio.ensure_future(self.get(path, limit=page_size, offset=offset, **params)))
+                if len(pending) < self.concurrency:
+                    continue
+                for item in (await pending.pop(0))['results']:
+                    yield item
+            while pending:
+                for item in (await pending.pop(0))['results']:
+                    yield item
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def changes(
+        self,
+        cursor: Optional[str] = None,
+        models: Iterable[str] = (),
+        limit: int = 500,
+        follow: bool = False,
+        interval: float = 10.0,
+    ) -> AsyncIterator[Tuple[Dict[str, Any], Optional[str]]]:
+        """
+        Yield ``(change, cursor)`` pairs from the change feed after ``cursor``.
+
+        ``models`` are model names such as ``azuregroup``. The cursor is only
+        set on the last change of each page (None on the others): persist it
+        once that change is processed to resume after it. Stops once caught up
+        unless ``follow`` is set, in which case it polls every ``interval``
+        seconds.
+        """
+        models = list(models)
+        while True:
+            params = {'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            if models:
+                params['model'] = models
+            page = await self.get('changes/', **params)
+            results = page['results']
+            for index, change in enumerate(results, start=1):
+                yield change, page['cursor'] if index == len(results) else None
+            cursor = page['cursor']
+            if page['has_more']:
+                continue
+            if not follow:
+                return
+            await asyncio.sleep(interval)
+
+    # Bulk endpoints
+
+    async def _send_chunks(self, path: str, bodies: List[Any], idempotent: bool) -> List[Any]:
+        return list(await asyncio.gather(*(self.post(path, body, idempotent=idempotent) for body in bodies)))
+
+    async def bulk_create(self, path: str, objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create objects through a list endpoint in concurrent chunks. Returns the created objects in order."""
+        results = await self._send_chunks(path, chunked(list(objects), self.chunk_size), idempotent=False)
+        return [created for chunk in results for created in chunk]
+
+    async def sync_groups(
+        self,
+        groups: List[Dict[str, Any]],
+        source: str,
+        source_host: str = '',
+        complete: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Upsert groups through ``azure-groups/bulk-sync/``. Returns the SyncRun of each chunk.
+
+        A ``complete`` sync soft-deletes groups missing from the payload, so it
+        is sent as a single request rather than in chunks.
+        """
+        groups = list(groups)
+        chunks = [groups] if complete else chunked(groups, self.chunk_size)
+        bodies = [
+            {'source': source, 'source_host': source_host, 'complete': complete, 'groups': chunk}
+            for chunk in chunks
+        ]
+        return await self._send_chunks('azure-groups/bulk-sync/', bodies, idempotent=True)
+
+    async def sync_memberships(
+        self,
+        groups: List[Dict[str, Any]],
+        source: str,
+        source_host: str = '',
+    ) -> List[Dict[str, Any]]:
+        """
+        Reconcile member lists through ``group-memberships/bulk-sync/``. Returns the SyncRun of each chunk.
+
+        ``groups`` are ``{'object_id', 'members'}`` entries; each chunk carries
+        about ``chunk_size`` members, and a group's list is never split.
+        """
+        bodies = [
+            {'source': source, 'source_host': source_host, 'groups': chunk}
+            for chunk in chunk_groups(list(groups), self.chunk_size)
+        ]
+        return await self._send_chunks('group-memberships/bulk-sync/', bodies, idempotent=True)
+
+    async def import_fortigate_policies(self, policies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Upsert FortiGate policies through ``fortigate-policies/bulk-import/`` in chunks."""
+        return await self._send_chunks(
+            'fortigate-policies/bulk-import/', chunked(list(policies), self.chunk_size), idempotent=True
+        )
@@ -0,0 +1,145 @@
+"""
+Local stand-in for the plugin API, for testing sync tools without NetBox.
+
+StandInServer answers on localhost with just enough of the API for the
+client: offset-paged lists of whatever is put in ``objects``, a change feed
+over ``changes``, and the bulk endpoints, which record each payload in
+``received``. ``fail(n, status, retry_after)`` makes the next ``n`` requests
+fail; ``requests`` logs every request as ``(method, path, query)``.
+
+    with StandInServer() as server:
+        server.objects['azure-groups'] = [{'id': 1, 'name': 'Staff'}]
+        async with AzureGroupsClient(server.url, 'token') as client:
+            ...
+"""
+import json
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .client import API_ROOT
+
+BULK_PATHS = ('azure-groups/bulk-sync/', 'group-memberships/bulk-sync/', 'fortigate-policies/bulk-import/')
+
+
+class StandInServer:
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0):
+        self.objects = defaultdict(list)
+        self.changes = []
+        self.received = defaultdict(list)
+        self.requests = []
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._failures = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._handle(self, 'GET')
+
+            def do_POST(self):
+                server._handle(self, 'POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://{host}:{self.server.server_address[1]}'
+        self._thread = None
+
+    def fail(self, count=1, status=503, retry_after=None):
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    # Handling
+
+    def _handle(self, handler, method):
+        url = urlsplit(handler.path)
+        path = url.path[len(API_ROOT):] if url.path.startswith(API_ROOT) else url.path
+        query = parse_qs(url.query)
+        length = int(handler.headers.get('Content-Length', 0))
+        body = json.loads(handler.rfile.read(length)) if length else None
+
+        with self._lock:
+            self.requests.append((method, path, query))
+            failure = self._failures.pop(0) if self._failures else None
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                threading.Event().wait(self.delay)
+            if failure:
+                status, retry_after = failure
+                headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+                return self._respond(handler, status, {'detail': 'Unavailable'}, headers)
+            if method == 'POST' and path in BULK_PATHS:
+                with self._lock:
+                    self.received[path].append(body)
+                return self._respond(handler, 200, self._bulk_response(path, body))
+            if method == 'GET' and path == 'changes/':
+                return self._respond(handler, 200, self._changes(query))
+            if method == 'GET' and path.rstrip('/') in self.objects:
+                return self._respond(handler, 200, self._list(path.rstrip('/'), query))
+            self._respond(handler, 404, {'detail': 'Not found.'})
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _respond(self, handler, status, data, headers=None):
+        payload = json.dumps(data).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _list(self, name, query):
+        objects = self.objects[name]
+        limit = int(query.get('limit', ['50'])[0])
+        offset = int(query.get('offset', ['0'])[0])
+        following = offset + limit < len(objects)
+        return {
+            'count': len(objects),
+            'next': f'{self.url}{API_ROOT}{name}/?limit={limit}&offset={offset + limit}' if following else None,
+            'previous': None,
+            'results': objects[offset:offset + limit],
+        }
+
+    def _changes(self, query):
+        # Cursors are plain positions in ``changes``
+        start = int(query.get('cursor', ['0'])[0])
+        limit = int(query.get('limit', ['100'])[0])
+        models = query.get('model')
+        entries = self.changes[start:]
+        results, position = [], start
+        for entry in entries:
+            if len(results) == limit:
+                break
+            position += 1
+            # Entries carry app labels; the model filter takes plain model names
+            if not models or entry['model'].split('.')[-1] in models:
+                results.append(entry)
+        return {'cursor': str(position), 'has_more': position < len(self.changes), 'results': results}
+
+    def _bulk_response(self, path, body):
+        if path == 'fortigate-policies/bulk-import/':
+            return {'sync_run': len(self.received[path]), 'created': len(body), 'updated': 0, 'errors': []}
+        return {'id': len(self.received[path]), 'status': 'completed', 'source': body.get('source')}
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
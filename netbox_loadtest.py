@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+NetBox Azure Groups - API Load Test Harness
+
+Drives the plugin REST API with the traffic profile seen in production: one
+sync writer doing bulk upserts while many readers hit the access lookups,
+statistics and list endpoints. Reports latency percentiles and throughput per
+endpoint. Only the standard library is used, so it runs anywhere a NetBox dev
+server is reachable.
+
+Usage:
+    # Populate a dev instance with a deterministic synthetic dataset
+    python netbox_loadtest.py seed --url http://localhost:8000 --token $TOKEN
+
+    # Run the load profile for two minutes with 32 readers and one writer
+    python netbox_loadtest.py run --url http://localhost:8000 --token $TOKEN \\
+        --readers 32 --duration 120
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+API_ROOT = '/api/plugins/azure-groups'
+BULK_CHUNK_SIZE = 500
+# Policy IDs are unique across all hosts; the writer keeps to a range well clear of real ones
+POLICY_ID_BASE = 900_000_000
+
+logger = logging.getLogger('netbox_loadtest')
+
+
+@dataclass
+class DatasetSpec:
+    """Size of the synthetic dataset created by ``seed``."""
+    contacts: int = 2000
+    groups: int = 400
+    resources: int = 60
+    memberships_per_contact: int = 8
+    methods_per_resource: int = 3
+    prefix: str = 'lt'
+    seed: int = 1
+
+
+@dataclass
+class EndpointStats:
+    """Latency samples and error count for one endpoint label."""
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        # Nearest-rank percentile
+        rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+
+class ApiClient:
+    """
+    Minimal keep-alive JSON client for the NetBox API.
+
+    One instance per worker thread; ``http.client`` connections are not
+    thread-safe.
+    """
+
+    def __init__(self, base_url: str, token: str, timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or 'http'
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.headers = {
+            'Authorization': f'Token {token}',
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+        }
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            conn_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            self._conn = conn_class(self.netloc, timeout=self.timeout)
+        return self._conn
+
+    def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                body: Any = None) -> Tuple[int, Any]:
+        url = f'{self.prefix}{path}'
+        if params:
+            url = f'{url}?{urlencode(params)}'
+        payload = json.dumps(body) if body is not None else None
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request(method, url, body=payload, headers=self.headers)
+                response = conn.getresponse()
+                raw = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError, OSError):
+                # Server closed the keep-alive connection; reconnect once
+                conn.close()
+                self._conn = None
+                if attempt == 2:
+                    raise
+        data = json.loads(raw) if raw else None
+        return response.status, data
+
+    def get(self, path: str, **params) -> Tuple[int, Any]:
+        return self.request('GET', path, params=params)
+
+    def post(self, path: str, body: Any) -> Tuple[int, Any]:
+        return self.request('POST', path, body=body)
+
+    def patch(self, path: str, body: Any) -> Tuple[int, Any]:
+        return self.request('PATCH', path, body=body)
+
+    def collect_ids(self, path: str, limit: int, **params) -> List[int]:
+        """Page through a list endpoint and return up to ``limit`` object IDs."""
+        ids: List[int] = []
+        offset = 0
+        while len(ids) < limit:
+            status, data = self.get(path, brief=1, limit=min(1000, limit - len(ids)), offset=offset, **params)
+            if status != 200:
+                raise RuntimeError(f'GET {path} failed with HTTP {status}: {data}')
+            ids.extend(item['id'] for item in data['results'])
+            if not data.get('next'):
+                break
+            offset += len(data['results'])
+        return ids
+
+
+def bulk_create(client: ApiClient, path: str, objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Create objects through NetBox's list POST in fixed-size chunks."""
+    created: List[Dict[str, Any]] = []
+    for start in range(0, len(objects), BULK_CHUNK_SIZE):
+        chunk = objects[start:start + BULK_CHUNK_SIZE]
+        status, data = client.post(path, chunk)
+        if status != 201:
+            raise RuntimeError(f'POST {path} failed with HTTP {status}: {data}')
+        created.extend(data)
+        logger.info(f'{path}: {len(created)}/{len(objects)}')
+    return created
+
+
+def seed_dataset(client: ApiClient, spec: DatasetSpec) -> Dict[str, int]:
+    """
+    Create a deterministic synthetic dataset.
+
+    The same spec always produces the same names, GUIDs and relationships, so
+    runs against a freshly seeded instance are directly comparable.
+    """
+    rng = random.Random(spec.seed)
+
+    contacts = bulk_create(client, '/api/tenancy/contacts/', [
+        {'name': f'{spec.prefix}-contact-{i:06d}', 'email': f'{spec.prefix}.contact{i}@example.com'}
+        for i in range(spec.contacts)
+    ])
+    contact_ids = [c['id'] for c in contacts]
+
+    groups = bulk_create(client, f'{API_ROOT}/azure-groups/', [
+        {
+            'name': f'{spec.prefix}-group-{i:05d}',
+            'object_id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'group_type': rng.choice(['security', 'security', 'microsoft365', 'distribution']),
+            'source': 'azure_ad',
+            'is_security_enabled': True,
+        }
+        for i in range(spec.groups)
+    ])
+    group_ids = [g['id'] for g in groups]
+
+    # Skewed membership: a few large groups, a long tail of small ones
+    members_by_group: Dict[int, List[int]] = defaultdict(list)
+    memberships = []
+    for contact_id in contact_ids:
+        picks = set()
+        while len(picks) < min(spec.memberships_per_contact, len(group_ids)):
+            picks.add(group_ids[min(len(group_ids) - 1, int(rng.paretovariate(1.2)) - 1)]
+                      if rng.random() < 0.3 else rng.choice(group_ids))
+        for group_id in picks:
+            members_by_group[group_id].append(contact_id)
+            memberships.append({'group': group_id, 'contact': contact_id, 'membership_type': 'direct'})
+    bulk_create(client, f'{API_ROOT}/group-memberships/', memberships)
+
+    resources = bulk_create(client, f'{API_ROOT}/protected-resources/', [
+        {
+            'name': f'{spec.prefix}-resource-{i:04d}',
+            'resource_type': rng.choice(['web_application', 'database', 'file_share', 'api_service']),
+            'criticality': rng.choice(['low', 'medium', 'high', 'critical']),
+            'business_unit': rng.choice(['Finance', 'HR', 'Engineering', 'Sales', 'Operations']),
+        }
+        for i in range(spec.resources)
+    ])
+
+    methods_payload = []
+    for resource in resources:
+        for n, group_id in enumerate(rng.sample(group_ids, min(spec.methods_per_resource, len(group_ids)))):
+            methods_payload.append({
+                'resource': resource['id'],
+                'control_type': rng.choice(['fortigate_policy', 'application_rbac', 'cloud_iam']),
+                'name': f'{spec.prefix}-method-{resource["id"]}-{n}',
+                'azure_group': group_id,
+                'access_level': rng.choice(['read', 'read', 'write', 'admin']),
+            })
+    methods = bulk_create(client, f'{API_ROOT}/access-control-methods/', methods_payload)
+
+    grants_payload = []
+    for method in methods:
+        group_id = method['azure_group']
+        for contact_id in members_by_group.get(group_id, []):
+            grants_payload.append({
+                'resource': method['resource'],
+                'contact': contact_id,
+                'azure_group': group_id,
+                'control_method': method['id'],
+                'access_level': method['access_level'],
+            })
+    bulk_create(client, f'{API_ROOT}/access-grants/', grants_payload)
+
+    return {
+        'contacts': len(contact_ids),
+        'groups': len(group_ids),
+        'memberships': len(memberships),
+        'resources': len(resources),
+        'access_control_methods': len(methods),
+        'access_grants': len(grants_payload),
+    }
+
+
+class LoadRunner:
+    """
+    Runs reader and writer threads against a seeded instance.
+
+    Readers pick an endpoint by weight and hit it back-to-back; the writer
+    issues a bulk upsert every ``write_interval`` seconds. Each request is
+    timed individually and attributed to its endpoint label.
+    """
+
+    READ_MIX = [
+        ('who-has-access', 30),
+        ('by-contact', 30),
+        ('stats', 10),
+        ('azure-groups list', 10),
+        ('group-memberships list', 10),
+        ('access-grants list', 10),
+    ]
+
+    def __init__(self, base_url: str, token: str, readers: int, duration: float,
+                 write_batch: int, write_interval: float, seed: int = 1):
+        self.base_url = base_url
+        self.token = token
+        self.readers = readers
+        self.duration = duration
+        self.write_batch = write_batch
+        self.write_interval = write_interval
+        self.seed = seed
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.resource_ids: List[int] = []
+        self.contact_ids: List[int] = []
+        self.group_ids: List[int] = []
+
+    def discover(self) -> None:
+        """Load the object IDs readers and the writer will target."""
+        client = ApiClient(self.base_url, self.token)
+        self.resource_ids = client.collect_ids(f'{API_ROOT}/protected-resources/', 5000)
+        self.contact_ids = client.collect_ids('/api/tenancy/contacts/', 20000)
+        self.group_ids = client.collect_ids(f'{API_ROOT}/azure-groups/', 20000)
+        if not (self.resource_ids and self.contact_ids and self.group_ids):
+            raise RuntimeError('Target instance has no data; run the "seed" command first')
+
+    def _record(self, label: str, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            stats = self.stats[label]
+            stats.latencies.append(elapsed)
+            if not ok:
+                stats.errors += 1
+
+    def _timed(self, client: ApiClient, label: str, method: str, path: str,
+               params: Optional[Dict[str, Any]] = None, body: Any = None) -> None:
+        start = time.perf_counter()
+        try:
+            status, _ = client.request(method, path, params=params, body=body)
+            ok = 200 <= status < 300
+        except Exception as e:
+            logger.debug(f'{label}: {e}')
+            ok = False
+        self._record(label, time.perf_counter() - start, ok)
+
+    def _reader(self, worker: int) -> None:
+        rng = random.Random(self.seed * 1000 + worker)
+        client = ApiClient(self.base_url, self.token)
+        labels = [label for label, _ in self.READ_MIX]
+        weights = [weight for _, weight in self.READ_MIX]
+        while not self._stop.is_set():
+            label = rng.choices(labels, weights)[0]
+            if label == 'who-has-access':
+                path = f'{API_ROOT}/protected-resources/{rng.choice(self.resource_ids)}/who-has-access/'
+                self._timed(client, label, 'GET', path)
+            elif label == 'by-contact':
+                self._timed(client, label, 'GET', f'{API_ROOT}/access-grants/by-contact/',
+                            {'contact_id': rng.choice(self.contact_ids)})
+            elif label == 'stats':
+                self._timed(client, label, 'GET', f'{API_ROOT}/azure-groups/stats/')
+            else:
+                endpoint = label.split()[0]
+                self._timed(client, label, 'GET', f'{API_ROOT}/{endpoint}/',
+                            {'limit': 50, 'offset': rng.randrange(0, 2000, 50)})
+
+    def _writer(self) -> None:
+        rng = random.Random(self.seed)
+        client = ApiClient(self.base_url, self.token)
+        # Fixed pool of synced groups so repeated rounds update rather than grow the table
+        sync_pool = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(self.write_batch * 5)]
+        while not self._stop.is_set():
+            # Bulk update a random slice of groups through NetBox's list PATCH
+            batch = rng.sample(self.group_ids, min(self.write_batch, len(self.group_ids)))
+            body = [{'id': pk, 'description': f'synced {time.time():.0f}'} for pk in batch]
+            self._timed(client, 'azure-groups bulk update', 'PATCH', f'{API_ROOT}/azure-groups/', body=body)
+
+            # Upsert groups keyed by object_id, as the directory sync does
+            groups = [
+                {'object_id': object_id, 'name': f'loadtest sync group {object_id[:8]}', 'source': 'azure_ad',
+                 'description': rng.choice(['', 'synced', 'renamed upstream'])}
+                for object_id in rng.sample(sync_pool, self.write_batch)
+            ]
+            self._timed(client, 'azure-groups bulk-sync', 'POST', f'{API_ROOT}/azure-groups/bulk-sync/',
+                        body={'source': 'graph', 'source_host': 'loadtest', 'groups': groups})
+
+            # Upsert a batch of firewall policies through the bulk-import endpoint
+            policy_ids = rng.sample(range(POLICY_ID_BASE, POLICY_ID_BASE + self.write_batch * 10), self.write_batch)
+            policies = [
+                {
+                    'policy_id': policy_id,
+                    'fortigate_host': 'fgt-loadtest',
+                    'name': f'loadtest policy {n}',
+                    'action': rng.choice(['accept', 'deny']),
+                }
+                for n, policy_id in enumerate(policy_ids)
+            ]
+            self._timed(client, 'fortigate bulk-import', 'POST', f'{API_ROOT}/fortigate-policies/bulk-import/',
+                        body=policies)
+            self._stop.wait(self.write_interval)
+
+    def run(self, with_writer: bool = True) -> float:
+        """Run the profile and return the measured wall time in seconds."""
+        threads = [threading.Thread(target=self._reader, args=(n,), daemon=True) for n in range(self.readers)]
+        if with_writer:
+            threads.append(threading.Thread(target=self._writer, daemon=True))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        self._stop.wait(self.duration)
+        self._stop.set()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        """Summarize latencies (milliseconds) and throughput per endpoint."""
+        summary = {}
+        for label in sorted(self.stats):
+            stats = self.stats[label]
+            summary[label] = {
+                'requests': len(stats.latencies),
+                'errors': stats.errors,
+                'rps': round(len(stats.latencies) / elapsed, 2) if elapsed else 0.0,
+                'p50_ms': round(stats.percentile(50) * 1000, 1),
+                'p90_ms': round(stats.percentile(90) * 1000, 1),
+                'p95_ms': round(stats.percentile(95) * 1000, 1),
+                'p99_ms': round(stats.percentile(99) * 1000, 1),
+                'max_ms': round(max(stats.latencies, default=0.0) * 1000, 1),
+            }
+        return summary
+
+
+def print_report(summary: Dict[str, Dict[str, float]]) -> None:
+    columns = ['requests', 'errors', 'rps', 'p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'max_ms']
+    width = max([len(label) for label in summary] + [8])
+    print(f"{'endpoint':<{width}}  " + '  '.join(f'{c:>9}' for c in columns))
+    for label, row in summary.items():
+        print(f'{label:<{width}}  ' + '  '.join(f'{row[c]:>9}' for c in columns))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Load test the NetBox Azure Groups plugin API')
+    parser.add_argument('--url', default='http://localhost:8000', help='NetBox base URL')
+    parser.add_argument('--token', required=True, help='NetBox API token')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for dataset and traffic')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = subparsers.add_parser('seed', help='Create the synthetic dataset')
+    seed_parser.add_argument('--contacts', type=int, default=DatasetSpec.contacts)
+    seed_parser.add_argument('--groups', type=int, default=DatasetSpec.groups)
+    seed_parser.add_argument('--resources', type=int, default=DatasetSpec.resources)
+    seed_parser.add_argument('--memberships-per-contact', type=int, default=DatasetSpec.memberships_per_contact)
+    seed_parser.add_argument('--prefix', default=DatasetSpec.prefix, help='Name prefix for created objects')
+
+    run_parser = subparsers.add_parser('run', help='Run the load profile')
+    run_parser.add_argument('--readers', type=int, default=32, help='Concurrent reader threads')
+    run_parser.add_argument('--duration', type=float, default=60.0, help='Test duration in seconds')
+    run_parser.add_argument('--write-batch', type=int, default=200, help='Objects per bulk write')
+    run_parser.add_argument('--write-interval', type=float, default=1.0, help='Seconds between bulk writes')
+    run_parser.add_argument('--no-writer', action='store_true', help='Run readers only')
+    run_parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.command == 'seed':
+        spec = DatasetSpec(
+            contacts=args.contacts,
+            groups=args.groups,
+            resources=args.resources,
+            memberships_per_contact=args.memberships_per_contact,
+            prefix=args.prefix,
+            seed=args.seed,
+        )
+        counts = seed_dataset(ApiClient(args.url, args.token), spec)
+        print(json.dumps(counts, indent=2))
+        return 0
+
+    runner = LoadRunner(
+        args.url, args.token,
+        readers=args.readers,
+        duration=args.duration,
+        write_batch=args.write_batch,
+        write_interval=args.write_interval,
+        seed=args.seed,
+    )
+    runner.discover()
+    elapsed = runner.run(with_writer=not args.no_writer)
+    summary = runner.report(elapsed)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+    return 1 if any(row['errors'] for row in summary.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,10 @@ setup(
     install_requires=[
         'netbox>=3.0.0',
     ],
+    extras_require={
+        'analytics': ['numpy>=1.22', 'scipy>=1.8'],
+        'client': ['httpx>=0.24'],
+    },
     packages=find_packages(),
     include_package_data=True,
     zip_safe=False,